@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按月归档旧文章
+主库只保留最近几个月的文章，更早的文章及其统计数据按发布月份移入
+data/archive/wechat_monitor_YYYY-MM.db，查询时按需 ATTACH 对应月份的归档库
+"""
+
+import sys
+import argparse
+import logging
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.database import WechatDatabase
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='把较早月份的文章移入月度归档库')
+    parser.add_argument('--hot-months', type=int, default=3,
+                        help='主库保留的月份数（含当月，默认: 3）')
+    parser.add_argument('--dry-run', action='store_true', help='只列出将归档的月份，不实际归档')
+    args = parser.parse_args()
+
+    db_path = PROJECT_ROOT / "data" / "wechat_monitor.db"
+    if not db_path.exists():
+        print(f"❌ 数据库文件不存在: {db_path}")
+        print("请先运行 migrate_to_db.py 迁移数据")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("📦 按月归档旧文章" + ("（试运行）" if args.dry_run else ""))
+    print("=" * 60)
+
+    with WechatDatabase(str(db_path)) as db:
+        months = db.get_archivable_months(hot_months=args.hot_months)
+        if not months:
+            print("\n✅ 没有需要归档的月份")
+            return
+
+        total_articles = 0
+        for month, count in months:
+            if args.dry_run:
+                print(f"  - {month}: {count} 篇 -> {db.archive_path(month)}")
+                total_articles += count
+                continue
+
+            result = db.archive_month(month)
+            print(f"  ✅ {month}: {result['articles']} 篇文章, {result['stats']} 条统计数据")
+            total_articles += result['articles']
+
+    action = "将归档" if args.dry_run else "已归档"
+    print(f"\n{action} {len(months)} 个月, 共 {total_articles} 篇文章")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,14 +5,25 @@
 专注分析哪些选题方向的互动数据表现好（点赞、在看、评论）
 """
 
+import sys
 import json
 import re
 from pathlib import Path
 from collections import defaultdict, Counter
 import statistics
 
-PROJECT_ROOT = Path(__file__).parent.parent
+# 在 archived/ 中运行或移回 scripts/ 后运行都能找到 utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.analytics import AnalyticsEngine
+from utils.database import WechatDatabase
+
+# 本文件位于 scripts/archived/，项目根目录在上两级
+PROJECT_ROOT = Path(__file__).parent.parent.parent
 ARTICLES_DIR = PROJECT_ROOT / "data" / "articles"
+DB_PATH = PROJECT_ROOT / "data" / "wechat_monitor.db"
+PARQUET_DIR = PROJECT_ROOT / "data" / "parquet"
 
 
 def load_article_data():
@@ -72,17 +83,10 @@ def load_article_data():
     return articles
 
 
-def extract_topic_keywords(title):
-    """从标题中提取话题关键词"""
-    keywords = {
-        'ai_models': [],
-        'tools': [],
-        'topics': [],
-        'actions': []
-    }
-
+# 话题关键词：标题中出现的词 -> 归一化的关键词
+TOPIC_KEYWORDS = {
     # AI模型/产品
-    ai_models = {
+    'ai_models': {
         'DeepSeek': 'DeepSeek',
         'deepseek': 'DeepSeek',
         'Claude': 'Claude',
@@ -96,10 +100,9 @@ def extract_topic_keywords(title):
         'PaddleOCR': 'PaddleOCR',
         'OCR': 'OCR',
         'Atlas': 'Atlas'
-    }
-
+    },
     # 技术话题
-    topics = {
+    'topics': {
         '视频': '视频生成',
         '图': '图像生成',
         'OCR': 'OCR',
@@ -112,10 +115,9 @@ def extract_topic_keywords(title):
         'PPT': 'PPT制作',
         '总结': 'AI总结',
         '压缩': '数据压缩'
-    }
-
+    },
     # 动作词
-    actions = {
+    'actions': {
         '测': '实测',
         '实测': '实测',
         '对比': '对比',
@@ -129,21 +131,23 @@ def extract_topic_keywords(title):
         '发布': '新品发布',
         '推出': '新品发布'
     }
+}
 
-    # 提取AI模型
-    for key, value in ai_models.items():
-        if key in title:
-            keywords['ai_models'].append(value)
 
-    # 提取话题
-    for key, value in topics.items():
-        if key in title:
-            keywords['topics'].append(value)
+def extract_topic_keywords(title):
+    """从标题中提取话题关键词"""
+    keywords = {
+        'ai_models': [],
+        'tools': [],
+        'topics': [],
+        'actions': []
+    }
 
-    # 提取动作
-    for key, value in actions.items():
-        if key in title:
-            keywords['actions'].append(value)
+    # 提取AI模型、话题、动作
+    for keyword_type, mapping in TOPIC_KEYWORDS.items():
+        for key, value in mapping.items():
+            if key in title:
+                keywords[keyword_type].append(value)
 
     # 去重
     for key in keywords:
@@ -171,8 +175,43 @@ def analyze_high_engagement_articles(articles, top_n=20):
     return sorted_by_engagement[:top_n], sorted_by_total[:top_n]
 
 
+def analyze_engagement_patterns_in_db(articles):
+    """
+    分析互动模式（关键词交叉表由分析引擎在数据库上聚合）
+
+    Returns:
+        与 analyze_engagement_patterns() 相同结构的关键词统计
+    """
+    keyword_groups = defaultdict(list)
+    for keyword_type, mapping in TOPIC_KEYWORDS.items():
+        for key, value in mapping.items():
+            keyword_groups[keyword_type + '_' + value].append(key)
+
+    article_ids = [WechatDatabase.extract_article_id(a.get('url', '')) for a in articles]
+
+    with AnalyticsEngine(DB_PATH, PARQUET_DIR) as engine:
+        crosstab = engine.keyword_crosstab(
+            keyword_groups, article_ids=[i for i in article_ids if i], min_count=2
+        )
+
+    # 本脚本的互动率 = 点赞率 + 在看率 + 评论率（百分比）
+    return {
+        keyword: {
+            'count': stats['count'],
+            'avg_engagement': stats['avg_like_rate'] + stats['avg_looking_rate'] + stats['avg_comment_rate'],
+            'avg_like_rate': stats['avg_like_rate'],
+            'avg_comment_rate': stats['avg_comment_rate']
+        }
+        for keyword, stats in crosstab.items()
+    }
+
+
 def analyze_engagement_patterns(articles):
     """分析互动模式"""
+    # 已迁移到数据库时整体聚合下推到分析引擎
+    if DB_PATH.exists():
+        return analyze_engagement_patterns_in_db(articles)
+
     # 收集所有关键词
     all_keywords = defaultdict(list)
 
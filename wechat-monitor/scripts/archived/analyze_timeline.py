@@ -5,6 +5,7 @@
 分析最近30天的发布规律、最佳发布时间、标题类型效果、内容长度关系
 """
 
+import sys
 import json
 import re
 from pathlib import Path
@@ -12,8 +13,19 @@ from datetime import datetime, timedelta
 from collections import defaultdict, Counter
 import statistics
 
-PROJECT_ROOT = Path(__file__).parent.parent
+# 在 archived/ 中运行或移回 scripts/ 后运行都能找到 utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.database import WechatDatabase
+from utils.timestamps import parse_datetime
+
+# 本文件位于 scripts/archived/，项目根目录在上两级
+PROJECT_ROOT = Path(__file__).parent.parent.parent
 ARTICLES_DIR = PROJECT_ROOT / "data" / "articles"
+DB_PATH = PROJECT_ROOT / "data" / "wechat_monitor.db"
+
+WEEKDAY_NAMES = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
 
 
 def load_article_data_with_time():
@@ -56,37 +68,64 @@ def load_article_data_with_time():
                 content = f.read()
                 content_length = len(content)
 
-        # 解析发布时间
-        try:
-            publish_time = datetime.strptime(f"{date_str} {time_str}", "%Y%m%d %H%M%S")
-        except:
-            continue
+        # 解析发布时间（与数据库路径相同：发布时间，缺失或无法解析时用采集时间；
+        # 旧数据没有 collected_time 时用文件夹名称中的时间，即采集时间）
+        publish_time = (parse_datetime(metadata.get('publish_time')) or
+                        parse_datetime(metadata.get('collected_time')))
+        if publish_time is None:
+            try:
+                publish_time = datetime.strptime(f"{date_str} {time_str}", "%Y%m%d %H%M%S")
+            except ValueError:
+                continue
 
-        # 合并数据
-        article = {
-            **metadata,
-            'publish_time': publish_time,
-            'publish_date': date_str,
-            'publish_hour': int(time_str[:2]),
-            'weekday': publish_time.weekday(),  # 0=周一, 6=周日
-            'weekday_name': ['周一', '周二', '周三', '周四', '周五', '周六', '周日'][publish_time.weekday()],
-            'read_num': stats.get('read_num', 0),
-            'like_num': stats.get('like_num', 0),
-            'looking_num': stats.get('looking_num', 0),
-            'in_comment_num': stats.get('in_comment_num', 0),
-            'content_length': content_length,
-            'engagement_rate': 0
-        }
+        articles.append(build_article(metadata, publish_time, stats, content_length))
+
+    return articles
 
-        # 计算互动率
-        if article['read_num'] > 0:
-            article['engagement_rate'] = (
-                article['like_num'] +
-                article['looking_num'] +
-                article['in_comment_num']
-            ) / article['read_num'] * 100
 
-        articles.append(article)
+def build_article(metadata, publish_time, stats, content_length):
+    """合并元数据、发布时间、互动数据和正文长度为一篇文章的分析记录"""
+    article = {
+        **metadata,
+        'publish_time': publish_time,
+        'publish_date': publish_time.strftime("%Y%m%d"),
+        'publish_hour': publish_time.hour,
+        'weekday': publish_time.weekday(),  # 0=周一, 6=周日
+        'weekday_name': WEEKDAY_NAMES[publish_time.weekday()],
+        'read_num': stats.get('read_num') or 0,
+        'like_num': stats.get('like_num') or 0,
+        'looking_num': stats.get('looking_num') or 0,
+        'in_comment_num': stats.get('in_comment_num') or 0,
+        'content_length': content_length,
+        'engagement_rate': 0
+    }
+
+    # 计算互动率
+    if article['read_num'] > 0:
+        article['engagement_rate'] = (
+            article['like_num'] +
+            article['looking_num'] +
+            article['in_comment_num']
+        ) / article['read_num'] * 100
+
+    return article
+
+
+def load_article_data_from_db():
+    """
+    从数据库流式读取所有文章（最新互动数据 + 保存正文时计算的长度），
+    不需要逐篇打开 metadata.json / article.md
+    """
+    articles = []
+
+    with WechatDatabase(str(DB_PATH)) as db:
+        for row in db.iter_articles():
+            # 与 JSON 路径相同：发布时间，缺失或无法解析时用采集时间
+            epoch = row['publish_ts'] or row['collected_ts']
+            if epoch is None:
+                continue
+            publish_time = datetime.fromtimestamp(epoch)
+            articles.append(build_article(row, publish_time, row, row['content_length'] or 0))
 
     return articles
 
@@ -461,7 +500,11 @@ def print_timeline_analysis(articles, days=30):
 def main():
     """主函数"""
     print("正在加载文章数据...")
-    articles = load_article_data_with_time()
+    # 已迁移到数据库时一次查询读取，不再逐篇读取 JSON 和正文
+    if DB_PATH.exists():
+        articles = load_article_data_from_db()
+    else:
+        articles = load_article_data_with_time()
 
     if not articles:
         print("❌ 未找到文章数据")
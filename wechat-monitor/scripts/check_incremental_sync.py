@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量同步回归检查
+在临时目录中生成若干文章目录，检查每周的历史日志整理不会让文章目录看起来有变化:
+- 已经整理过的 stats_history.jsonl 再次整理时不改写文件（mtime 不变）
+- 两次增量同步（migrate_to_db.py）之间运行整理，第二次同步不重新导入任何文章
+- 数据文件被原样改写（只有 mtime 变化）时只更新同步签名，不重新导入
+任何一项不满足时以非零状态退出
+
+用法:
+    python3 scripts/check_incremental_sync.py
+    python3 scripts/check_incremental_sync.py --articles 100
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.database import WechatDatabase
+from utils.stats_log import (append_stats_record, compact_stats_history, HISTORY_LOG_FILE,
+                             LEGACY_HISTORY_FILE)
+from migrate_to_db import migrate_articles
+
+
+def build_articles(articles_dir: Path, article_count: int, snapshots: int = 3):
+    """
+    生成文章目录（metadata.json、article.md 与逐日追加的互动数据）
+
+    前一半目录额外带一个旧版 stats_history.json，第一次整理时合并进日志
+    """
+    start = datetime.now() - timedelta(days=30)
+    for i in range(article_count):
+        publish = start + timedelta(hours=i)
+        folder = articles_dir / f"{publish.strftime('%Y%m%d_%H%M%S')}_文章{i:03d}"
+        folder.mkdir(parents=True)
+        article_id = f"check{i:04d}"
+        with open(folder / "metadata.json", 'w', encoding='utf-8') as f:
+            json.dump({
+                'title': f"文章{i:03d}",
+                'url': f"https://mp.weixin.qq.com/s/{article_id}",
+                'account_name': f"公众号{i % 5}",
+                'publish_time': publish.strftime('%Y-%m-%d %H:%M:%S'),
+            }, f, ensure_ascii=False, indent=2)
+        (folder / "article.md").write_text(f"# 文章{i:03d}\n\n正文内容", encoding='utf-8')
+
+        if i % 2 == 0:
+            legacy_day = publish + timedelta(days=1)
+            with open(folder / LEGACY_HISTORY_FILE, 'w', encoding='utf-8') as f:
+                json.dump({'history': [{
+                    'read_num': 10,
+                    'fetched_time': legacy_day.strftime('%Y-%m-%d %H:%M:%S'),
+                    'fetched_date': legacy_day.strftime('%Y-%m-%d'),
+                }]}, f, ensure_ascii=False, indent=2)
+
+        for day in range(2, snapshots + 2):
+            fetched = publish + timedelta(days=day)
+            append_stats_record(folder, {
+                'read_num': 100 * day,
+                'like_num': day,
+                'fetched_time': fetched.strftime('%Y-%m-%d %H:%M:%S'),
+                'fetched_date': fetched.strftime('%Y-%m-%d'),
+            })
+
+
+def log_mtimes(folders):
+    """各目录历史日志的 mtime_ns"""
+    return {folder.name: os.stat(folder / HISTORY_LOG_FILE).st_mtime_ns for folder in folders}
+
+
+def compact_all(folders):
+    """整理全部目录的历史日志"""
+    for folder in folders:
+        compact_stats_history(folder)
+
+
+def check_compaction_idempotent(folders) -> list:
+    """
+    第一次整理合并旧版文件，之后再整理不应改写任何日志
+
+    Returns:
+        失败说明列表
+    """
+    compact_all(folders)
+    legacy_left = [folder.name for folder in folders if (folder / LEGACY_HISTORY_FILE).exists()]
+    before = log_mtimes(folders)
+    compact_all(folders)
+    after = log_mtimes(folders)
+
+    problems = []
+    if legacy_left:
+        problems.append(f"整理后仍有旧版历史文件: {len(legacy_left)} 个目录")
+    rewritten = [name for name in before if before[name] != after[name]]
+    if rewritten:
+        problems.append(f"第二次整理改写了 {len(rewritten)} 个已经整理过的日志（mtime 变化）")
+    return problems
+
+
+def check_migrate_after_compaction(db: WechatDatabase, data_dir: Path, folders) -> list:
+    """
+    同步 → 整理 → 同步：第二次同步不应导入任何文章，之后再同步时没有签名变化的目录
+
+    Returns:
+        失败说明列表
+    """
+    first = migrate_articles(data_dir, db)
+    compact_all(folders)
+    second = migrate_articles(data_dir, db)
+    third = migrate_articles(data_dir, db)
+
+    problems = []
+    if first['articles'] != len(folders):
+        problems.append(f"首次同步导入了 {first['articles']}/{len(folders)} 篇文章")
+    if second['articles']:
+        problems.append(f"整理后的同步重新导入了 {second['articles']} 篇文章")
+    if third['changed']:
+        problems.append(f"再次同步仍有 {third['changed']} 个目录签名变化")
+    return problems
+
+
+def check_rewrite_same_content(db: WechatDatabase, data_dir: Path, folders) -> list:
+    """
+    原样改写数据文件（内容不变，mtime 变化）：只更新签名，不重新导入
+
+    Returns:
+        失败说明列表
+    """
+    for folder in folders:
+        log_file = folder / HISTORY_LOG_FILE
+        content = log_file.read_bytes()
+        tmp_file = log_file.with_name(log_file.name + ".tmp")
+        tmp_file.write_bytes(content)
+        os.replace(tmp_file, log_file)
+
+    rewritten = migrate_articles(data_dir, db)
+    again = migrate_articles(data_dir, db)
+
+    problems = []
+    if rewritten['changed'] != len(folders):
+        problems.append(f"原样改写后只有 {rewritten['changed']}/{len(folders)} 个目录签名变化")
+    if rewritten['articles'] or rewritten['unchanged'] != rewritten['changed']:
+        problems.append(f"原样改写后重新导入了 {rewritten['articles']} 篇文章"
+                        f"（内容未变化 {rewritten['unchanged']} 个目录）")
+    if again['changed']:
+        problems.append(f"更新签名后再次同步仍有 {again['changed']} 个目录签名变化")
+    return problems
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='检查历史日志整理不会触发增量同步重新导入')
+    parser.add_argument('--articles', type=int, default=30, help='生成的文章目录数 (默认: 30)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🔍 增量同步回归检查")
+    print("=" * 60)
+
+    # 只输出检查结果，同步过程的日志不打印
+    logging.getLogger().setLevel(logging.WARNING)
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp) / "data"
+        articles_dir = data_dir / "articles"
+        print(f"\n🧪 生成 {args.articles} 个文章目录")
+        build_articles(articles_dir, args.articles)
+        folders = sorted(d for d in articles_dir.iterdir() if d.is_dir())
+
+        db = WechatDatabase(str(data_dir / "wechat_monitor.db"))
+        checks = [
+            ('重复整理不改写日志', lambda: check_compaction_idempotent(folders)),
+            ('同步之间整理历史日志不触发重新导入', lambda: check_migrate_after_compaction(db, data_dir, folders)),
+            ('原样改写的目录只更新签名', lambda: check_rewrite_same_content(db, data_dir, folders)),
+        ]
+        for label, check in checks:
+            problems = check()
+            if problems:
+                failures += 1
+                print(f"\n❌ {label}")
+                for problem in problems:
+                    print(f"     - {problem}")
+            else:
+                print(f"\n✅ {label}")
+        db.close()
+
+    print("\n" + "=" * 60)
+    if failures:
+        print(f"❌ {failures} 项检查未通过")
+        print("=" * 60)
+        sys.exit(1)
+    print("✅ 所有检查通过")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
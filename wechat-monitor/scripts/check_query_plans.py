@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+查询计划回归检查
+在临时目录中生成一个较大的合成数据库，依次调用 database.py、query_db.py、generate_report.py
+使用的热点查询，记录实际执行的每条 SQL，再对其执行 EXPLAIN QUERY PLAN：
+出现没有使用索引的全表扫描（SCAN <表>，包括 MATCH 以外方式读取的全文索引），或没有范围条件也没有 LIMIT 的整个索引扫描
+（SCAN <表> USING INDEX）时列出查询计划并以非零状态退出；
+另外检查少于 3 个字的搜索关键词（走短词索引）与逐篇 LIKE 匹配的结果一致
+
+用法:
+    python3 scripts/check_query_plans.py            # 默认 5000 篇文章
+    python3 scripts/check_query_plans.py --articles 20000 --verbose
+"""
+
+import io
+import re
+import sys
+import random
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+from datetime import datetime, timedelta
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import utils.database as database
+from utils.database import WechatDatabase, RANKING_METRICS
+
+# 整体聚合类查询本身就需要读取全表，不算回归
+ALLOWED_SCANS = {
+    'get_stats_summary': '全库统计摘要，按设计读取全表',
+    'query_db.show_summary': '全库统计摘要（get_stats_summary），按设计读取全表',
+    'get_stats_history_bulk(全部)': '导出全部历史，按设计读取全表',
+    'get_account_baselines(全部)': '全量公众号基准，按设计读取全表',
+}
+
+# 读取整个索引、但按设计需要遍历全部行的查询（流式导出/报表），其余无界索引扫描都算回归
+ALLOWED_INDEX_SCANS = {
+    'generate_report.load_articles_from_db': '报表包含全部文章，按发布时间索引顺序流式读取',
+}
+
+# 虚拟表只允许以下有界的访问方式，其余 SCAN ... VIRTUAL TABLE 都算全表扫描
+FTS_MATCH_SCAN = re.compile(r'^SCAN (articles_fts|articles_fts_short) VIRTUAL TABLE INDEX \d+:M')
+ALLOWED_VIRTUAL_SCANS = {
+    FTS_MATCH_SCAN: '全文索引 MATCH 查询',
+    re.compile(r'^SCAN json_each VIRTUAL TABLE INDEX 1:$'): '展开参数传入的 ID 列表',
+}
+# 按 rowid 读取全文索引中的一行：只有同一查询由 MATCH 筛选候选时才允许，
+# 否则是按其他表的顺序逐篇读取正文做 LIKE 匹配（短关键词曾经的退化方式）
+FTS_ROWID_LOOKUP = re.compile(r'^SCAN \S+ VIRTUAL TABLE INDEX \d+:=$')
+
+# 全表扫描：SCAN <表> 且没有使用索引（常量行、子查询除外）
+SCAN_PATTERN = re.compile(r'^SCAN (?!CONSTANT ROW)(?!\(subquery)(\S+)(?!.*USING (COVERING )?INDEX)')
+# 索引全扫描：SCAN <表> USING [COVERING] INDEX 没有范围条件（有范围条件时为 SEARCH），读取整个索引
+INDEX_SCAN_PATTERN = re.compile(r'^SCAN (\S+) USING (COVERING )?INDEX')
+# 带 LIMIT 的查询按索引顺序读取，取够行数即停止，索引扫描是有界的
+LIMIT_PATTERN = re.compile(r'\bLIMIT\s+\d+\s*$', re.IGNORECASE)
+
+INTERNAL_SQL = re.compile(r"sqlite_master|sqlite_schema|FROM '\w+'\.'")
+
+
+class QueryRecorder:
+    """记录每个连接上执行的 SQL，并标注是哪个热点查询触发的"""
+
+    def __init__(self):
+        self.label = None
+        self.statements = []
+
+    def __call__(self, sql: str):
+        """sqlite3 trace 回调（收到的是已代入参数的 SQL）"""
+        if self.label is None:
+            return
+        statement = sql.strip()
+        # 跳过建表时的表结构查询和 FTS5 模块内部读取影子表的语句
+        if INTERNAL_SQL.search(statement):
+            return
+        if re.match(r'^(SELECT|WITH)\b', statement, re.IGNORECASE):
+            self.statements.append((self.label, statement))
+
+
+def build_synthetic_db(db_path: Path, article_count: int, snapshots: int, seed: int = 42):
+    """
+    生成合成数据库
+
+    Args:
+        db_path: 数据库路径
+        article_count: 文章数
+        snapshots: 每篇文章的统计快照数
+        seed: 随机种子
+    """
+    rng = random.Random(seed)
+    accounts = [f"公众号{i:02d}" for i in range(30)]
+    categories = ['AI', '编程', '产品', '设计', None]
+    start = datetime.now() - timedelta(days=120)
+
+    articles, stats, bodies = [], [], []
+    for i in range(article_count):
+        publish = start + timedelta(minutes=rng.randrange(120 * 24 * 60))
+        article_id = f"synthetic{i:06d}"
+        articles.append({
+            'article_id': article_id,
+            'title': f"{rng.choice(['实测', '深度解析', '对比'])} {rng.choice(['Claude', 'DeepSeek', '视频生成', 'OCR'])} 第{i}篇",
+            'author': None,
+            'publish_time': publish.strftime('%Y-%m-%d %H:%M:%S'),
+            'url': f"https://mp.weixin.qq.com/s/{article_id}",
+            'account_name': rng.choice(accounts),
+            'biz': None,
+            'category': rng.choice(categories),
+            'content_path': None,
+            'collected_time': publish.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+        read_num = 0
+        for day in range(snapshots):
+            fetched = publish + timedelta(days=day + 1)
+            read_num += rng.randrange(50, 2000)
+            stats.append((article_id, {
+                'read_num': read_num,
+                'like_num': read_num // 50,
+                'looking_num': read_num // 80,
+                'in_comment_num': read_num // 200,
+                'share_num': read_num // 60,
+                'collect_num': read_num // 90,
+                'fetched_time': fetched.strftime('%Y-%m-%d %H:%M:%S'),
+                'fetched_date': fetched.strftime('%Y-%m-%d'),
+            }))
+        bodies.append((article_id, f"正文 {articles[-1]['title']} " * 20))
+
+    with WechatDatabase(str(db_path)) as db:
+        with db.transaction():
+            db.insert_articles_bulk(articles)
+            db.insert_stats_bulk(stats)
+            db.update_search_bodies(bodies)
+            db.save_article_contents(bodies)
+        # 与生产库一致：db_maintenance.py 每天运行 ANALYZE，只有部分表有统计信息时查询计划会失真
+        db.conn.execute("ANALYZE")
+
+
+def quiet(func, *args, **kwargs):
+    """调用命令行工具的输出函数，丢弃打印的表格"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def hot_queries(db: WechatDatabase, db_path: Path):
+    """
+    热点查询清单
+
+    Yields:
+        (名称, 无参调用)
+    """
+    today = datetime.now()
+    since = (today - timedelta(days=30)).strftime('%Y-%m-%d')
+    article_id = 'synthetic000123'
+
+    # database.py
+    yield 'get_article', lambda: db.get_article(article_id)
+    yield 'get_article_stats', lambda: db.get_article_stats(article_id)
+    yield 'get_prediction', lambda: db.get_prediction(article_id)
+    yield 'get_article_content', lambda: db.get_article_content(article_id)
+    yield 'get_content_info(指定文章)', lambda: db.get_content_info([article_id, 'synthetic000456'])
+    yield 'get_stats_history_bulk(指定文章)', lambda: db.get_stats_history_bulk([article_id, 'synthetic000456'])
+    yield 'get_stats_history_bulk(全部)', lambda: db.get_stats_history_bulk()
+    yield 'get_latest_articles', lambda: db.get_latest_articles(limit=50)
+    yield 'get_latest_articles(分类)', lambda: db.get_latest_articles(limit=50, category='AI')
+    for metric in RANKING_METRICS:
+        yield f'get_top_articles({metric})', lambda m=metric: db.get_top_articles(metric=m, limit=10)
+    yield 'get_top_articles(近30天)', lambda: db.get_top_articles(metric='read_num', limit=10, since=since)
+    yield 'search_articles', lambda: db.search_articles('Claude', limit=20)
+    yield 'search_articles(短关键词)', lambda: db.search_articles('实测', limit=20)
+    yield 'search_articles(单字)', lambda: db.search_articles('C', limit=20)
+    yield 'search_articles(多个短关键词)', lambda: db.search_articles('实测 视频', limit=20)
+    yield 'get_articles_by_date_range', lambda: db.get_articles_by_date_range(since, today.strftime('%Y-%m-%d'))
+    yield 'iter_articles(近30天)', lambda: list(db.iter_articles(since=since, row_format='tuple'))
+    yield 'iter_articles(分类)', lambda: list(db.iter_articles(category='AI', row_format='record'))
+    yield 'iter_stats(指定文章)', lambda: list(db.iter_stats([article_id], row_format='tuple'))
+    yield 'get_account_baselines(近30天)', lambda: db.get_account_baselines(since=since)
+    yield 'get_account_baselines(全部)', lambda: db.get_account_baselines()
+    yield 'get_stats_summary', lambda: db.get_stats_summary()
+
+    # query_db.py（命令行查询工具，只检查执行的 SQL，打印的表格丢弃）
+    import query_db
+    yield 'query_db.show_summary', lambda: quiet(query_db.show_summary, db)
+    yield 'query_db.show_latest_articles', lambda: quiet(query_db.show_latest_articles, db, 10)
+    yield 'query_db.show_top_articles', lambda: quiet(query_db.show_top_articles, db, 'read_num', 10)
+    yield 'query_db.show_top_articles(近30天)', \
+        lambda: quiet(query_db.show_top_articles, db, 'like_num', 10, since)
+    yield 'query_db.show_article_trend', lambda: quiet(query_db.show_article_trend, db, article_id)
+    yield 'query_db.search_articles', lambda: quiet(query_db.search_articles, db, 'Claude', 50)
+    yield 'query_db.search_articles(短关键词)', lambda: quiet(query_db.search_articles, db, 'OCR 实测', 50)
+
+    # generate_report.py
+    import generate_report
+    yield 'generate_report.load_articles_from_db', lambda: list(generate_report.load_articles_from_db(db_path))
+    yield 'generate_report.load_articles_from_db(按日期)', \
+        lambda: list(generate_report.load_articles_from_db(db_path, date_filter=today.strftime('%Y%m%d')))
+
+
+def check_short_term_search(db: WechatDatabase, terms=('实测', '视频', '第7', 'C')) -> list:
+    """
+    短关键词（少于 3 个字，走二元分词索引）的搜索结果应与逐篇 LIKE 匹配完全一致
+
+    Returns:
+        失败说明列表
+    """
+    problems = []
+    for term in terms:
+        found = {row['article_id'] for row in db.search_articles(term, limit=1000000)}
+        expected = {row[0] for row in db.conn.execute("""
+            SELECT a.article_id FROM articles_fts f
+            INNER JOIN articles a ON a.rowid = f.rowid
+            WHERE f.title LIKE ?1 OR f.account_name LIKE ?1 OR f.body LIKE ?1
+        """, (f'%{term}%',))}
+        if not expected:
+            problems.append(f"'{term}': 合成数据中没有包含该词的文章，检查无效")
+        elif found != expected:
+            problems.append(f"'{term}': 搜索到 {len(found)} 篇，LIKE 匹配 {len(expected)} 篇"
+                            f"（漏掉 {len(expected - found)} 篇，多出 {len(found - expected)} 篇）")
+    return problems
+
+
+def find_full_scans(conn, sql: str):
+    """
+    对一条 SQL 执行 EXPLAIN QUERY PLAN
+
+    Returns:
+        (查询计划各行, 全表扫描的行, 无界索引扫描的行, 是否需要临时排序)
+    """
+    plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+    allowed_virtual = list(ALLOWED_VIRTUAL_SCANS)
+    if any(FTS_MATCH_SCAN.match(detail) for detail in plan):
+        allowed_virtual.append(FTS_ROWID_LOOKUP)
+    scans = [detail for detail in plan if SCAN_PATTERN.match(detail)
+             and not any(pattern.match(detail) for pattern in allowed_virtual)]
+    index_scans = []
+    if not LIMIT_PATTERN.search(sql.rstrip().rstrip(';')):
+        index_scans = [detail for detail in plan if INDEX_SCAN_PATTERN.match(detail)]
+    return plan, scans, index_scans, any(detail.startswith('USE TEMP B-TREE') for detail in plan)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='检查热点查询是否都使用了索引')
+    parser.add_argument('--articles', type=int, default=5000, help='合成文章数 (默认: 5000)')
+    parser.add_argument('--snapshots', type=int, default=10, help='每篇文章的统计快照数 (默认: 10)')
+    parser.add_argument('--verbose', action='store_true', help='打印每条查询的查询计划')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🔍 查询计划回归检查")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        db_path = tmp_dir / "wechat_monitor.db"
+
+        print(f"\n🧪 生成合成数据库: {args.articles} 篇文章 x {args.snapshots} 条快照")
+        build_synthetic_db(db_path, args.articles, args.snapshots)
+
+        # 之后打开的每个连接（包括 generate_report 自己创建的）都记录执行的 SQL
+        recorder = QueryRecorder()
+        open_connection = database._open_connection
+
+        def traced_connection(*a, **kw):
+            conn = open_connection(*a, **kw)
+            conn.set_trace_callback(recorder)
+            return conn
+
+        database._open_connection = traced_connection
+        try:
+            with WechatDatabase(str(db_path), cache_size=0) as db:
+                for label, call in hot_queries(db, db_path):
+                    recorder.label = label
+                    call()
+                recorder.label = None
+                search_problems = check_short_term_search(db)
+        finally:
+            database._open_connection = open_connection
+
+        failures = 0
+        sorts = 0
+        explain_conn = database._open_connection(db_path, read_only=True)
+        seen = set()
+        for label, sql in recorder.statements:
+            if (label, sql) in seen:
+                continue
+            seen.add((label, sql))
+
+            plan, scans, index_scans, temp_sort = find_full_scans(explain_conn, sql)
+            sorts += temp_sort
+            # 整体聚合本来就读取全表，全表扫描的允许清单同样覆盖索引扫描
+            allowed = ALLOWED_SCANS.get(label)
+            allowed_index = allowed or ALLOWED_INDEX_SCANS.get(label)
+            problems = []
+            if scans and not allowed:
+                problems.append(f"全表扫描 {', '.join(scans)}")
+            if index_scans and not allowed_index:
+                problems.append(f"无界索引扫描 {', '.join(index_scans)}")
+
+            if problems:
+                failures += 1
+                print(f"\n❌ {label}: {'; '.join(problems)}")
+            elif args.verbose:
+                reason = allowed if scans else (allowed_index if index_scans else None)
+                note = f"（允许: {reason}）" if reason else ("（临时排序）" if temp_sort else "")
+                print(f"\n{'⚪' if reason else '✅'} {label}{note}")
+            else:
+                continue
+
+            print("   " + " ".join(sql.split())[:300])
+            for detail in plan:
+                print(f"     - {detail}")
+        explain_conn.close()
+
+    if search_problems:
+        failures += 1
+        print("\n❌ 短关键词搜索结果与 LIKE 匹配不一致")
+        for problem in search_problems:
+            print(f"     - {problem}")
+
+    labels = {label for label, _ in recorder.statements}
+    print("\n" + "=" * 60)
+    print(f"检查了 {len(labels)} 个热点查询, {len(seen)} 条 SQL（{sorts} 条需要临时排序）")
+    if failures:
+        print(f"❌ {failures} 项检查未通过（全表扫描、无界索引扫描或短关键词搜索结果不一致）")
+        print("=" * 60)
+        sys.exit(1)
+    print("✅ 所有热点查询都使用了索引")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库统计数据降采样
+article_stats 每次刷新都会为每篇文章新增一行，较早的数据只需要粗粒度曲线：
+早于 N 天的快照按周（或月）只保留一条，另外保留每篇文章的第一条和最后一条快照，
+每次运行记录在 stats_compaction_log 表中
+"""
+
+import sys
+import argparse
+import logging
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.database import WechatDatabase, COMPACTION_RESOLUTIONS
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='对较早的统计快照降采样')
+    parser.add_argument('--keep-days', type=int, default=30,
+                        help='保留完整分辨率的天数 (默认: 30)')
+    parser.add_argument('--resolution', choices=list(COMPACTION_RESOLUTIONS), default='week',
+                        help='较早数据的保留粒度 (默认: week)')
+    parser.add_argument('--dry-run', action='store_true', help='只统计将删除的行数，不实际删除')
+    args = parser.parse_args()
+
+    db_path = PROJECT_ROOT / "data" / "wechat_monitor.db"
+    if not db_path.exists():
+        print(f"❌ 数据库文件不存在: {db_path}")
+        print("请先运行 migrate_to_db.py 迁移数据")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("🗜️  统计数据降采样" + ("（试运行）" if args.dry_run else ""))
+    print("=" * 60)
+
+    with WechatDatabase(str(db_path)) as db:
+        result = db.compact_stats(keep_days=args.keep_days, resolution=args.resolution,
+                                  dry_run=args.dry_run)
+
+    action = "将删除" if args.dry_run else "已删除"
+    print(f"\n截止日期: {result['cutoff_date']} 之前的快照按 {result['resolution']} 保留")
+    print(f"统计记录: {result['rows_before']} 条，{action} {result['rows_deleted']} 条")
+    print(f"涉及文章: {result['articles_affected']} 篇")
+    print(f"耗时: {result['duration_seconds']:.2f} 秒")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
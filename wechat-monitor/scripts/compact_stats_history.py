@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+互动数据历史压缩整理
+将每篇文章的旧版 stats_history.json 合并进追加日志 stats_history.jsonl，
+并去除残缺行和重复日期（原子替换，不会丢失历史）
+"""
+
+import sys
+import argparse
+import logging
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.stats_log import compact_stats_history
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='压缩整理互动数据历史日志')
+    parser.add_argument('--articles-dir', default=str(PROJECT_ROOT / "data" / "articles"),
+                        help='文章目录 (默认: data/articles)')
+    args = parser.parse_args()
+
+    articles_dir = Path(args.articles_dir)
+    if not articles_dir.exists():
+        print(f"❌ 文章目录不存在: {articles_dir}")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("🗜️  压缩整理互动数据历史")
+    print("=" * 60)
+
+    compacted = 0
+    total_records = 0
+    failed = 0
+
+    for folder in sorted(articles_dir.iterdir()):
+        if not folder.is_dir():
+            continue
+
+        try:
+            count = compact_stats_history(folder)
+        except Exception as e:
+            print(f"  ❌ 整理失败 {folder.name}: {e}")
+            failed += 1
+            continue
+
+        if count is None:
+            continue
+
+        compacted += 1
+        total_records += count
+
+    print(f"\n✅ 整理完成!")
+    print(f"   文章数: {compacted} 篇")
+    print(f"   历史记录: {total_records} 条")
+    if failed:
+        print(f"   失败: {failed} 篇")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
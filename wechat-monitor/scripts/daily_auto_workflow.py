@@ -3,9 +3,10 @@
 """
 每日自动化工作流
 功能:
-1. 从RSS采集昨天发布的文章
-2. 获取前1-2天发布文章的互动数据
-3. 生成每日数据展示页面
+1. 从RSS采集昨天发布的文章并同步到数据库
+2. 更新阅读量增长曲线预测
+3. 获取前1-2天发布文章的互动数据（直接写入数据库，跳过已饱和的文章）
+4. 生成每日数据展示页面
 """
 
 import os
@@ -92,14 +93,19 @@ def main():
     else:
         log("ℹ️  数据库不存在，跳过同步步骤")
 
-    # 步骤3: 获取前1-2天发布文章的互动数据
-    log("\n📊 步骤3: 获取前1-2天发布文章的互动数据")
-
-    # 使用fetch_article_stats.py的自动模式
-    # 创建一个临时脚本来获取前1-2天的数据
-    stats_script = PROJECT_ROOT / "scripts" / "fetch_recent_stats.py"
+    # 步骤3: 更新增长曲线预测，已饱和的文章在下一步中跳过
+    if db_path.exists():
+        log("\n📈 步骤3: 更新阅读量增长曲线预测")
+        success_model = run_command(
+            "拟合增长曲线模型",
+            [sys.executable, "fit_growth_model.py"]
+        )
+        if not success_model:
+            log("⚠️  增长模型更新失败，互动数据将全部重新获取")
 
-    # 如果临时脚本不存在，使用fetch_article_stats.py
+    # 步骤4: 获取前1-2天发布文章的互动数据
+    # 互动数据由 fetch_recent_days_stats.py 直接分批写入数据库，无需再次迁移
+    log("\n📊 步骤4: 获取前1-2天发布文章的互动数据(直接写入数据库)")
     success_stats = run_command(
         "获取互动数据(前1-2天发布的文章)",
         [sys.executable, "fetch_recent_days_stats.py"]
@@ -108,20 +114,18 @@ def main():
     if not success_stats:
         log("⚠️  互动数据获取失败，但继续执行后续步骤")
 
-    # 步骤4: 同步统计数据到数据库
+    # 步骤5: 增量导出 Parquet 列式快照（在报表之前，分析引擎读取的快照包含今天的互动数据）
     if db_path.exists():
-        log("\n🗄️  步骤4: 同步统计数据到数据库")
-        success_sync = run_command(
-            "同步统计数据到数据库",
-            [sys.executable, "migrate_to_db.py"]
+        log("\n📦 步骤5: 导出 Parquet 列式快照")
+        success_export = run_command(
+            "增量导出 Parquet",
+            [sys.executable, "export_parquet.py"]
         )
-        if not success_sync:
-            log("⚠️  统计数据同步失败，但继续生成报表")
-    else:
-        log("ℹ️  数据库不存在，跳过同步步骤")
+        if not success_export:
+            log("⚠️  Parquet 导出失败，分析引擎将直接读取数据库")
 
-    # 步骤5: 生成每日数据展示页面
-    log("\n📄 步骤5: 生成每日数据展示页面")
+    # 步骤6: 生成每日数据展示页面
+    log("\n📄 步骤6: 生成每日数据展示页面")
     success_report = run_command(
         "生成数据报表",
         [sys.executable, "generate_report.py"]
@@ -131,8 +135,8 @@ def main():
         log("❌ 报表生成失败")
         return False
 
-    # 步骤6: 生成爆款警报
-    log("\n🚨 步骤6: 生成爆款警报")
+    # 步骤7: 生成爆款警报
+    log("\n🚨 步骤7: 生成爆款警报")
     success_alert = run_command(
         "检测爆款文章",
         [sys.executable, "viral_alert.py"]
@@ -141,6 +145,16 @@ def main():
     if not success_alert:
         log("⚠️  爆款警报生成失败，但不影响主流程")
 
+    # 步骤8: 数据库维护（刷新统计信息、回收空闲页、快速完整性检查）
+    if db_path.exists():
+        log("\n🛠️  步骤8: 数据库维护")
+        success_maintenance = run_command(
+            "数据库维护",
+            [sys.executable, "db_maintenance.py", "--quick"]
+        )
+        if not success_maintenance:
+            log("⚠️  数据库维护失败或完整性检查未通过，请检查日志")
+
     # 完成
     log("\n" + "=" * 60)
     log("✅ 每日自动化工作流完成!")
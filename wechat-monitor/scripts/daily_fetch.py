@@ -20,6 +20,9 @@ import time
 import hashlib
 import json
 
+sys.path.insert(0, str(Path(__file__).parent))
+from utils.api_metrics import ApiMetrics, emit_event
+
 
 # 配置文件路径
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -117,19 +120,45 @@ def check_article_exists(article_id, articles_dir):
     return False
 
 
-def download_article_html(url, timeout=30):
-    """下载文章HTML内容"""
+def download_article_html(url, timeout=30, request_hooks=None, response_hooks=None):
+    """
+    下载文章HTML内容
+
+    Args:
+        url: 文章URL
+        timeout: 超时时间（秒）
+        request_hooks: 请求发出前调用的钩子列表
+        response_hooks: 请求结束后调用的钩子列表（耗时、状态码、错误类别、流量）
+    """
+    event = {
+        'endpoint': 'article_html',
+        'url': url,
+        'status': None,
+        'error': None,
+        'bytes_sent': 0,
+        'bytes_received': 0,
+        'cost_money': 0
+    }
+    emit_event(request_hooks, {'endpoint': event['endpoint'], 'url': url})
+    start = time.perf_counter()
+
     try:
         headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         }
         response = requests.get(url, headers=headers, timeout=timeout)
+        event['status'] = response.status_code
+        event['bytes_received'] = len(response.content)
         response.raise_for_status()
         response.encoding = 'utf-8'
         return response.text
     except Exception as e:
+        event['error'] = type(e).__name__
         print(f"  ❌ 下载文章失败: {e}")
         return None
+    finally:
+        event['latency'] = time.perf_counter() - start
+        emit_event(response_hooks, event)
 
 
 def extract_article_content(html):
@@ -252,6 +281,7 @@ def fetch_today_articles():
 
     total_found = 0
     total_new = 0
+    metrics = ApiMetrics('daily_fetch')
 
     # 遍历每个订阅
     for sub in subscriptions:
@@ -326,6 +356,9 @@ def fetch_today_articles():
                         try:
                             from dateutil import parser
                             dt = parser.parse(entry.updated)
+                            # 带时区的时间（如 GMT）先转换为本地时间，与其他时间字段一致
+                            if dt.tzinfo is not None:
+                                dt = dt.astimezone().replace(tzinfo=None)
                             publish_time = dt.strftime('%Y-%m-%d %H:%M:%S')
                         except:
                             publish_time = entry.updated
@@ -341,7 +374,8 @@ def fetch_today_articles():
                     else:
                         # 备用方案：下载HTML
                         print(f"    ⚠️  RSS无内容，尝试下载HTML...")
-                        html = download_article_html(url, timeout=config['rss']['timeout'])
+                        html = download_article_html(url, timeout=config['rss']['timeout'],
+                                                     response_hooks=[metrics])
                         if not html:
                             continue
 
@@ -387,8 +421,13 @@ def fetch_today_articles():
     print(f"✅ 采集完成!")
     print(f"   检查了: {total_found} 篇文章")
     print(f"   新增保存: {total_new} 篇文章")
+    if metrics.endpoints:
+        print(f"\n📈 外部请求指标:")
+        metrics.print_summary()
     print(f"{'='*60}\n")
 
+    metrics.export(PROJECT_ROOT / "logs")
+
 
 if __name__ == "__main__":
     fetch_today_articles()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库维护
+刷新查询规划器统计信息（ANALYZE / PRAGMA optimize）、增量 VACUUM 回收空闲页、
+检查完整性，并报告文件大小变化和耗时；每次运行记录在 maintenance_log 表中
+"""
+
+import sys
+import argparse
+import logging
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.database import WechatDatabase
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def format_size(size: int) -> str:
+    """字节数格式化为 KB / MB"""
+    if size >= 1024 * 1024:
+        return f"{size / 1024 / 1024:.1f} MB"
+    return f"{size / 1024:.1f} KB"
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='数据库维护：ANALYZE、增量 VACUUM、完整性检查')
+    parser.add_argument('--quick', action='store_true',
+                        help='使用 quick_check 代替完整的 integrity_check')
+    parser.add_argument('--skip-integrity', action='store_true', help='跳过完整性检查')
+    parser.add_argument('--no-vacuum', action='store_true', help='不回收空闲页')
+    args = parser.parse_args()
+
+    db_path = PROJECT_ROOT / "data" / "wechat_monitor.db"
+    if not db_path.exists():
+        print(f"❌ 数据库文件不存在: {db_path}")
+        print("请先运行 migrate_to_db.py 迁移数据")
+        sys.exit(1)
+
+    integrity = 'none' if args.skip_integrity else ('quick' if args.quick else 'full')
+
+    print("=" * 60)
+    print("🛠️  数据库维护")
+    print("=" * 60)
+
+    with WechatDatabase(str(db_path)) as db:
+        result = db.maintain(vacuum=not args.no_vacuum, integrity=integrity)
+
+    reclaimed = result['size_before'] - result['size_after']
+    print(f"\n文件大小: {format_size(result['size_before'])} -> {format_size(result['size_after'])}"
+          f"（减少 {format_size(max(reclaimed, 0))}）")
+    print(f"维护前空闲页: {result['freelist_before']} 页 ({result['freelist_ratio']:.1%})，"
+          f"回收 {result['pages_reclaimed']} 页")
+    if result['converted_auto_vacuum']:
+        print("已切换为 auto_vacuum = INCREMENTAL（执行了一次完整 VACUUM）")
+    print(f"耗时: {result['duration_seconds']:.2f} 秒")
+
+    if integrity == 'none':
+        print("完整性检查: 已跳过")
+    elif result['integrity_ok']:
+        print("✅ 完整性检查通过")
+    else:
+        print("❌ 完整性检查失败:")
+        for message in result['integrity']:
+            print(f"   - {message}")
+        print("=" * 60)
+        sys.exit(1)
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导出 Parquet 列式快照
+把数据库中的文章（含最新统计和派生指标）与统计快照历史按发布月份分区导出到 data/parquet/，
+只重写有变化的分区，供分析任务按列读取、向量化计算
+"""
+
+import sys
+import argparse
+import logging
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.database import WechatDatabase
+from utils.parquet_export import DATASETS, export_parquet
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='增量导出 Parquet 列式快照')
+    parser.add_argument('--output', default=str(PROJECT_ROOT / "data" / "parquet"),
+                        help='导出目录 (默认: data/parquet)')
+    parser.add_argument('--dataset', choices=list(DATASETS), action='append',
+                        help='只导出指定数据集，可重复指定 (默认: 全部)')
+    parser.add_argument('--full', action='store_true', help='清空后全量重新导出')
+    args = parser.parse_args()
+
+    db_path = PROJECT_ROOT / "data" / "wechat_monitor.db"
+    if not db_path.exists():
+        print(f"❌ 数据库文件不存在: {db_path}")
+        print("请先运行 migrate_to_db.py 迁移数据")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("📦 导出 Parquet 列式快照" + ("（全量）" if args.full else "（增量）"))
+    print("=" * 60)
+
+    try:
+        with WechatDatabase(str(db_path)) as db:
+            results = export_parquet(db, Path(args.output), datasets=args.dataset, full=args.full)
+    except ImportError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    for name, result in results.items():
+        print(f"\n{name}:")
+        print(f"  写入分区: {result['written']} 个 ({result['rows']} 行)")
+        print(f"  未变化跳过: {result['skipped']} 个")
+        print(f"  删除分区: {result['removed']} 个")
+
+    print(f"\n✅ 导出完成: {args.output}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
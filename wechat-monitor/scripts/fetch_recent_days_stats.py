@@ -3,19 +3,29 @@
 """
 获取前1-2天发布文章的互动数据
 自动模式，无需用户交互
+
+互动数据直接分批写入数据库 article_stats 表（每批一个事务），
+JSON 文件（stats_metadata.json / stats_history.jsonl）导出可通过 --no-json 关闭
 """
 
 import sys
-import json
 import yaml
+import argparse
 from pathlib import Path
 from datetime import datetime, timedelta
 
 sys.path.append(str(Path(__file__).parent))
 from utils.jizhile_api import JizhileAPI
+from utils.api_metrics import ApiMetrics
+from utils.database import WechatDatabase
+from utils.stats_log import append_stats_record
 
 PROJECT_ROOT = Path(__file__).parent.parent
 CONFIG_FILE = PROJECT_ROOT / "config" / "config.yaml"
+DB_PATH = PROJECT_ROOT / "data" / "wechat_monitor.db"
+
+# 每批写入数据库的统计记录数
+DB_BATCH_SIZE = 20
 
 
 def load_config():
@@ -55,10 +65,10 @@ def get_article_publish_date(md_file):
     return None
 
 
-def save_stats_metadata(article_folder, stats):
-    """保存互动数据到JSON文件（同时保存历史记录）"""
+def build_stats_record(stats):
+    """将API返回的互动数据整理为一条统计快照"""
     now = datetime.now()
-    metadata = {
+    return {
         'read_num': stats.get('read_num', 0),
         'like_num': stats.get('like_num', 0),
         'looking_num': stats.get('looking_num', 0),
@@ -69,38 +79,42 @@ def save_stats_metadata(article_folder, stats):
         'fetched_date': now.strftime('%Y-%m-%d')
     }
 
-    # 保存最新数据
-    json_file = article_folder / "stats_metadata.json"
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
 
-    # 保存历史记录
-    history_file = article_folder / "stats_history.json"
-    history_data = {'history': []}
+def save_stats_metadata(article_folder, metadata):
+    """保存互动数据到JSON文件（最新数据 + 追加写入历史日志）"""
+    append_stats_record(article_folder, metadata)
+
 
-    # 读取已有历史
-    if history_file.exists():
-        try:
-            with open(history_file, 'r', encoding='utf-8') as f:
-                history_data = json.load(f)
-        except:
-            history_data = {'history': []}
+def flush_stats_to_db(db, pending):
+    """
+    将待写入的统计快照批量写入数据库（单个事务）
 
-    # 检查是否今天已经获取过（避免重复）
-    today = now.strftime('%Y-%m-%d')
-    existing_dates = [item.get('fetched_date') for item in history_data.get('history', [])]
+    Args:
+        db: 数据库实例
+        pending: [(article_id, 统计快照), ...]，写入后清空
 
-    if today not in existing_dates:
-        # 追加新记录
-        history_data['history'].append(metadata)
+    Returns:
+        int: 本批写入的记录数
+    """
+    if not pending:
+        return 0
 
-        # 保存历史文件
-        with open(history_file, 'w', encoding='utf-8') as f:
-            json.dump(history_data, f, ensure_ascii=False, indent=2)
+    db.insert_stats_bulk(pending, batch_size=DB_BATCH_SIZE)
+
+    count = len(pending)
+    pending.clear()
+    return count
 
 
 def main():
     """主函数 - 自动获取前1-2天发布文章的互动数据"""
+    parser = argparse.ArgumentParser(description='获取前1-2天发布文章的互动数据')
+    parser.add_argument('--no-json', action='store_true',
+                        help='不导出 stats_metadata.json / stats_history.jsonl（仅写入数据库）')
+    parser.add_argument('--force', action='store_true',
+                        help='忽略增长模型预测，所有候选文章都重新获取')
+    args = parser.parse_args()
+
     print("=" * 60)
     print("📊 获取前1-2天发布文章的互动数据")
     print("=" * 60)
@@ -117,8 +131,9 @@ def main():
         print("❌ 文章目录不存在")
         sys.exit(1)
 
-    # 初始化API客户端
-    client = JizhileAPI(api_key=api_key)
+    # 初始化API客户端（附带调用指标收集）
+    metrics = ApiMetrics('fetch_recent_days_stats')
+    client = JizhileAPI(api_key=api_key, response_hooks=[metrics])
 
     # 计算目标日期范围 (前1天和前2天)
     today = datetime.now().date()
@@ -177,52 +192,103 @@ def main():
     print(f"\n开始获取互动数据...")
     success = 0
     failed = 0
+    skipped = 0
+    saved_to_db = 0
+
+    # 数据库存在时直接写入数据库，否则只能导出JSON
+    db = WechatDatabase(str(DB_PATH)) if DB_PATH.exists() else None
+    export_json = not args.no_json or db is None
+    if db is None:
+        print("ℹ️  数据库不存在，互动数据仅保存为JSON文件")
+    elif not export_json:
+        print("ℹ️  已关闭JSON导出，互动数据仅写入数据库")
+
+    pending = []
+
+    try:
+        for i, item in enumerate(candidates, 1):
+            folder = item['folder']
+            md_file = item['md_file']
+
+            print(f"\n[{i}/{len(candidates)}] {item['title']}")
+
+            # 提取URL
+            url = extract_article_url(md_file)
+            if not url:
+                print("  ⚠️  未找到URL,跳过")
+                failed += 1
+                continue
 
-    for i, item in enumerate(candidates, 1):
-        folder = item['folder']
-        md_file = item['md_file']
+            article_id = WechatDatabase.extract_article_id(url)
 
-        print(f"\n[{i}/{len(candidates)}] {item['title']}")
+            # 增长模型判断已接近饱和的文章，再获取一次快照价值很小，跳过以节省费用
+            if db is not None and article_id and not args.force:
+                prediction = db.get_prediction(article_id)
+                if prediction and not prediction['needs_refresh']:
+                    print(f"  ⏭️  已接近饱和(预测最终阅读:{prediction['predicted_final_reads']}, "
+                          f"置信度:{prediction['confidence']:.2f}),跳过")
+                    skipped += 1
+                    continue
 
-        # 提取URL
-        url = extract_article_url(md_file)
-        if not url:
-            print("  ⚠️  未找到URL,跳过")
-            failed += 1
-            continue
+            # 获取数据
+            print("  📊 获取互动数据...")
+            try:
+                stats = client.get_article_stats(url)
 
-        # 获取数据
-        print("  📊 获取互动数据...")
-        try:
-            stats = client.get_article_stats(url)
+                if not stats:
+                    print("  ❌ 获取失败")
+                    failed += 1
+                    continue
 
-            if not stats:
-                print("  ❌ 获取失败")
-                failed += 1
-                continue
+                # 保存
+                record = build_stats_record(stats)
+                if export_json:
+                    save_stats_metadata(folder, record)
 
-            # 保存
-            save_stats_metadata(folder, stats)
-            print(f"  ✅ 完成! 阅读:{stats.get('read_num', 0)}, 点赞:{stats.get('like_num', 0)}")
-            success += 1
+                if db is not None:
+                    if article_id:
+                        pending.append((article_id, record))
+                    else:
+                        print("  ⚠️  无法提取文章ID,未写入数据库")
 
-            # API限流
-            if i < len(candidates):
-                import time
-                time.sleep(0.5)
+                    if len(pending) >= DB_BATCH_SIZE:
+                        saved_to_db += flush_stats_to_db(db, pending)
 
-        except Exception as e:
-            print(f"  ❌ 失败: {e}")
-            failed += 1
-            continue
+                print(f"  ✅ 完成! 阅读:{stats.get('read_num', 0)}, 点赞:{stats.get('like_num', 0)}")
+                success += 1
+
+                # API限流
+                if i < len(candidates):
+                    import time
+                    time.sleep(0.5)
+
+            except Exception as e:
+                print(f"  ❌ 失败: {e}")
+                failed += 1
+                continue
+
+    finally:
+        if db is not None:
+            # 写入剩余的统计数据
+            saved_to_db += flush_stats_to_db(db, pending)
+            db.close()
 
     # 总结
     print(f"\n{'='*60}")
     print(f"✅ 获取完成!")
     print(f"   成功: {success} 篇")
     print(f"   失败: {failed} 篇")
+    if skipped:
+        print(f"   跳过(已饱和): {skipped} 篇")
+    if db is not None:
+        print(f"   写入数据库: {saved_to_db} 条")
+    if metrics.endpoints:
+        print(f"\n📈 API调用指标:")
+        metrics.print_summary()
     print(f"{'='*60}\n")
 
+    metrics.export(PROJECT_ROOT / "logs")
+
 
 if __name__ == "__main__":
     main()
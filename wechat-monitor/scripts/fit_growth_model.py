@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拟合阅读量增长曲线模型
+根据 article_stats 历史为每个公众号拟合增长曲线，预测文章最终阅读量，
+结果写入 article_predictions 表，供 fetch_recent_days_stats.py 跳过已饱和的文章
+"""
+
+import sys
+import logging
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.database import WechatDatabase
+from utils.growth_model import update_predictions
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    """主函数"""
+    db_path = PROJECT_ROOT / "data" / "wechat_monitor.db"
+    if not db_path.exists():
+        print(f"❌ 数据库文件不存在: {db_path}")
+        print("请先运行 migrate_to_db.py 迁移数据")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("📈 拟合阅读量增长曲线模型")
+    print("=" * 60)
+
+    with WechatDatabase(str(db_path)) as db:
+        result = update_predictions(db)
+
+    model = result['model']
+    print(f"\n全局增长时间常数 τ: {model['global']['tau_hours']:.1f} 小时 "
+          f"(残差 {model['global']['residual']:.3f})")
+
+    if model['accounts']:
+        print("\n各公众号:")
+        for account_name, account_model in sorted(model['accounts'].items()):
+            if account_model['fallback']:
+                note = "数据不足，使用全局模型"
+            else:
+                note = f"{account_model['samples']} 个快照"
+            print(f"  - {account_name or '(未知)'}: τ={account_model['tau_hours']:.1f}h, "
+                  f"残差 {account_model['residual']:.3f} ({note})")
+
+    print(f"\n✅ 已预测 {result['predictions']} 篇文章")
+    print(f"   其中 {result['skippable']} 篇已接近饱和，无需再获取快照")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,16 +7,28 @@
 
 import os
 import sys
+import shutil
+import tempfile
 from pathlib import Path
 from datetime import datetime
+from itertools import islice
 import json
 
 # 添加项目路径
 sys.path.insert(0, str(Path(__file__).parent))
 
-from utils.database import WechatDatabase
+from utils.database import WechatDatabase, DEFAULT_BATCH_SIZE
+from utils.analytics import AnalyticsEngine
+from utils.stats_log import read_stats_history
+from utils.metrics import compute_engagement_metrics
+from utils.content import summarize_content
+from utils.timestamps import day_end_epoch, day_start_epoch
 
 PROJECT_ROOT = Path(__file__).parent.parent
+PARQUET_DIR = PROJECT_ROOT / "data" / "parquet"
+
+# 终端摘要中展示的发布后天数
+COHORT_AGE_DAYS = (1, 3, 7)
 
 
 def scan_articles(articles_dir, date_filter=None):
@@ -82,29 +94,10 @@ def scan_articles(articles_dir, date_filter=None):
                         metadata[key] = value
 
         # 获取摘要(前200字)
-        content_start = content.find('---')
-        if content_start != -1:
-            main_content = content[content_start+3:].strip()
-            summary = main_content[:200].replace('\n', ' ').strip()
-        else:
-            summary = "无摘要"
+        summary = summarize_content(content)
 
         # 读取互动数据 - 优先读取历史记录
-        stats_history_file = article_folder / "stats_history.json"
-        stats_list = []
-
-        if stats_history_file.exists():
-            # 读取历史记录
-            with open(stats_history_file, 'r', encoding='utf-8') as f:
-                history_data = json.load(f)
-                stats_list = history_data.get('history', [])
-        else:
-            # 兼容旧版本,读取单个stats文件
-            stats_file = article_folder / "stats_metadata.json"
-            if stats_file.exists():
-                with open(stats_file, 'r', encoding='utf-8') as f:
-                    stats = json.load(f)
-                    stats_list = [stats]
+        stats_list = read_stats_history(article_folder)
 
         # 如果没有任何数据,添加一个空数据
         if not stats_list:
@@ -122,25 +115,12 @@ def scan_articles(articles_dir, date_filter=None):
         share_num = stats.get('share_num', 0)
         collect_num = stats.get('collect_num', 0)
 
-        # 计算各项指标（避免除零错误）
-        if read_num > 0:
-            # 1. 互动率 = (点赞数+在看数)/阅读量*1000
-            engagement_rate = ((like_num + looking_num) / read_num) * 1000
-
-            # 2. 传播指数 = (转发数×2+在看数)/阅读量*1000
-            virality_index = ((share_num * 2 + looking_num) / read_num) * 1000
-
-            # 3. 内容价值指数 = (收藏数×2+评论数)/阅读量*1000
-            content_value = ((collect_num * 2 + comment_num) / read_num) * 1000
-
-            # 4. 综合热度分 = (点赞×1+在看×2+评论×3+收藏×4+转发×5)/阅读量×100
-            hotness_score = ((like_num * 1 + looking_num * 2 + comment_num * 3 +
-                            collect_num * 4 + share_num * 5) / read_num) * 100
-        else:
-            engagement_rate = 0
-            virality_index = 0
-            content_value = 0
-            hotness_score = 0
+        # 计算各项指标（定义见 utils/metrics.py）
+        metrics = compute_engagement_metrics(stats)
+        engagement_rate = metrics['engagement_rate']
+        virality_index = metrics['virality_index']
+        content_value = metrics['content_value']
+        hotness_score = metrics['hotness_score']
 
         # 提取发布时间（用于排序和显示）
         publish_time_str = metadata.get('发布时间', '')
@@ -190,140 +170,135 @@ def scan_articles(articles_dir, date_filter=None):
     return articles
 
 
-def load_articles_from_db(db_path, date_filter=None):
+def load_articles_from_db(db_path, date_filter=None, chunk_size=DEFAULT_BATCH_SIZE):
     """
-    从数据库加载文章数据
+    从数据库流式加载文章数据（按发布时间倒序）
+
+    文章通过 iter_articles() 分块读取，每块文章的统计数据历史一次查询取回，
+    内存中同时只保留一块文章，占用与文章总数无关。
 
     Args:
         db_path: 数据库文件路径
-        date_filter: 日期筛选(格式: 2025-10-18)
+        date_filter: 日期筛选(格式: 20251018 或 2025-10-18)
+        chunk_size: 每块的文章数
 
-    Returns:
-        list: 文章列表
+    Yields:
+        dict: 文章数据
     """
-    articles = []
-
     with WechatDatabase(str(db_path)) as db:
-        # 获取所有文章及其最新统计数据
-        cursor = db.conn.cursor()
-
-        query = """
-            SELECT
-                a.article_id,
-                a.title,
-                a.author,
-                a.publish_time,
-                a.url,
-                a.account_name,
-                a.category,
-                a.collected_time,
-                a.content_path
-            FROM articles a
-            ORDER BY a.publish_time DESC
-        """
-
-        cursor.execute(query)
-        article_rows = cursor.fetchall()
-
-        for row in article_rows:
-            article_id = row[0]
-            title = row[1]
-            author = row[2]
-            publish_time = row[3]
-            url = row[4]
-            account_name = row[5]
-            category = row[6]
-            collected_time = row[7]
-            content_path = row[8]
-
-            # 日期筛选（如果需要）
-            if date_filter and publish_time:
-                pub_date = publish_time[:10].replace('-', '')  # 转换为 20251018 格式
-                if pub_date != date_filter:
-                    continue
-
-            # 获取文章的所有统计数据历史
-            stats_list = db.get_article_stats(article_id)
-
-            # 如果没有统计数据，添加空数据
-            if not stats_list:
-                stats_list = [{}]
-
-            # 使用最新的统计数据计算指标
-            latest_stats = stats_list[-1] if stats_list else {}
-
-            # 计算互动指标
-            read_num = latest_stats.get('read_num', 0)
-            like_num = latest_stats.get('like_num', 0)
-            looking_num = latest_stats.get('looking_num', 0)
-            comment_num = latest_stats.get('in_comment_num', 0)
-            share_num = latest_stats.get('share_num', 0)
-            collect_num = latest_stats.get('collect_num', 0)
-
-            # 计算各项指标
-            if read_num > 0:
-                engagement_rate = ((like_num + looking_num) / read_num) * 1000
-                virality_index = ((share_num * 2 + looking_num) / read_num) * 1000
-                content_value = ((collect_num * 2 + comment_num) / read_num) * 1000
-                hotness_score = ((like_num * 1 + looking_num * 2 + comment_num * 3 +
-                                collect_num * 4 + share_num * 5) / read_num) * 100
-            else:
-                engagement_rate = 0
-                virality_index = 0
-                content_value = 0
-                hotness_score = 0
-
-            # 解析日期和时间（用于兼容旧格式）
-            if collected_time:
-                try:
-                    dt = datetime.strptime(collected_time, '%Y-%m-%d %H:%M:%S')
-                    date_str = dt.strftime('%Y%m%d')
-                    time_str = dt.strftime('%H%M%S')
-                except:
-                    date_str = ''
-                    time_str = ''
-            else:
-                date_str = ''
-                time_str = ''
-
-            articles.append({
-                'date': date_str,
-                'time': time_str,
-                'id': article_id,
-                'title': title,
-                'folder': '',  # 数据库模式下不需要
-                'url': url,
-                'account': account_name or '',
-                'category': category or '',
-                'author': author or '',
-                'publish_time': publish_time or '',
-                'collect_time': collected_time or '',
-                'summary': '',  # 数据库模式下暂不提供摘要
-                'read_num': read_num,
-                'like_num': like_num,
-                'looking_num': looking_num,
-                'comment_num': comment_num,
-                'share_num': share_num,
-                'collect_num': collect_num,
-                'engagement_rate': engagement_rate,
-                'virality_index': virality_index,
-                'content_value': content_value,
-                'hotness_score': hotness_score,
-                'has_stats': bool(latest_stats),
-                'stats_history': stats_list
-            })
+        # 日期筛选（如果需要）：按 publish_ts 索引筛选当天的时间范围，
+        # 没有发布时间的文章仍保留在报表中（兼容 20251018 和 2025-10-18 两种格式）
+        rows = db.iter_articles(since=date_filter, until=date_filter,
+                                include_undated=True, chunk_size=chunk_size)
 
-    return articles
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            # 一次查询取回这一块文章的统计数据历史
+            history = db.get_stats_history_bulk([row['article_id'] for row in chunk])
+
+            for row in chunk:
+                yield _build_db_article(row, history.get(row['article_id'], []))
+
+
+def _build_db_article(row, stats_list):
+    """
+    把数据库中的一篇文章整理为报表行数据
+
+    Args:
+        row: iter_articles() 的记录
+        stats_list: 文章的统计数据历史（按日期排序）
+    """
+    article_id = row['article_id']
+    title = row['title']
+    author = row['author']
+    publish_time = row['publish_time']
+    url = row['url']
+    account_name = row['account_name']
+    category = row['category']
+    collected_time = row['collected_time']
+    # 摘要在保存正文时已计算，不需要读取正文
+    summary = row['summary']
+
+    # 如果没有统计数据，添加空数据
+    if not stats_list:
+        stats_list = [{}]
+
+    # 使用最新的统计数据计算指标
+    latest_stats = stats_list[-1] if stats_list else {}
+
+    # 计算互动指标
+    read_num = latest_stats.get('read_num', 0)
+    like_num = latest_stats.get('like_num', 0)
+    looking_num = latest_stats.get('looking_num', 0)
+    comment_num = latest_stats.get('in_comment_num', 0)
+    share_num = latest_stats.get('share_num', 0)
+    collect_num = latest_stats.get('collect_num', 0)
+
+    # 计算各项指标（定义见 utils/metrics.py）
+    metrics = compute_engagement_metrics(latest_stats)
+    engagement_rate = metrics['engagement_rate']
+    virality_index = metrics['virality_index']
+    content_value = metrics['content_value']
+    hotness_score = metrics['hotness_score']
+
+    # 解析日期和时间（用于兼容旧格式）
+    if collected_time:
+        try:
+            dt = datetime.strptime(collected_time, '%Y-%m-%d %H:%M:%S')
+            date_str = dt.strftime('%Y%m%d')
+            time_str = dt.strftime('%H%M%S')
+        except:
+            date_str = ''
+            time_str = ''
+    else:
+        date_str = ''
+        time_str = ''
+
+    return {
+        'date': date_str,
+        'time': time_str,
+        'id': article_id,
+        'title': title,
+        'folder': '',  # 数据库模式下不需要
+        'url': url,
+        'account': account_name or '',
+        'category': category or '',
+        'author': author or '',
+        'publish_time': publish_time or '',
+        'collect_time': collected_time or '',
+        'summary': summary or '',
+        'read_num': read_num,
+        'like_num': like_num,
+        'looking_num': looking_num,
+        'comment_num': comment_num,
+        'share_num': share_num,
+        'collect_num': collect_num,
+        'engagement_rate': engagement_rate,
+        'virality_index': virality_index,
+        'content_value': content_value,
+        'hotness_score': hotness_score,
+        'has_stats': bool(latest_stats),
+        'stats_history': stats_list
+    }
 
 
 def generate_html_report(articles, output_file, title="公众号文章报表"):
     """
     生成HTML报表
 
+    表格行边生成边写入临时文件，文章可以是生成器（如 load_articles_from_db()），
+    不需要在内存中同时保留所有文章和表格行。
+
     Args:
-        articles: 文章列表
+        articles: 文章列表或生成器
         output_file: 输出文件路径
         title: 报表标题
+
+    Returns:
+        int: 文章数
     """
     html_template = """<!DOCTYPE html>
 <html lang="zh-CN">
@@ -546,10 +521,18 @@ def generate_html_report(articles, output_file, title="公众号文章报表"):
 """
 
     # 生成表格行
-    table_rows = []
+    # 表格行先写入临时文件，页头的筛选选项要在遍历完所有文章后才能确定
+    rows_file = tempfile.TemporaryFile('w+', encoding='utf-8')
+    categories = set()
+    accounts = set()
     article_index = 1  # 用于文章序号
 
     for article in articles:
+        if article['category']:
+            categories.add(article['category'])
+        if article['account']:
+            accounts.add(article['account'])
+
         stats_history = article.get('stats_history', [])
 
         # 如果有多个历史记录,显示多行
@@ -567,13 +550,11 @@ def generate_html_report(articles, output_file, title="公众号文章报表"):
             fetched_time = first_stats.get('fetched_time', '-')
 
             # 计算指标
-            if read_num > 0:
-                engagement_rate = ((like_num + looking_num) / read_num) * 1000
-                virality_index = ((share_num * 2 + looking_num) / read_num) * 1000
-                content_value = ((collect_num * 2 + comment_num) / read_num) * 1000
-                hotness_score = ((like_num * 1 + looking_num * 2 + comment_num * 3 + collect_num * 4 + share_num * 5) / read_num) * 100
-            else:
-                engagement_rate = virality_index = content_value = hotness_score = 0
+            metrics = compute_engagement_metrics(first_stats)
+            engagement_rate = metrics['engagement_rate']
+            virality_index = metrics['virality_index']
+            content_value = metrics['content_value']
+            hotness_score = metrics['hotness_score']
 
             # 格式化发布时间显示
             publish_time_display = article.get('publish_time', '-')
@@ -602,7 +583,7 @@ def generate_html_report(articles, output_file, title="公众号文章报表"):
                     <td class="px-4 py-3 border-b border-slate-200 text-blue-600 font-semibold font-mono text-sm">{content_value:.1f}</td>
                     <td class="px-4 py-3 border-b border-slate-200 text-blue-600 font-semibold font-mono text-sm">{hotness_score:.1f}</td>
                 </tr>"""
-            table_rows.append(row)
+            rows_file.write(row + '\n')
 
             # 后续行 - 只显示数据,带增长指标
             for j in range(1, len(stats_history)):
@@ -646,13 +627,11 @@ def generate_html_report(articles, output_file, title="公众号文章报表"):
                 collect_growth = calc_growth(collect_num, prev_collect)
 
                 # 计算指标
-                if read_num > 0:
-                    engagement_rate = ((like_num + looking_num) / read_num) * 1000
-                    virality_index = ((share_num * 2 + looking_num) / read_num) * 1000
-                    content_value = ((collect_num * 2 + comment_num) / read_num) * 1000
-                    hotness_score = ((like_num * 1 + looking_num * 2 + comment_num * 3 + collect_num * 4 + share_num * 5) / read_num) * 100
-                else:
-                    engagement_rate = virality_index = content_value = hotness_score = 0
+                metrics = compute_engagement_metrics(curr_stats)
+                engagement_rate = metrics['engagement_rate']
+                virality_index = metrics['virality_index']
+                content_value = metrics['content_value']
+                hotness_score = metrics['hotness_score']
 
                 row = f"""
                 <tr class="history-row">
@@ -668,7 +647,7 @@ def generate_html_report(articles, output_file, title="公众号文章报表"):
                     <td class="px-4 py-3 bg-blue-50/40 border-b border-slate-200 text-blue-600 font-semibold font-mono text-sm">{content_value:.1f}</td>
                     <td class="px-4 py-3 bg-blue-50/40 border-b border-slate-200 text-blue-600 font-semibold font-mono text-sm">{hotness_score:.1f}</td>
                 </tr>"""
-                table_rows.append(row)
+                rows_file.write(row + '\n')
 
         else:
             # 只有一条数据,正常显示
@@ -737,35 +716,63 @@ def generate_html_report(articles, output_file, title="公众号文章报表"):
                     <td class="{content_value_class}">{content_value_display}</td>
                     <td class="{hotness_class}">{hotness_display}</td>
                 </tr>"""
-            table_rows.append(row)
+            rows_file.write(row + '\n')
 
         article_index += 1
 
-    # 统计信息
-    categories = set(a['category'] for a in articles if a['category'])
-    accounts = set(a['account'] for a in articles if a['account'])
+    total_count = article_index - 1
 
     category_options = '\n'.join([f'<option value="{cat}">{cat}</option>' for cat in sorted(categories)])
     account_options = '\n'.join([f'<option value="{acc}">{acc}</option>' for acc in sorted(accounts)])
 
-    # 生成HTML
-    html = html_template.format(
+    # 生成HTML：模板在表格行处拆开，两段分别填充后与临时文件中的表格行拼接
+    head, tail = html_template.split('{table_rows}')
+    values = dict(
         title=title,
-        total_count=len(articles),
+        total_count=total_count,
         category_count=len(categories),
         account_count=len(accounts),
         generate_time=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         category_options=category_options,
         account_options=account_options,
-        table_rows='\n'.join(table_rows)
     )
 
     # 保存文件
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(html)
+    with rows_file, open(output_file, 'w', encoding='utf-8') as f:
+        f.write(head.format(**values))
+        rows_file.seek(0)
+        shutil.copyfileobj(rows_file, f)
+        f.write(tail.format(**values))
 
     print(f"✅ 报表已生成: {output_file}")
-    print(f"   共 {len(articles)} 篇文章")
+    print(f"   共 {total_count} 篇文章")
+    return total_count
+
+
+def print_analytics_summary(db_path):
+    """
+    打印公众号基准和按发布月份的阅读量增长曲线（聚合由分析引擎完成）
+
+    Args:
+        db_path: 数据库文件路径
+    """
+    with AnalyticsEngine(db_path, PARQUET_DIR) as engine:
+        baselines = engine.account_baselines()
+        cohorts = engine.cohort_growth(max_age_days=max(COHORT_AGE_DAYS))
+        backend = engine.backend
+
+    print(f"\n📈 公众号表现（分析引擎: {backend}）")
+    top_accounts = sorted(baselines.items(), key=lambda x: x[1]['avg_read'], reverse=True)
+    for account, baseline in top_accounts[:10]:
+        print(f"   {account}: 平均阅读 {baseline['avg_read']:,.0f}, "
+              f"在看率 {baseline['avg_looking_rate'] * 100:.2f}%, {baseline['article_count']} 篇")
+
+    if cohorts:
+        print(f"\n📊 发布后第 {'/'.join(map(str, COHORT_AGE_DAYS))} 天平均阅读（按发布月份）")
+        for month, points in sorted(cohorts.items())[-6:]:
+            by_age = {p['age_days']: p['avg_read'] for p in points}
+            values = [f"{by_age[d]:,.0f}" if d in by_age else "-" for d in COHORT_AGE_DAYS]
+            print(f"   {month}: {' / '.join(values)}")
 
 
 def main():
@@ -777,8 +784,8 @@ def main():
     # 优先使用数据库
     if db_path.exists():
         print("📊 从数据库加载文章...")
+        # 生成器：边读取边写入报表，不在内存中保留全部文章
         all_articles = load_articles_from_db(db_path)
-        print(f"✅ 从数据库加载了 {len(all_articles)} 篇文章")
     elif articles_dir.exists():
         print("📊 从 JSON 文件扫描文章...")
         all_articles = scan_articles(articles_dir)
@@ -793,10 +800,13 @@ def main():
     reports_dir.mkdir(exist_ok=True)
 
     output_file = reports_dir / "all_articles.html"
-    generate_html_report(all_articles, output_file, title="公众号文章报表 - 全部文章")
+    total_count = generate_html_report(all_articles, output_file, title="公众号文章报表 - 全部文章")
 
     print(f"\n📁 报表保存位置: {reports_dir}")
-    print(f"   总报表: all_articles.html ({len(all_articles)} 篇)")
+    print(f"   总报表: all_articles.html ({total_count} 篇)")
+
+    if db_path.exists():
+        print_analytics_summary(db_path)
 
 
 if __name__ == "__main__":
@@ -1,18 +1,36 @@
 #!/usr/bin/env python3
 """
 数据迁移脚本：将 JSON 文件数据导入 SQLite 数据库
+
+增量同步：数据库中的 sync_manifest 表记录每个文章目录上次导入时的文件签名
+（各数据文件的修改时间和大小）和内容哈希，签名未变的目录不再读取；
+签名变化但内容哈希相同的目录（例如历史日志整理只改写了文件）只更新签名，不重新导入。
+日常同步的耗时只与当天新增或变化的目录数有关。--full 忽略清单重新导入全部目录。
 """
 
+import os
 import json
+import queue
+import hashlib
 import sys
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
 import logging
 
 # 添加项目路径
 sys.path.insert(0, str(Path(__file__).parent))
 
-from utils.database import WechatDatabase
+from utils.database import WechatDatabase, DEFAULT_BATCH_SIZE
+from utils.content import content_fields
+from utils.stats_log import (read_stats_history, HISTORY_LOG_FILE, LEGACY_HISTORY_FILE,
+                             LATEST_STATS_FILE)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -20,50 +38,322 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 参与目录签名的文件：任何一个新增、删除或改写都会让目录重新导入
+SYNC_FILES = ('metadata.json', 'article.md', HISTORY_LOG_FILE, LEGACY_HISTORY_FILE, LATEST_STATS_FILE)
+
 
-def extract_article_id_from_url(url: str) -> str:
-    """从 URL 中提取 article_id
+def parse_article_url(url: str) -> Tuple[Optional[str], Optional[str]]:
+    """从 URL 中提取 article_id 和 __biz（只解析一次 URL）
 
     支持两种URL格式：
     1. 完整格式: https://mp.weixin.qq.com/s?__biz=xxx&mid=123456...
-    2. 短链接格式: https://mp.weixin.qq.com/s/xxxxxx
+    2. 短链接格式: https://mp.weixin.qq.com/s/xxxxxx（没有 __biz）
+
+    Returns:
+        (article_id, biz)，无法提取的部分为 None
     """
+    article_id, biz = None, None
     try:
-        from urllib.parse import urlparse, parse_qs
         parsed = urlparse(url)
+        params = parse_qs(parsed.query)
+        if '__biz' in params:
+            biz = params['__biz'][0]
 
         # 方法1: 尝试从查询参数中提取 mid
-        params = parse_qs(parsed.query)
         if 'mid' in params:
-            return params['mid'][0]
-
+            article_id = params['mid'][0]
         # 方法2: 尝试从短链接路径中提取 (例如: /s/M83M2eIgRxx4TifQ7o-RHg)
-        path = parsed.path
-        if path.startswith('/s/'):
-            article_id = path[3:]  # 移除 '/s/' 前缀
-            if article_id:  # 确保不为空
-                return article_id
+        elif parsed.path.startswith('/s/'):
+            article_id = parsed.path[3:] or None  # 移除 '/s/' 前缀，确保不为空
 
     except Exception as e:
         logger.error(f"提取 article_id 失败: {e}")
 
-    logger.error(f"无法提取文章 ID: {url}")
-    return None
+    return article_id, biz
+
+
+def folder_signature(folder: Path) -> str:
+    """
+    计算文章目录的文件签名（只 stat，不读取文件内容）
+
+    Returns:
+        各数据文件 (文件名, 修改时间纳秒, 大小) 的 SHA1
+    """
+    parts = []
+    for name in SYNC_FILES:
+        try:
+            st = os.stat(folder / name)
+        except FileNotFoundError:
+            continue
+        parts.append(f"{name}:{st.st_mtime_ns}:{st.st_size}")
+    return hashlib.sha1("|".join(parts).encode('utf-8')).hexdigest()
 
 
-def migrate_articles(data_dir: Path, db: WechatDatabase):
+def folder_content_hash(folder: Path, chunk_size: int = 1 << 16) -> str:
+    """
+    计算文章目录数据文件内容的哈希（文件签名变化时才需要计算）
+
+    Returns:
+        各数据文件 (文件名, 内容) 的 SHA1
+    """
+    digest = hashlib.sha1()
+    for name in SYNC_FILES:
+        try:
+            f = open(folder / name, 'rb')
+        except FileNotFoundError:
+            continue
+        with f:
+            digest.update(f"{name}:{os.fstat(f.fileno()).st_size}:".encode('utf-8'))
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_subscriptions(subscriptions_file: Path) -> list:
+    """
+    读取订阅列表（格式同 daily_fetch.py: name,biz,rss_url,category）
+
+    Returns:
+        [{'name', 'biz', 'rss_url', 'category'}, ...]，文件不存在时为空列表
+    """
+    subscriptions = []
+    if not subscriptions_file.exists():
+        return subscriptions
+
+    with open(subscriptions_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or line.startswith('name,'):
+                continue
+
+            parts = line.split(',')
+            if len(parts) >= 3:
+                subscriptions.append({
+                    'name': parts[0],
+                    'biz': parts[1],
+                    'rss_url': parts[2],
+                    'category': parts[3] if len(parts) > 3 else ''
+                })
+    return subscriptions
+
+
+def read_article_folder(folder: Path, signature: str, data_dir: Path,
+                        compress: bool = False, previous_hash: Optional[str] = None) -> Dict:
+    """
+    读取并整理一个文章目录（不访问数据库，可以在工作进程中执行）
+
+    Args:
+        folder: 文章目录
+        signature: 目录的文件签名（原样带回，写入同步清单）
+        data_dir: 数据目录（content_path 相对于它的上级目录）
+        compress: 是否在这里计算正文的压缩存储字段（并行导入时把压缩分摊到工作进程）
+        previous_hash: 上次导入时的内容哈希；与当前内容相同时不再解析
+
+    Returns:
+        {'folder', 'signature', 'content_hash', 'status', 'article_id', 'metadata', 'body',
+         'content', 'stats', 'error'}；status 为 'ok' / 'unchanged' / 'no_metadata' / 'no_id' / 'error'
+    """
+    result = {'folder': folder.name, 'signature': signature, 'content_hash': None, 'status': 'ok',
+              'article_id': None, 'metadata': None, 'body': None, 'content': None,
+              'stats': None, 'error': None}
+
+    # 只有修改时间变化、内容没有变化（例如历史日志整理时原样改写）
+    result['content_hash'] = folder_content_hash(folder)
+    if previous_hash is not None and result['content_hash'] == previous_hash:
+        result['status'] = 'unchanged'
+        return result
+
+    metadata_file = folder / "metadata.json"
+    article_file = folder / "article.md"
+
+    # 读取文章元数据
+    if not metadata_file.exists():
+        result['status'] = 'no_metadata'
+        return result
+
+    try:
+        with open(metadata_file, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+
+        # 添加内容路径
+        if article_file.exists():
+            metadata['content_path'] = str(article_file.relative_to(data_dir.parent))
+
+        # 获取 article_id，同时从 URL 提取 BIZ（如果没有）
+        url = metadata.get('url', '')
+        article_id, biz = parse_article_url(url)
+        if not metadata.get('biz') and biz:
+            metadata['biz'] = biz
+        if not article_id:
+            result['status'] = 'no_id'
+            result['error'] = f"无法提取文章 ID: {url}"
+            return result
+
+        # 写入数据库时直接使用，不再重复解析 URL
+        metadata['article_id'] = article_id
+        result['article_id'] = article_id
+        result['metadata'] = metadata
+
+        # 正文压缩保存并写入全文索引
+        if article_file.exists():
+            body = article_file.read_text(encoding='utf-8', errors='replace')
+            result['body'] = body
+            if compress:
+                result['content'] = content_fields(body)
+
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = f"处理文章失败 {folder.name}: {e}"
+        return result
+
+    # 导入统计数据历史记录（无历史时为最新统计数据）
+    try:
+        result['stats'] = read_stats_history(folder)
+    except Exception as e:
+        result['error'] = f"导入统计历史失败 {folder.name}: {e}"
+
+    return result
+
+
+def iter_folder_results(changed_folders: List[Tuple[Path, str, Optional[str]]], data_dir: Path,
+                        workers: int = 1, window: int = DEFAULT_BATCH_SIZE) -> Iterator[Dict]:
+    """
+    按目录顺序逐个产出 read_article_folder() 的结果
+
+    workers > 1 时由进程池并行读取和整理（JSON 解析、URL 解析、正文压缩），
+    每次最多提交 window 个目录，避免结果（含正文）在内存中堆积。
+    工作进程用 spawn 方式启动，不继承父进程已打开的 SQLite 连接和写入线程。
+
+    Args:
+        changed_folders: [(目录, 文件签名, 上次导入时的内容哈希), ...]
+        data_dir: 数据目录
+        workers: 工作进程数，1 表示在当前进程中顺序读取
+        window: 并行模式下每轮提交的目录数
+    """
+    if workers <= 1:
+        for folder, signature, previous_hash in changed_folders:
+            yield read_article_folder(folder, signature, data_dir, previous_hash=previous_hash)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        for start in range(0, len(changed_folders), window):
+            chunk = changed_folders[start:start + window]
+            yield from executor.map(
+                read_article_folder,
+                [folder for folder, _, _ in chunk],
+                [signature for _, signature, _ in chunk],
+                repeat(data_dir),
+                repeat(True),
+                [previous_hash for _, _, previous_hash in chunk],
+                chunksize=max(1, len(chunk) // (workers * 4))
+            )
+
+
+def flush_to_db(db: WechatDatabase, articles: list, stats: list, bodies: list, synced: list,
+                batch_size: int):
+    """
+    将一批文章、统计数据、正文（压缩存储 + 全文索引）写入数据库，
+    并记录这些目录的同步签名（在同一个事务中，写入失败时签名不会记录，下次重新导入）
+
+    Args:
+        bodies: [(article_id, 正文, 预先计算的正文字段或 None), ...]
+
+    Returns:
+        (写入的文章数, 新插入的统计记录数)
+    """
+    if not articles and not stats and not synced:
+        return 0, 0
+
+    with db.transaction():
+        article_count = db.insert_articles_bulk(articles, batch_size=batch_size)
+        stats_count = db.insert_stats_bulk(stats, batch_size=batch_size)
+        db.update_search_bodies(((article_id, body) for article_id, body, _ in bodies),
+                                batch_size=batch_size)
+        db.save_article_contents(((article_id, content or body) for article_id, body, content in bodies),
+                                 batch_size=batch_size)
+        db.save_sync_manifest(synced, batch_size=batch_size)
+
+    articles.clear()
+    stats.clear()
+    bodies.clear()
+    synced.clear()
+    return article_count, stats_count
+
+
+class BatchWriter:
+    """
+    单线程写入器：读取线程把整理好的批次放入队列，写入线程依次提交
+
+    SQLite 同一时间只有一个写事务，写入集中在一个线程中，
+    读取和整理（进程池）与写入可以同时进行。队列有上限，写入跟不上时读取端会等待。
+    """
+
+    def __init__(self, db: WechatDatabase, batch_size: int, max_pending: int = 2):
+        self.db = db
+        self.batch_size = batch_size
+        self.articles = 0
+        self.stats = 0
+        self.error = None
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name='migrate-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """写入线程：依次提交队列中的批次，出错后丢弃剩余批次"""
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+            if self.error is not None:
+                continue
+            try:
+                article_count, stats_count = flush_to_db(self.db, *batch, self.batch_size)
+                self.articles += article_count
+                self.stats += stats_count
+                logger.info(f"✓ 已导入文章 [{self.articles}]")
+            except Exception as e:
+                self.error = e
+
+    def submit(self, articles: list, stats: list, bodies: list, synced: list):
+        """提交一个批次（调用方之后不能再修改这些列表）"""
+        if self.error is not None:
+            raise self.error
+        self._queue.put((articles, stats, bodies, synced))
+
+    def close(self):
+        """等待所有批次写完，写入出错时抛出异常"""
+        self._queue.put(None)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+
+def migrate_articles(data_dir: Path, db: WechatDatabase, batch_size: int = DEFAULT_BATCH_SIZE,
+                     full: bool = False, workers: int = 1):
     """
     迁移文章数据
 
+    每读取 batch_size 篇文章批量写入一次，避免逐行提交。
+    文件签名与同步清单一致的目录直接跳过；签名变化但内容哈希相同的目录只更新签名。
+    workers > 1 时由进程池并行读取目录，单独的写入线程提交批次（用于首次导入或从 JSON 重建数据库）。
+
     Args:
         data_dir: 文章数据目录
         db: 数据库实例
+        batch_size: 每批写入的文章数
+        full: 忽略同步清单，重新导入全部目录
+        workers: 读取目录的工作进程数
+
+    Returns:
+        {'folders', 'changed', 'unchanged', 'articles', 'stats'}：目录总数、签名变化的目录数、
+        其中内容未变化的目录数、导入的文章数、新增的统计记录数；文章目录不存在时返回 None
     """
     articles_dir = data_dir / "articles"
 
     if not articles_dir.exists():
         logger.error(f"文章目录不存在: {articles_dir}")
-        return
+        return None
 
     # 统计信息
     total_articles = 0
@@ -71,86 +361,112 @@ def migrate_articles(data_dir: Path, db: WechatDatabase):
     total_stats = 0
     success_stats = 0
 
+    pending_articles = []
+    pending_stats = []
+    pending_bodies = []
+    pending_synced = []
+
     # 遍历所有文章目录
     article_folders = sorted([d for d in articles_dir.iterdir() if d.is_dir()])
-    logger.info(f"发现 {len(article_folders)} 个文章目录")
+    manifest = {} if full else db.get_sync_manifest()
 
-    for folder in article_folders:
-        metadata_file = folder / "metadata.json"
-        stats_metadata_file = folder / "stats_metadata.json"
-        stats_history_file = folder / "stats_history.json"
-        article_file = folder / "article.md"
-
-        # 读取文章元数据
-        if not metadata_file.exists():
-            logger.warning(f"跳过（缺少 metadata.json）: {folder.name}")
-            continue
+    # 清理已删除目录的同步记录
+    stale = manifest.keys() - {folder.name for folder in article_folders}
+    if stale:
+        db.prune_sync_manifest(stale)
 
-        try:
-            with open(metadata_file, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
+    changed_folders = []
+    for folder in article_folders:
+        signature = folder_signature(folder)
+        previous = manifest.get(folder.name)
+        if previous is None:
+            changed_folders.append((folder, signature, None))
+        elif previous[0] != signature:
+            changed_folders.append((folder, signature, previous[1]))
+
+    # 变化的目录不多时不值得启动进程池
+    if len(changed_folders) < batch_size:
+        workers = 1
+
+    logger.info(f"发现 {len(article_folders)} 个文章目录，"
+                f"新增或有变化 {len(changed_folders)} 个"
+                + ("（全量导入）" if full else "")
+                + (f"，{workers} 个进程并行读取" if workers > 1 else ""))
+
+    writer = BatchWriter(db, batch_size) if workers > 1 else None
+
+    def flush():
+        nonlocal success_articles, success_stats, pending_articles, pending_stats
+        nonlocal pending_bodies, pending_synced
+        if writer is not None:
+            writer.submit(pending_articles, pending_stats, pending_bodies, pending_synced)
+            pending_articles, pending_stats, pending_bodies, pending_synced = [], [], [], []
+        else:
+            article_count, stats_count = flush_to_db(db, pending_articles, pending_stats,
+                                                     pending_bodies, pending_synced, batch_size)
+            success_articles += article_count
+            success_stats += stats_count
+            logger.info(f"✓ 已导入文章 [{success_articles}/{total_articles}]")
+
+    unchanged = 0
+    try:
+        for result in iter_folder_results(changed_folders, data_dir, workers, window=batch_size * 2):
+            status = result['status']
+            if status == 'unchanged':
+                # 内容没有变化，沿用上次导入的 article_id，只更新文件签名
+                unchanged += 1
+                pending_synced.append((result['folder'], result['signature'], result['content_hash'],
+                                       manifest[result['folder']][2]))
+                if len(pending_synced) >= batch_size:
+                    flush()
+                continue
+            if status == 'no_metadata':
+                logger.warning(f"跳过（缺少 metadata.json）: {result['folder']}")
+                continue
+            if status == 'error':
+                logger.error(result['error'])
+                continue
 
             total_articles += 1
-
-            # 添加内容路径
-            if article_file.exists():
-                metadata['content_path'] = str(article_file.relative_to(data_dir.parent))
-
-            # 从 URL 提取 BIZ（如果没有）
-            if not metadata.get('biz') and metadata.get('url'):
-                from urllib.parse import urlparse, parse_qs
-                parsed = urlparse(metadata['url'])
-                params = parse_qs(parsed.query)
-                if '__biz' in params:
-                    metadata['biz'] = params['__biz'][0]
-
-            # 插入文章
-            if db.insert_article(metadata):
-                success_articles += 1
-                logger.info(f"✓ 已导入文章 [{success_articles}/{total_articles}]: {metadata.get('title', 'Unknown')}")
-
-                # 获取 article_id
-                article_id = extract_article_id_from_url(metadata.get('url', ''))
-
-                if article_id:
-                    # 导入统计数据历史记录
-                    if stats_history_file.exists():
-                        try:
-                            with open(stats_history_file, 'r', encoding='utf-8') as f:
-                                stats_history = json.load(f)
-
-                            history_list = stats_history.get('history', [])
-                            for stats in history_list:
-                                if db.insert_article_stats(article_id, stats):
-                                    success_stats += 1
-                                total_stats += 1
-
-                        except Exception as e:
-                            logger.error(f"导入统计历史失败 {folder.name}: {e}")
-
-                    # 如果没有历史记录，尝试导入最新统计数据
-                    elif stats_metadata_file.exists():
-                        try:
-                            with open(stats_metadata_file, 'r', encoding='utf-8') as f:
-                                stats = json.load(f)
-
-                            if db.insert_article_stats(article_id, stats):
-                                success_stats += 1
-                            total_stats += 1
-
-                        except Exception as e:
-                            logger.error(f"导入统计数据失败 {folder.name}: {e}")
-
-        except Exception as e:
-            logger.error(f"处理文章失败 {folder.name}: {e}")
-            continue
+            if status == 'no_id':
+                # 记录签名，文件不变时不再重复报错
+                logger.error(result['error'])
+                pending_synced.append((result['folder'], result['signature'], result['content_hash'], None))
+                continue
+
+            article_id = result['article_id']
+            pending_articles.append(result['metadata'])
+            if result['body'] is not None:
+                pending_bodies.append((article_id, result['body'], result['content']))
+
+            if result['stats'] is None:
+                # 不记录签名，下次同步时重试
+                logger.error(result['error'])
+            else:
+                pending_stats.extend((article_id, stats) for stats in result['stats'])
+                total_stats += len(result['stats'])
+                pending_synced.append((result['folder'], result['signature'], result['content_hash'],
+                                       article_id))
+
+            if len(pending_articles) >= batch_size:
+                flush()
+
+        if pending_articles or pending_stats or pending_synced:
+            flush()
+    finally:
+        if writer is not None:
+            writer.close()
+            success_articles += writer.articles
+            success_stats += writer.stats
 
     # 输出统计结果
     logger.info("\n" + "=" * 60)
     logger.info("数据迁移完成！")
     logger.info("=" * 60)
     logger.info(f"文章数据: {success_articles}/{total_articles} 成功")
-    logger.info(f"统计数据: {success_stats}/{total_stats} 成功")
+    if unchanged:
+        logger.info(f"内容未变化: {unchanged} 个目录（只更新文件签名）")
+    logger.info(f"统计数据: {success_stats}/{total_stats} 新增（其余为已存在的重复记录）")
     logger.info("=" * 60)
 
     # 显示数据库摘要
@@ -161,9 +477,22 @@ def migrate_articles(data_dir: Path, db: WechatDatabase):
     logger.info(f"  分类统计: {summary['categories']}")
     logger.info(f"  最新文章: {summary['latest_article_date']}")
 
+    return {'folders': len(article_folders), 'changed': len(changed_folders), 'unchanged': unchanged,
+            'articles': success_articles, 'stats': success_stats}
+
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='将 JSON 文件数据导入 SQLite 数据库')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'每批写入的文章数（默认 {DEFAULT_BATCH_SIZE}）')
+    parser.add_argument('--full', action='store_true',
+                        help='忽略同步清单，重新读取并导入全部文章目录')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='并行读取文章目录的进程数（首次导入或重建数据库时使用，'
+                             f'本机 CPU 核数 {os.cpu_count()}；默认 1）')
+    args = parser.parse_args()
+
     # 获取项目根目录
     script_dir = Path(__file__).parent
     project_dir = script_dir.parent
@@ -177,7 +506,14 @@ def main():
     logger.info(f"数据库路径: {db_path}")
 
     with WechatDatabase(str(db_path)) as db:
-        migrate_articles(data_dir, db)
+        # 先按订阅列表登记公众号，文章导入时关联 account_id
+        subscriptions = load_subscriptions(project_dir / "config" / "subscriptions.csv")
+        if subscriptions:
+            db.sync_accounts(subscriptions)
+            logger.info(f"已同步订阅列表: {len(subscriptions)} 个公众号")
+
+        migrate_articles(data_dir, db, batch_size=args.batch_size, full=args.full,
+                         workers=args.workers)
 
     logger.info("\n迁移完成！")
 
@@ -12,7 +12,7 @@ from tabulate import tabulate
 # 添加项目路径
 sys.path.insert(0, str(Path(__file__).parent))
 
-from utils.database import WechatDatabase
+from utils.database import WechatDatabase, RANKING_METRICS
 
 
 def show_summary(db: WechatDatabase):
@@ -24,10 +24,14 @@ def show_summary(db: WechatDatabase):
     print("="*60)
     print(f"总文章数: {summary['total_articles']}")
     print(f"统计记录数: {summary['total_stats_records']}")
+    print(f"已归档文章数: {summary['archived_articles']}")
     print(f"最新文章日期: {summary['latest_article_date']}")
     print(f"\n分类统计:")
     for category, count in summary['categories'].items():
         print(f"  - {category}: {count} 篇")
+    print(f"\n公众号统计:")
+    for account_name, count in summary['accounts'].items():
+        print(f"  - {account_name}: {count} 篇")
     print("="*60)
 
 
@@ -52,58 +56,42 @@ def show_latest_articles(db: WechatDatabase, limit: int = 10):
     print(tabulate(table_data, headers=headers, tablefmt='grid'))
 
 
-def show_top_articles(db: WechatDatabase, metric: str = 'read_num', limit: int = 10):
+def show_top_articles(db: WechatDatabase, metric: str = 'read_num', limit: int = 10,
+                      since: str = None):
     """显示热门文章"""
-    cursor = db.conn.cursor()
-
-    # 获取最新统计数据的热门文章
-    query = f"""
-        SELECT
-            a.title,
-            a.publish_time,
-            s.read_num,
-            s.like_num,
-            s.looking_num,
-            s.in_comment_num,
-            s.fetched_date
-        FROM articles a
-        INNER JOIN (
-            SELECT article_id,
-                   read_num, like_num, looking_num, in_comment_num,
-                   fetched_date,
-                   ROW_NUMBER() OVER (PARTITION BY article_id ORDER BY fetched_date DESC) as rn
-            FROM article_stats
-        ) s ON a.article_id = s.article_id AND s.rn = 1
-        WHERE s.{metric} > 0
-        ORDER BY s.{metric} DESC
-        LIMIT ?
-    """
-
-    cursor.execute(query, (limit,))
-    results = cursor.fetchall()
+    # 最新统计数据表上的索引查找
+    results = db.get_top_articles(metric=metric, limit=limit, since=since)
 
     metric_names = {
         'read_num': '阅读数',
         'like_num': '点赞数',
         'looking_num': '在看数',
-        'in_comment_num': '评论数'
+        'in_comment_num': '评论数',
+        'share_num': '转发数',
+        'collect_num': '收藏数',
+        'engagement_rate': '互动率',
+        'virality_index': '传播指数',
+        'content_value': '内容价值',
+        'hotness_score': '热度分'
     }
 
-    print(f"\n按 {metric_names.get(metric, metric)} 排名的 Top {limit} 文章:")
+    period = f"（{since} 起发布）" if since else ""
+    print(f"\n按 {metric_names.get(metric, metric)} 排名的 Top {limit} 文章{period}:")
     print("="*60)
 
     table_data = []
     for row in results:
         table_data.append([
-            row[0][:40] + '...' if len(row[0]) > 40 else row[0],
-            row[1],
-            row[2],
-            row[3],
-            row[4],
-            row[5]
+            row['title'][:40] + '...' if len(row['title']) > 40 else row['title'],
+            row['publish_time'],
+            row['read_num'],
+            row['like_num'],
+            row['looking_num'],
+            row['in_comment_num'],
+            f"{row['hotness_score']:.1f}"
         ])
 
-    headers = ['标题', '发布时间', '阅读', '点赞', '在看', '评论']
+    headers = ['标题', '发布时间', '阅读', '点赞', '在看', '评论', '热度分']
     print(tabulate(table_data, headers=headers, tablefmt='grid'))
 
 
@@ -136,18 +124,9 @@ def show_article_trend(db: WechatDatabase, article_id: str):
     print(tabulate(table_data, headers=headers, tablefmt='grid'))
 
 
-def search_articles(db: WechatDatabase, keyword: str):
-    """搜索文章"""
-    cursor = db.conn.cursor()
-
-    cursor.execute("""
-        SELECT article_id, title, author, publish_time, account_name
-        FROM articles
-        WHERE title LIKE ?
-        ORDER BY publish_time DESC
-    """, (f'%{keyword}%',))
-
-    results = cursor.fetchall()
+def search_articles(db: WechatDatabase, keyword: str, limit: int = 50):
+    """搜索文章（标题、公众号名和正文全文检索）"""
+    results = db.search_articles(keyword, limit=limit)
 
     if not results:
         print(f"\n未找到包含 '{keyword}' 的文章")
@@ -159,14 +138,14 @@ def search_articles(db: WechatDatabase, keyword: str):
     table_data = []
     for row in results:
         table_data.append([
-            row[0],
-            row[1][:50] + '...' if len(row[1]) > 50 else row[1],
-            row[2],
-            row[3],
-            row[4]
+            row['article_id'],
+            row['title'][:50] + '...' if len(row['title']) > 50 else row['title'],
+            row['account_name'],
+            row['publish_time'],
+            row['snippet']
         ])
 
-    headers = ['ID', '标题', '作者', '发布时间', '公众号']
+    headers = ['ID', '标题', '公众号', '发布时间', '命中片段']
     print(tabulate(table_data, headers=headers, tablefmt='grid'))
 
 
@@ -175,10 +154,11 @@ def main():
     parser.add_argument('--summary', action='store_true', help='显示数据库摘要')
     parser.add_argument('--latest', type=int, metavar='N', help='显示最新 N 篇文章')
     parser.add_argument('--top', type=int, metavar='N', help='显示热门 N 篇文章')
-    parser.add_argument('--metric', choices=['read_num', 'like_num', 'looking_num', 'in_comment_num'],
+    parser.add_argument('--metric', choices=list(RANKING_METRICS),
                         default='read_num', help='热门文章排序指标 (默认: read_num)')
+    parser.add_argument('--since', metavar='YYYY-MM-DD', help='热门文章只统计该日期及之后发布的文章')
     parser.add_argument('--trend', metavar='ARTICLE_ID', help='显示指定文章的数据趋势')
-    parser.add_argument('--search', metavar='KEYWORD', help='搜索文章标题')
+    parser.add_argument('--search', metavar='KEYWORD', help='全文搜索文章（标题、公众号名和正文）')
 
     args = parser.parse_args()
 
@@ -197,7 +177,10 @@ def main():
         print("请先运行 migrate_to_db.py 迁移数据")
         return
 
-    with WechatDatabase(str(db_path)) as db:
+    # 查询结果缓存：两次运行之间没有新数据写入时直接复用
+    cache_path = project_dir / "data" / "cache" / "query_cache.json"
+
+    with WechatDatabase(str(db_path), cache_path=str(cache_path)) as db:
         if args.summary:
             show_summary(db)
 
@@ -205,7 +188,7 @@ def main():
             show_latest_articles(db, args.latest)
 
         if args.top:
-            show_top_articles(db, args.metric, args.top)
+            show_top_articles(db, args.metric, args.top, since=args.since)
 
         if args.trend:
             show_article_trend(db, args.trend)
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析查询模块
+把公众号基准、按发布月份的增长曲线、关键词互动交叉表等整体聚合下推到嵌入式分析引擎，
+替代逐行遍历文章的 Python 循环
+
+- DuckDB（可选依赖）: 读取 export_parquet.py 导出的 Parquet 快照（列式、含归档月份），
+  只在快照与数据库最新写入一致时使用（清单中的 write_version 与数据库相同）
+- SQLite: 没有快照、快照落后于数据库、未安装 DuckDB 或 DuckDB 无法读取快照时，
+  在数据库只读连接上执行同样的聚合（不在运行时下载 DuckDB 扩展）；
+  月度归档库中的文章和统计快照逐个 ATTACH 复制到临时表，与主库合并，
+  与包含归档月份的 Parquet 快照得到相同的结果
+
+两种引擎上都先建立同名视图 articles_v / stats_v，聚合 SQL 只写一份
+"""
+
+import json
+import sqlite3
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import duckdb
+except ImportError:  # duckdb 为可选依赖，未安装时使用 SQLite
+    duckdb = None
+
+from .database import STATS_METRICS
+from .metrics import DERIVED_METRICS, METRIC_SQL
+from .parquet_export import exported_write_version
+
+logger = logging.getLogger(__name__)
+
+# 视图 articles_v 的列（文章 + 最新统计 + 派生指标），两种数据源保持一致
+ARTICLE_VIEW_COLUMNS = (('article_id', 'title', 'account_id', 'account_name', 'category',
+                         'publish_date', 'publish_month') + STATS_METRICS + DERIVED_METRICS)
+
+# 从数据库读取的文章视图
+DB_ARTICLES_VIEW = """
+    SELECT a.article_id, a.title, a.account_id, a.account_name, a.category, a.publish_date,
+           substr(a.publish_date, 1, 7) AS publish_month,
+           {stats}
+    FROM main.articles a
+    LEFT JOIN main.article_latest_stats ls ON ls.article_id = a.article_id
+""".replace('{stats}', ', '.join(f'ls.{c}' for c in STATS_METRICS + DERIVED_METRICS))
+
+# 归档库中的文章视图：归档库没有最新统计表，取每篇文章日期最新的快照，派生指标按同样的公式计算
+ARCHIVE_ARTICLES_SELECT = """
+    SELECT a.article_id, a.title, a.account_id, a.account_name, a.category, a.publish_date,
+           substr(a.publish_date, 1, 7) AS publish_month,
+           {stats}, {derived}
+    FROM archive.articles a
+    LEFT JOIN archive.article_stats s ON s.article_id = a.article_id
+     AND s.fetched_date = (SELECT MAX(fetched_date) FROM archive.article_stats
+                           WHERE article_id = a.article_id)
+""".replace('{stats}', ', '.join(f's.{c}' for c in STATS_METRICS)).replace('{derived}', ', '.join(
+    f"CASE WHEN s.read_num > 0 THEN {METRIC_SQL[m]} WHEN s.article_id IS NOT NULL THEN 0 END"
+    for m in DERIVED_METRICS))
+
+# 统计快照视图中用到的快照列
+STATS_SOURCE_COLUMNS = ('article_id', 'fetched_date') + STATS_METRICS
+
+# 统计快照视图：每条快照附带文章发布后的天数（{age} 为各引擎的日期差表达式）
+STATS_VIEW = """
+    SELECT s.article_id, a.account_name, a.publish_month, {age} AS age_days,
+           {stats}
+    FROM {stats_source} s
+    INNER JOIN articles_v a ON a.article_id = s.article_id
+""".replace('{stats}', ', '.join(f's.{c}' for c in STATS_METRICS))
+
+SQLITE_AGE_DAYS = "CAST(julianday(s.fetched_date) - julianday(a.publish_date) AS INTEGER)"
+DUCKDB_AGE_DAYS = "date_diff('day', CAST(a.publish_date AS DATE), CAST(s.fetched_date AS DATE))"
+
+
+class AnalyticsEngine:
+    """
+    分析查询引擎
+
+    用法:
+        with AnalyticsEngine(db_path, parquet_dir) as engine:
+            baselines = engine.account_baselines(since='2025-10-01')
+    """
+
+    def __init__(self, db_path: Path, parquet_dir: Optional[Path] = None,
+                 backend: str = 'auto'):
+        """
+        Args:
+            db_path: SQLite 数据库路径
+            parquet_dir: Parquet 导出目录（如 data/parquet），存在时 DuckDB 优先读取
+            backend: 'auto'（有 DuckDB 且 Parquet 快照是最新的时使用 DuckDB，否则 SQLite）、
+                     'duckdb'（必须有 Parquet 导出）或 'sqlite'
+        """
+        self.db_path = Path(db_path)
+        self.parquet_dir = Path(parquet_dir) if parquet_dir else None
+        self.conn = None
+        self.backend = None
+        self.source = None
+
+        if backend not in ('auto', 'duckdb', 'sqlite'):
+            raise ValueError(f"未知的分析引擎: {backend}")
+        if backend == 'duckdb' and duckdb is None:
+            raise ImportError("DuckDB 分析引擎需要 duckdb: pip install duckdb")
+
+        # 没有可用的 Parquet 快照时直接使用 SQLite，不经过 DuckDB 读取数据库（需要联网安装扩展）
+        reason = "指定使用 SQLite" if backend == 'sqlite' else self._parquet_status()
+        if backend == 'duckdb':
+            if not self._has_parquet():
+                raise FileNotFoundError("DuckDB 分析引擎读取 Parquet 导出，请先运行 export_parquet.py")
+            if reason:
+                logger.warning(f"{reason}，仍按指定使用 DuckDB")
+            self._connect_duckdb()
+        elif reason is None:
+            try:
+                self._connect_duckdb()
+            except duckdb.Error as e:
+                logger.warning(f"DuckDB 无法读取 Parquet 快照，改用 SQLite: {e}")
+                reason = "DuckDB 读取失败"
+                self.close()
+
+        if self.conn is None:
+            self._connect_sqlite()
+
+        message = f"分析引擎: {self.backend} ({self.source})"
+        if self.backend == 'sqlite' and reason:
+            message += f"，{reason}"
+        logger.info(message)
+
+    def _has_parquet(self) -> bool:
+        """Parquet 导出是否可用"""
+        return bool(self.parquet_dir and
+                    any((self.parquet_dir / "articles").glob("*/*.parquet")) and
+                    any((self.parquet_dir / "article_stats").glob("*/*.parquet")))
+
+    def _db_write_version(self) -> int:
+        """数据库当前的写入版本号（见 WechatDatabase.get_write_version）"""
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT value FROM db_meta WHERE key = 'write_version'").fetchone()
+            return row[0] if row else 0
+        except sqlite3.Error:
+            return 0
+        finally:
+            conn.close()
+
+    def _parquet_status(self) -> Optional[str]:
+        """
+        判断能否使用 Parquet 快照
+
+        Returns:
+            None 表示可以使用；否则为不能使用的原因
+        """
+        if duckdb is None:
+            return "未安装 duckdb"
+        if not self._has_parquet():
+            return "没有 Parquet 导出"
+        exported = exported_write_version(self.parquet_dir)
+        current = self._db_write_version()
+        if exported != current:
+            return f"Parquet 快照落后于数据库（导出时版本 {exported}，当前 {current}）"
+        return None
+
+    def _connect_duckdb(self):
+        """内存中的 DuckDB 连接，视图指向 Parquet 导出"""
+        self.conn = duckdb.connect()
+        self.backend = 'duckdb'
+        self.source = str(self.parquet_dir)
+
+        articles = (self.parquet_dir / "articles" / "*" / "*.parquet").as_posix()
+        stats = (self.parquet_dir / "article_stats" / "*" / "*.parquet").as_posix()
+        self.conn.execute(f"""
+            CREATE VIEW articles_v AS
+            SELECT {', '.join(ARTICLE_VIEW_COLUMNS)}
+            FROM read_parquet('{articles}', hive_partitioning = true)
+        """)
+        stats_source = f"read_parquet('{stats}', hive_partitioning = true)"
+        self.conn.execute("CREATE VIEW stats_v AS " +
+                          STATS_VIEW.format(age=DUCKDB_AGE_DAYS, stats_source=stats_source))
+
+    def _archive_paths(self) -> List[Path]:
+        """月度归档库文件（命名规则同 WechatDatabase.archive_path）"""
+        archive_dir = self.db_path.parent / "archive"
+        return sorted(archive_dir.glob(f"{self.db_path.stem}_*.db"))
+
+    def _connect_sqlite(self):
+        """
+        数据库只读连接，视图建在 temp 库中
+
+        归档库逐个 ATTACH，把文章（含最新统计）和统计快照复制到临时表后立即 DETACH，
+        不受同时 ATTACH 数量的限制；视图合并主库和临时表
+        """
+        self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        self.backend = 'sqlite'
+        self.source = str(self.db_path)
+
+        archives = self._archive_paths()
+        articles_sql = DB_ARTICLES_VIEW
+        stats_source = "main.article_stats"
+        if archives:
+            self.conn.execute(f"CREATE TEMP TABLE archive_articles ({', '.join(ARTICLE_VIEW_COLUMNS)})")
+            self.conn.execute(f"CREATE TEMP TABLE archive_stats ({', '.join(STATS_SOURCE_COLUMNS)})")
+            for path in archives:
+                self.conn.execute("ATTACH DATABASE ? AS archive", (f"file:{path.as_posix()}?mode=ro",))
+                try:
+                    self.conn.execute(f"INSERT INTO temp.archive_articles {ARCHIVE_ARTICLES_SELECT}")
+                    self.conn.execute(f"""
+                        INSERT INTO temp.archive_stats
+                        SELECT {', '.join(STATS_SOURCE_COLUMNS)} FROM archive.article_stats
+                    """)
+                    self.conn.commit()
+                finally:
+                    self.conn.execute("DETACH DATABASE archive")
+
+            articles_sql += f" UNION ALL SELECT {', '.join(ARTICLE_VIEW_COLUMNS)} FROM temp.archive_articles"
+            columns = ', '.join(STATS_SOURCE_COLUMNS)
+            stats_source = (f"(SELECT {columns} FROM main.article_stats "
+                            f"UNION ALL SELECT {columns} FROM temp.archive_stats)")
+            self.source += f" + {len(archives)} 个归档库"
+
+        self.conn.execute(f"CREATE TEMP VIEW articles_v AS {articles_sql}")
+        self.conn.execute("CREATE TEMP VIEW stats_v AS " +
+                          STATS_VIEW.format(age=SQLITE_AGE_DAYS, stats_source=stats_source))
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[Dict]:
+        """执行查询，返回字典列表（两种引擎通用）"""
+        cursor = self.conn.execute(sql, list(params))
+        columns = [d[0] for d in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def account_baselines(self, since: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        按公众号计算基准指标（基于每篇文章的最新统计数据）
+
+        Args:
+            since: 可选，只统计该日期（YYYY-MM-DD）及之后发布的文章
+
+        Returns:
+            {公众号名称: {avg_read, avg_looking_rate, avg_share_rate, article_count}}，
+            与 WechatDatabase.get_account_baselines() 相同，按整数 account_id 分组
+        """
+        query = """
+            SELECT MAX(account_name) AS account_name,
+                   AVG(read_num) AS avg_read,
+                   AVG(looking_num * 1.0 / read_num) AS avg_looking_rate,
+                   AVG(share_num * 1.0 / read_num) AS avg_share_rate,
+                   COUNT(*) AS article_count
+            FROM articles_v
+            WHERE read_num > 0 AND account_id IS NOT NULL
+        """
+        params = []
+        if since:
+            query += " AND publish_date >= ?"
+            params.append(since)
+        query += " GROUP BY account_id"
+
+        return {row.pop('account_name'): row for row in self._query(query, params)}
+
+    def cohort_growth(self, max_age_days: int = 30, since: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """
+        按发布月份分组的阅读量增长曲线
+
+        Args:
+            max_age_days: 只统计发布后这么多天内的快照
+            since: 可选，只统计该日期（YYYY-MM-DD）及之后发布的文章
+
+        Returns:
+            {发布月份: [{age_days, articles, avg_read, max_read}, ...]}，按发布后天数升序
+        """
+        query = """
+            SELECT publish_month, age_days,
+                   COUNT(DISTINCT article_id) AS articles,
+                   AVG(read_num) AS avg_read,
+                   MAX(read_num) AS max_read
+            FROM stats_v
+            WHERE age_days BETWEEN 0 AND ?
+        """
+        params = [max_age_days]
+        if since:
+            query += " AND publish_month >= ?"
+            params.append(since[:7])
+        query += " GROUP BY publish_month, age_days ORDER BY publish_month, age_days"
+
+        cohorts = {}
+        for row in self._query(query, params):
+            cohorts.setdefault(row.pop('publish_month'), []).append(row)
+        return cohorts
+
+    def keyword_crosstab(self, keyword_groups: Dict[str, Iterable[str]],
+                         article_ids: Optional[Iterable[str]] = None,
+                         min_count: int = 1) -> Dict[str, Dict]:
+        """
+        标题关键词与互动指标交叉表
+
+        Args:
+            keyword_groups: {关键词标签: [标题中匹配的词, ...]}，同一篇文章命中一个标签下的多个词只计一次
+            article_ids: 可选，只统计这些文章
+            min_count: 命中文章数少于该值的标签不返回
+
+        Returns:
+            {标签: {count, avg_read, avg_engagement_rate, avg_hotness_score,
+                    avg_like_rate, avg_looking_rate, avg_comment_rate}}，
+            按平均互动率降序；*_rate 为百分比，avg_engagement_rate 定义见 utils/metrics.py
+        """
+        terms = [(label, term) for label, words in keyword_groups.items() for term in words]
+        if not terms:
+            return {}
+
+        params = [value for pair in terms for value in pair]
+        filter_sql = ""
+        if article_ids is not None:
+            article_ids = list(article_ids)
+            if not article_ids:
+                return {}
+            # 文章 ID 作为一个参数传入，不受 SQLITE_MAX_VARIABLE_NUMBER 限制
+            if self.backend == 'duckdb':
+                filter_sql = " AND a.article_id IN (SELECT unnest(CAST(? AS VARCHAR[])))"
+                params.append(article_ids)
+            else:
+                filter_sql = " AND a.article_id IN (SELECT value FROM json_each(?))"
+                params.append(json.dumps(article_ids))
+        params.append(min_count)
+
+        query = f"""
+            WITH kw(label, term) AS (VALUES {', '.join(['(?, ?)'] * len(terms))}),
+            matched AS (
+                SELECT DISTINCT kw.label, a.article_id
+                FROM kw
+                INNER JOIN articles_v a ON instr(a.title, kw.term) > 0
+                WHERE a.read_num > 0{filter_sql}
+            )
+            SELECT m.label,
+                   COUNT(*) AS count,
+                   AVG(a.read_num) AS avg_read,
+                   AVG(a.engagement_rate) AS avg_engagement_rate,
+                   AVG(a.hotness_score) AS avg_hotness_score,
+                   AVG(a.like_num * 100.0 / a.read_num) AS avg_like_rate,
+                   AVG(a.looking_num * 100.0 / a.read_num) AS avg_looking_rate,
+                   AVG(a.in_comment_num * 100.0 / a.read_num) AS avg_comment_rate
+            FROM matched m
+            INNER JOIN articles_v a ON a.article_id = m.article_id
+            GROUP BY m.label
+            HAVING COUNT(*) >= ?
+            ORDER BY avg_engagement_rate DESC
+        """
+        return {row.pop('label'): row for row in self._query(query, params)}
+
+    def close(self):
+        """关闭连接"""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        """上下文管理器入口"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """上下文管理器出口"""
+        self.close()
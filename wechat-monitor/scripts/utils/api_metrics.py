@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+外部API调用指标模块
+收集极致了API、文章下载等外部请求的耗时、状态、错误、流量和费用，
+每次运行结束后导出为 JSON Lines 和 Prometheus textfile 格式
+"""
+
+import os
+import json
+import time
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# 耗时直方图分桶上限（秒）
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class ApiMetrics:
+    """
+    外部API调用指标收集器
+
+    实例本身可作为响应钩子传给 JizhileAPI(response_hooks=[...]) 或
+    download_article_html(response_hooks=[...])，每次调用结束后接收一个事件字典:
+    {
+        'endpoint': 接口名,
+        'latency': 耗时（秒）,
+        'status': HTTP状态码（网络异常时为 None）,
+        'error': 错误类别（成功时为 None）,
+        'bytes_sent': 请求字节数,
+        'bytes_received': 响应字节数,
+        'cost_money': 本次调用费用
+    }
+    """
+
+    def __init__(self, run_name: str):
+        """
+        Args:
+            run_name: 运行名称（通常为脚本名），用于区分导出记录
+        """
+        self.run_name = run_name
+        self.started_at = datetime.now()
+        self.endpoints = {}
+
+    def __call__(self, event: Dict):
+        self.record(event)
+
+    def _new_endpoint_stats(self) -> Dict:
+        return {
+            'count': 0,
+            'errors': 0,
+            'error_classes': {},
+            'status_codes': {},
+            'latency_sum': 0.0,
+            'latency_min': None,
+            'latency_max': 0.0,
+            'latency_buckets': [0] * len(LATENCY_BUCKETS),
+            'bytes_sent': 0,
+            'bytes_received': 0,
+            'cost_money': 0.0
+        }
+
+    def record(self, event: Dict):
+        """记录一次调用事件"""
+        stats = self.endpoints.setdefault(event.get('endpoint', 'unknown'), self._new_endpoint_stats())
+
+        latency = event.get('latency') or 0.0
+        stats['count'] += 1
+        stats['latency_sum'] += latency
+        stats['latency_max'] = max(stats['latency_max'], latency)
+        if stats['latency_min'] is None or latency < stats['latency_min']:
+            stats['latency_min'] = latency
+
+        for i, upper in enumerate(LATENCY_BUCKETS):
+            if latency <= upper:
+                stats['latency_buckets'][i] += 1
+                break
+
+        status = str(event.get('status'))
+        stats['status_codes'][status] = stats['status_codes'].get(status, 0) + 1
+
+        error = event.get('error')
+        if error:
+            stats['errors'] += 1
+            stats['error_classes'][error] = stats['error_classes'].get(error, 0) + 1
+
+        stats['bytes_sent'] += event.get('bytes_sent') or 0
+        stats['bytes_received'] += event.get('bytes_received') or 0
+        stats['cost_money'] += float(event.get('cost_money') or 0)
+
+    def summary(self) -> List[Dict]:
+        """
+        汇总本次运行的指标
+
+        Returns:
+            每个接口一条汇总记录
+        """
+        finished_at = datetime.now()
+        records = []
+
+        for endpoint, stats in sorted(self.endpoints.items()):
+            count = stats['count']
+            records.append({
+                'run': self.run_name,
+                'started_at': self.started_at.strftime('%Y-%m-%d %H:%M:%S'),
+                'finished_at': finished_at.strftime('%Y-%m-%d %H:%M:%S'),
+                'endpoint': endpoint,
+                'count': count,
+                'errors': stats['errors'],
+                'error_classes': stats['error_classes'],
+                'status_codes': stats['status_codes'],
+                'latency_avg': stats['latency_sum'] / count if count else 0.0,
+                'latency_min': stats['latency_min'] or 0.0,
+                'latency_max': stats['latency_max'],
+                'latency_sum': stats['latency_sum'],
+                'latency_buckets': dict(zip([str(b) for b in LATENCY_BUCKETS], stats['latency_buckets'])),
+                'bytes_sent': stats['bytes_sent'],
+                'bytes_received': stats['bytes_received'],
+                'cost_money': round(stats['cost_money'], 4)
+            })
+
+        return records
+
+    def export_jsonl(self, output_file: Path):
+        """将本次运行的汇总追加写入 JSON Lines 文件（每个接口一行）"""
+        output_file = Path(output_file)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(output_file, 'a', encoding='utf-8') as f:
+            for record in self.summary():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def export_prometheus(self, output_file: Path):
+        """
+        导出为 Prometheus textfile 格式（node_exporter textfile collector 可直接读取）
+
+        文件先写入临时文件再原子替换，避免采集到写了一半的内容。
+        """
+        output_file = Path(output_file)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+
+        lines = [
+            "# HELP wechat_api_request_duration_seconds Outbound API call latency.",
+            "# TYPE wechat_api_request_duration_seconds histogram"
+        ]
+        for endpoint, stats in sorted(self.endpoints.items()):
+            labels = f'run="{self.run_name}",endpoint="{endpoint}"'
+            cumulative = 0
+            for upper, bucket_count in zip(LATENCY_BUCKETS, stats['latency_buckets']):
+                cumulative += bucket_count
+                lines.append(f'wechat_api_request_duration_seconds_bucket{{{labels},le="{upper}"}} {cumulative}')
+            lines.append(f'wechat_api_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats["count"]}')
+            lines.append(f'wechat_api_request_duration_seconds_sum{{{labels}}} {stats["latency_sum"]:.6f}')
+            lines.append(f'wechat_api_request_duration_seconds_count{{{labels}}} {stats["count"]}')
+
+        counters = [
+            ('wechat_api_errors_total', 'Outbound API calls that failed, by error class.'),
+            ('wechat_api_responses_total', 'Outbound API responses by HTTP status.'),
+            ('wechat_api_bytes_sent_total', 'Request bytes sent.'),
+            ('wechat_api_bytes_received_total', 'Response bytes received.'),
+            ('wechat_api_cost_money_total', 'Money charged by the API.')
+        ]
+        for name, help_text in counters:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for endpoint, stats in sorted(self.endpoints.items()):
+                labels = f'run="{self.run_name}",endpoint="{endpoint}"'
+                if name == 'wechat_api_errors_total':
+                    for error, count in sorted(stats['error_classes'].items()):
+                        lines.append(f'{name}{{{labels},error="{error}"}} {count}')
+                elif name == 'wechat_api_responses_total':
+                    for status, count in sorted(stats['status_codes'].items()):
+                        lines.append(f'{name}{{{labels},status="{status}"}} {count}')
+                elif name == 'wechat_api_bytes_sent_total':
+                    lines.append(f'{name}{{{labels}}} {stats["bytes_sent"]}')
+                elif name == 'wechat_api_bytes_received_total':
+                    lines.append(f'{name}{{{labels}}} {stats["bytes_received"]}')
+                else:
+                    lines.append(f'{name}{{{labels}}} {stats["cost_money"]:.4f}')
+
+        lines.append("# HELP wechat_api_last_run_timestamp_seconds Time the run finished.")
+        lines.append("# TYPE wechat_api_last_run_timestamp_seconds gauge")
+        lines.append(f'wechat_api_last_run_timestamp_seconds{{run="{self.run_name}"}} {int(time.time())}')
+
+        tmp_file = output_file.with_name(output_file.name + ".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_file, output_file)
+
+    def export(self, logs_dir: Path):
+        """
+        导出本次运行的指标到日志目录
+
+        - logs/api_metrics.jsonl: 每次运行追加汇总
+        - logs/api_metrics_<run>.prom: 最近一次运行的 Prometheus 指标
+        """
+        if not self.endpoints:
+            return
+
+        logs_dir = Path(logs_dir)
+        self.export_jsonl(logs_dir / "api_metrics.jsonl")
+        self.export_prometheus(logs_dir / f"api_metrics_{self.run_name}.prom")
+
+    def print_summary(self):
+        """在终端输出简要指标"""
+        for record in self.summary():
+            print(f"   [{record['endpoint']}] 调用 {record['count']} 次, "
+                  f"失败 {record['errors']} 次, "
+                  f"平均耗时 {record['latency_avg']:.2f}s, "
+                  f"费用 {record['cost_money']}")
+
+
+def emit_event(hooks, event: Dict):
+    """依次调用钩子，钩子自身的异常不影响请求流程"""
+    for hook in hooks or []:
+        try:
+            hook(event)
+        except Exception as e:
+            logger.warning(f"指标钩子执行失败: {e}", exc_info=True)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文章正文模块
+正文的压缩存储格式和预先计算的衍生字段（长度、字数、摘要）
+
+- 压缩: 优先 zstd（可选依赖 zstandard），未安装时使用标准库 zlib；
+  每行记录使用的编码，两种格式可以混存，读取时按记录解压
+- 衍生字段在写入时计算一次，报表和分析只读取这些列，不需要解压正文
+"""
+
+import re
+import zlib
+import hashlib
+from typing import Dict, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstandard 为可选依赖，未安装时使用 zlib
+    zstandard = None
+
+# 摘要长度（与 generate_report.scan_articles 一致）
+SUMMARY_LENGTH = 200
+
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 9
+
+# 字数：每个汉字计 1，连续的字母/数字计 1
+WORD_PATTERN = re.compile(r'[\u4e00-\u9fff]|[A-Za-z0-9]+')
+
+
+def compress_content(text: str) -> Tuple[str, bytes]:
+    """
+    压缩正文
+
+    Returns:
+        (编码名 'zstd' / 'zlib', 压缩后的字节)
+    """
+    data = text.encode('utf-8')
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return 'zlib', zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress_content(codec: str, blob: bytes) -> str:
+    """
+    解压正文
+
+    Args:
+        codec: 写入时记录的编码名
+        blob: 压缩后的字节
+    """
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ImportError("读取 zstd 压缩的正文需要 zstandard: pip install zstandard")
+        data = zstandard.ZstdDecompressor().decompress(blob)
+    elif codec == 'zlib':
+        data = zlib.decompress(blob)
+    else:
+        raise ValueError(f"未知的正文编码: {codec}")
+    return data.decode('utf-8')
+
+
+def content_hash(text: str) -> str:
+    """正文内容的哈希（用于跳过未变化的正文）"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def summarize_content(text: str, length: int = SUMMARY_LENGTH) -> str:
+    """
+    提取摘要：Markdown 元数据分隔线 --- 之后的前 length 个字符
+
+    Returns:
+        摘要，没有分隔线时为 "无摘要"
+    """
+    content_start = text.find('---')
+    if content_start == -1:
+        return "无摘要"
+    main_content = text[content_start + 3:].strip()
+    return main_content[:length].replace('\n', ' ').strip()
+
+
+def count_words(text: str) -> int:
+    """字数（汉字逐个计数，英文单词和数字按词计数）"""
+    return len(WORD_PATTERN.findall(text))
+
+
+def content_fields(text: str) -> Dict:
+    """
+    计算正文的存储字段
+
+    Returns:
+        {'codec', 'body', 'content_length', 'word_count', 'summary', 'content_hash'}
+    """
+    codec, body = compress_content(text)
+    return {
+        'codec': codec,
+        'body': body,
+        'content_length': len(text),
+        'word_count': count_words(text),
+        'summary': summarize_content(text),
+        'content_hash': content_hash(text),
+    }
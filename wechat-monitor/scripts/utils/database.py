@@ -5,23 +5,384 @@ SQLite 数据库管理模块
 
 import sqlite3
 import json
-from datetime import datetime
+import queue
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache, wraps
+from itertools import groupby, islice
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import logging
 
+from .content import content_fields, content_hash, decompress_content
+from .metrics import DERIVED_METRICS, metric_column_sql
+from .timestamps import day_end_epoch, day_start_epoch, normalize_time, to_epoch
+from .query_cache import QueryCache, MISS
+
 logger = logging.getLogger(__name__)
 
+# 每个连接都会设置的 PRAGMA
+CONNECTION_PRAGMAS = [
+    ('synchronous', 'NORMAL'),    # WAL 模式下只在检查点时 fsync，提交不再每次刷盘
+    ('cache_size', -65536),       # 页缓存 64MB（负数单位为 KiB）
+    ('mmap_size', 268435456),     # 256MB 内存映射读取
+    ('temp_store', 'MEMORY'),     # 排序/临时表放在内存
+    ('busy_timeout', 5000),       # 遇到锁时最多等待 5 秒，而不是立即报 database is locked
+]
+
+# 批量写入时每次 executemany 的行数
+DEFAULT_BATCH_SIZE = 500
+
+# 统计快照中的互动指标字段
+STATS_METRICS = ('read_num', 'like_num', 'looking_num', 'in_comment_num',
+                 'share_num', 'collect_num')
+
+# 可用于排名的指标：原始互动数 + 派生指标（article_latest_stats 上的生成列）
+RANKING_METRICS = STATS_METRICS + DERIVED_METRICS
+
+# 文章 UPSERT 时比较的字段（不含 created_at / updated_at）
+ARTICLE_FIELDS = ('title', 'author', 'publish_time', 'url', 'account_name',
+                  'biz', 'category', 'content_path', 'collected_time', 'account_id',
+                  'publish_ts', 'collected_ts')
+
+# 整数时间戳列及其来源文本列：{表: (主键列, {时间戳列: 文本列})}
+TIMESTAMP_COLUMNS = {
+    'articles': (('article_id',), {'publish_ts': 'publish_time', 'collected_ts': 'collected_time'}),
+    'article_stats': (('article_id', 'fetched_date'), {'fetched_ts': 'fetched_time'}),
+}
+
+# 标准格式 "YYYY-MM-DD HH:MM:SS" 的文本时间可直接在 SQL 中转换
+CANONICAL_TIME_GLOB = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9]'
+
+# 写入文章前登记公众号；已有公众号只补全缺失的 biz / 分类
+UPSERT_ACCOUNT_SQL = """
+    INSERT INTO accounts (name, biz, category)
+    VALUES (:account_name, :biz, :category)
+    ON CONFLICT(name) DO UPDATE SET
+        biz = COALESCE(accounts.biz, excluded.biz),
+        category = COALESCE(accounts.category, excluded.category)
+    WHERE (accounts.biz IS NULL AND excluded.biz IS NOT NULL)
+       OR (accounts.category IS NULL AND excluded.category IS NOT NULL)
+"""
+
+# 冲突时原地更新而不是 INSERT OR REPLACE 的“删除再插入”：
+# 保留 created_at，且只有字段真的变化时才改写行和索引、刷新 updated_at；
+# 已归档到月度归档库的文章不再写回主库
+INSERT_ARTICLE_SQL = """
+    INSERT INTO articles
+    (article_id, title, author, publish_time, url, account_name,
+     biz, category, content_path, collected_time, account_id,
+     publish_ts, collected_ts, updated_at)
+    SELECT
+     :article_id, :title, :author, :publish_time, :url, :account_name,
+     :biz, :category, :content_path, :collected_time,
+     (SELECT account_id FROM accounts WHERE name = :account_name),
+     :publish_ts, :collected_ts, :updated_at
+    WHERE NOT EXISTS (SELECT 1 FROM archived_articles WHERE article_id = :article_id)
+    ON CONFLICT(article_id) DO UPDATE SET
+        {assignments},
+        updated_at = excluded.updated_at
+    WHERE {changed}
+""".format(
+    assignments=",\n        ".join(f"{f} = excluded.{f}" for f in ARTICLE_FIELDS),
+    changed="\n       OR ".join(f"articles.{f} IS NOT excluded.{f}" for f in ARTICLE_FIELDS)
+)
+
+# 使用 INSERT OR IGNORE 避免重复插入同一天的数据；
+# 已被 compact_stats() 降采样的时间段、已归档的文章不再写入，避免重新迁移时把删掉的快照补回来
+INSERT_STATS_SQL = """
+    INSERT OR IGNORE INTO article_stats
+    (article_id, read_num, like_num, looking_num, in_comment_num,
+     share_num, collect_num, fetched_time, fetched_date, fetched_ts)
+    SELECT
+     :article_id, :read_num, :like_num, :looking_num, :in_comment_num,
+     :share_num, :collect_num, :fetched_time, :fetched_date, :fetched_ts
+    WHERE NOT EXISTS (
+        SELECT 1 FROM stats_compaction_marks
+        WHERE article_id = :article_id AND :fetched_date < compacted_before
+    )
+      AND NOT EXISTS (SELECT 1 FROM archived_articles WHERE article_id = :article_id)
+"""
+
+# 月度归档库中的表结构（列清单显式列出，主库表结构变化不会影响归档库）
+ARCHIVE_ARTICLE_COLUMNS = ('article_id', 'title', 'author', 'publish_time', 'publish_date', 'url',
+                           'account_name', 'account_id', 'biz', 'category', 'content_path',
+                           'collected_time', 'created_at', 'updated_at', 'publish_ts', 'collected_ts')
+ARCHIVE_STATS_COLUMNS = ('article_id', 'read_num', 'like_num', 'looking_num', 'in_comment_num',
+                         'share_num', 'collect_num', 'fetched_time', 'fetched_date', 'created_at',
+                         'fetched_ts')
+ARCHIVE_CONTENT_COLUMNS = ('article_id', 'content_length', 'word_count', 'summary', 'content_hash',
+                           'codec', 'updated_at', 'body')
+
+# 正文的衍生字段（不含压缩正文）
+CONTENT_INFO_COLUMNS = ('content_length', 'word_count', 'summary')
+
+# 流式读取的行格式：dict（字典）、tuple（普通元组）、record（按列名访问属性的命名元组）
+ROW_FORMATS = ('dict', 'tuple', 'record')
+
+# 流式读取的文章视图：文章 + 最新统计 + 派生指标 + 正文衍生字段
+ITER_ARTICLES_SQL = """
+    SELECT {articles},
+           ls.fetched_date AS stats_fetched_date, {stats},
+           {content}
+    FROM articles a
+    LEFT JOIN article_latest_stats ls ON ls.article_id = a.article_id
+    LEFT JOIN article_content c ON c.article_id = a.article_id
+""".format(
+    articles=', '.join(f'a.{c}' for c in ARCHIVE_ARTICLE_COLUMNS),
+    stats=', '.join(f'ls.{c}' for c in STATS_METRICS + DERIVED_METRICS),
+    content=', '.join(f'c.{c}' for c in CONTENT_INFO_COLUMNS),
+)
+
+# 统计快照历史的列（与 article_stats 表一致）
+STATS_HISTORY_COLUMNS = (('id', 'article_id') + STATS_METRICS +
+                         ('fetched_time', 'fetched_date', 'created_at', 'fetched_ts'))
+
+ARCHIVE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS {db}.articles (
+        article_id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        author TEXT,
+        publish_time DATETIME,
+        publish_date DATE,
+        url TEXT,
+        account_name TEXT,
+        account_id INTEGER,
+        biz TEXT,
+        category TEXT,
+        content_path TEXT,
+        collected_time DATETIME,
+        created_at DATETIME,
+        updated_at DATETIME,
+        publish_ts INTEGER,
+        collected_ts INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS {db}.article_stats (
+        article_id TEXT NOT NULL,
+        read_num INTEGER DEFAULT 0,
+        like_num INTEGER DEFAULT 0,
+        looking_num INTEGER DEFAULT 0,
+        in_comment_num INTEGER DEFAULT 0,
+        share_num INTEGER DEFAULT 0,
+        collect_num INTEGER DEFAULT 0,
+        fetched_time DATETIME NOT NULL,
+        fetched_date DATE NOT NULL,
+        created_at DATETIME,
+        fetched_ts INTEGER,
+        PRIMARY KEY (article_id, fetched_date)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS {db}.article_content (
+        article_id TEXT PRIMARY KEY,
+        content_length INTEGER NOT NULL,
+        word_count INTEGER NOT NULL,
+        summary TEXT,
+        content_hash TEXT NOT NULL,
+        codec TEXT NOT NULL,
+        updated_at DATETIME NOT NULL,
+        body BLOB NOT NULL
+    )
+    """,
+]
+
+# 归档库索引（在补齐新增列之后创建）
+ARCHIVE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS {db}.idx_archive_articles_publish_date ON articles(publish_date)",
+    "CREATE INDEX IF NOT EXISTS {db}.idx_archive_articles_publish_ts ON articles(publish_ts)",
+]
+
+# 降采样粒度 -> strftime 分桶格式
+COMPACTION_RESOLUTIONS = {
+    'week': '%Y-%W',
+    'month': '%Y-%m',
+}
+
+# trigram 全文索引能匹配的最短关键词长度，更短的词使用二元分词索引 articles_fts_short
+TRIGRAM_MIN_LENGTH = 3
+
+# 短词索引的一条 'delete' / 插入语句（rowid 与 articles_fts 一致，值为各列的二元分词）
+SHORT_FTS_DELETE_SQL = """
+    INSERT INTO articles_fts_short (articles_fts_short, rowid, title, account_name, body)
+    VALUES ('delete', {rowid}, search_bigrams({title}), search_bigrams({account_name}),
+            search_bigrams({body}))
+"""
+SHORT_FTS_INSERT_SQL = """
+    INSERT INTO articles_fts_short (rowid, title, account_name, body)
+    VALUES ({rowid}, search_bigrams({title}), search_bigrams({account_name}), search_bigrams({body}))
+"""
+
+
+def _token_runs(text: str) -> List[str]:
+    """按字母、数字、汉字切分出连续片段（与 FTS5 unicode61 分词的分隔方式一致），转为小写"""
+    runs, current = [], []
+    for char in text.lower():
+        if char.isalnum():
+            current.append(char)
+        elif current:
+            runs.append(''.join(current))
+            current = []
+    if current:
+        runs.append(''.join(current))
+    return runs
+
+
+def search_bigrams(text: Optional[str]) -> str:
+    """
+    把文本转换为二元分词（短词索引 articles_fts_short 的索引内容）
+
+    每个连续片段输出相邻两个字组成的词，片段最后一个字另外输出一个单字，
+    任何 1~2 个字的关键词都能按词（或单字前缀）在索引中查找。
+    注册为 SQL 函数 search_bigrams()，由触发器在写入标题、公众号名时调用。
+
+    Args:
+        text: 原文
+
+    Returns:
+        空格分隔的二元分词
+    """
+    if not text:
+        return ''
+    tokens = []
+    for run in _token_runs(text):
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        tokens.append(run[-1])
+    return ' '.join(tokens)
+
+
+def _short_match_query(term: str) -> Optional[str]:
+    """
+    关键词在短词索引上的 MATCH 表达式
+
+    单字按前缀匹配二元分词，两个字以上按相邻二元分词组成的短语匹配；
+    MATCH 只用于缩小候选范围，是否真正包含关键词再用 LIKE 确认。
+
+    Returns:
+        MATCH 表达式；关键词中没有字母、数字、汉字时返回 None
+    """
+    parts = []
+    for run in _token_runs(term):
+        if len(run) == 1:
+            parts.append(f'"{run}"*')
+        else:
+            parts.append('"' + ' '.join(run[i:i + 2] for i in range(len(run) - 1)) + '"')
+    return " AND ".join(parts) if parts else None
+
+
+def _open_connection(db_path: Path, read_only: bool = False) -> sqlite3.Connection:
+    """
+    打开一个设置好 PRAGMA 的连接
+
+    Args:
+        db_path: 数据库文件路径
+        read_only: 是否为只读连接（设置 query_only）
+    """
+    conn = sqlite3.connect(str(db_path), check_same_thread=False)
+    conn.row_factory = sqlite3.Row  # 使查询结果可以通过列名访问
+    # 短词索引的触发器调用
+    conn.create_function('search_bigrams', 1, search_bigrams, deterministic=True)
+    for name, value in CONNECTION_PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value}")
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+@lru_cache(maxsize=None)
+def _record_type(columns: Tuple[str, ...]):
+    """按列名生成（并缓存）命名元组类型，实例没有 __dict__，比字典省内存"""
+    return namedtuple('Record', columns)
+
+
+def _serialized(method):
+    """写操作装饰器：同一实例内的写操作串行执行"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _cached_read(method):
+    """读操作装饰器：结果按方法名和参数缓存，数据库写入版本号变化后失效"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = QueryCache.make_key(method.__name__, args, kwargs)
+        version = self.get_write_version()
+        value = self.cache.get(key, version)
+        if value is MISS:
+            value = self.cache.put(key, version, method(self, *args, **kwargs))
+        return value
+    return wrapper
+
+
+class ReaderPool:
+    """
+    只读连接池
+
+    WAL 模式下读连接互不阻塞，也不会被写事务阻塞；
+    每个并发读者从池中取得自己的连接，用完归还。
+    """
+
+    def __init__(self, db_path: Path, size: int = 4):
+        """
+        Args:
+            db_path: 数据库文件路径
+            size: 最多同时打开的读连接数
+        """
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> sqlite3.Connection:
+        """取得一个读连接，池满时等待其他读者归还"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return _open_connection(self.db_path, read_only=True)
+
+        return self._idle.get()
+
+    def release(self, conn: sqlite3.Connection):
+        """归还读连接"""
+        self._idle.put(conn)
+
+    def close(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._created = 0
+
 
 class WechatDatabase:
     """微信公众号数据库管理类"""
 
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, pool_size: int = 4,
+                 cache_path: Optional[str] = None, cache_size: int = 128):
         """
         初始化数据库连接
 
         Args:
             db_path: 数据库文件路径，默认为 data/wechat_monitor.db
+            pool_size: 只读连接池大小
+            cache_path: 查询缓存持久化文件，为 None 时只在内存中缓存
+            cache_size: 最多缓存的查询数
         """
         if db_path is None:
             # 默认数据库路径
@@ -32,19 +393,59 @@ class WechatDatabase:
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
 
         self.conn = None
+        self.pool = None
+        self.pool_size = pool_size
+        self._write_lock = threading.RLock()
+        self._tx_depth = 0
+        self._changes_at_bump = 0
+        self.cache = QueryCache(cache_path, cache_size)
         self.connect()
         self.create_tables()
 
     def connect(self):
-        """建立数据库连接"""
-        self.conn = sqlite3.connect(str(self.db_path))
-        self.conn.row_factory = sqlite3.Row  # 使查询结果可以通过列名访问
+        """
+        建立数据库连接
+
+        self.conn 为写连接（启用 WAL 日志模式），读操作使用 reader() 从连接池取得独立连接，
+        报表、查询工具可以在数据写入期间并发读取。
+        """
+        self.conn = _open_connection(self.db_path)
+        journal_mode = self.conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+        if journal_mode.lower() != 'wal':
+            logger.warning(f"无法启用 WAL 模式，当前日志模式: {journal_mode}")
+
+        self.pool = ReaderPool(self.db_path, self.pool_size)
         logger.info(f"已连接到数据库: {self.db_path}")
 
+    @contextmanager
+    def reader(self):
+        """
+        从连接池取得一个只读连接
+
+        Yields:
+            只读数据库连接（用完自动归还）
+        """
+        conn = self.pool.acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self.pool.release(conn)
+
     def create_tables(self):
         """创建数据库表结构"""
         cursor = self.conn.cursor()
 
+        # 元数据表：write_version 在每个有写入的事务提交时加一，用于查询缓存失效
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS db_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO db_meta (key, value) VALUES ('write_version', 0)")
+
         # 创建文章表
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS articles (
@@ -82,122 +483,657 @@ class WechatDatabase:
             )
         """)
 
-        # 创建索引以提高查询性能
+        # 整数时间戳（Unix 秒，见 utils/timestamps.py）：所有按时间排序和范围筛选都使用这些列，
+        # 不依赖文本时间的格式；写入时在 Python 中解析，已有数据库升级时一次性回填
+        added_timestamps = self._ensure_columns(cursor, 'articles', {
+            'publish_ts': 'INTEGER',
+            'collected_ts': 'INTEGER',
+        })
+        added_timestamps += self._ensure_columns(cursor, 'article_stats', {'fetched_ts': 'INTEGER'})
+
+        # 创建索引以提高查询性能（scripts/check_query_plans.py 检查热点查询都能用上索引）
+        # 按分类列出最新文章：分类筛选和按发布时间排序都在索引内完成，不需要临时排序；
+        # 该索引同时覆盖只按 category 查询的场景，旧的单列索引不再需要
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_articles_category_ts
+            ON articles(category, publish_ts)
+        """)
+
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_articles_category
-            ON articles(category)
+            CREATE INDEX IF NOT EXISTS idx_articles_publish_ts
+            ON articles(publish_ts)
         """)
 
+        # 按文本时间排序的旧索引已由时间戳索引取代
+        for index in ('idx_articles_category', 'idx_articles_category_time',
+                      'idx_articles_publish_time', 'idx_articles_account_time'):
+            cursor.execute(f"DROP INDEX IF EXISTS {index}")
+
+        # 发布日期：由 publish_time 生成的虚拟列，按日期筛选时可直接走索引
+        # （WHERE DATE(publish_time) = ? 这种对列套函数的写法无法使用索引）
+        self._ensure_columns(cursor, 'articles', {
+            'publish_date': "DATE GENERATED ALWAYS AS (date(publish_time)) VIRTUAL"
+        })
+
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_articles_publish_time
-            ON articles(publish_time)
+            CREATE INDEX IF NOT EXISTS idx_articles_publish_date
+            ON articles(publish_date)
+        """)
+
+        # 公众号维度表：文章通过整数 account_id 引用，按公众号聚合时比较整数而不是字符串；
+        # articles 中的 account_name / biz / category 文本列保留以兼容已有查询
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS accounts (
+                account_id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE,
+                biz TEXT,
+                category TEXT,
+                rss_url TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
         """)
 
+        added = self._ensure_columns(cursor, 'articles', {
+            'account_id': "INTEGER REFERENCES accounts (account_id)"
+        })
+
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_stats_article_id
-            ON article_stats(article_id)
+            CREATE INDEX IF NOT EXISTS idx_articles_account_ts
+            ON articles(account_id, publish_ts)
         """)
 
+        if added:
+            # 已有数据库升级：从文章中登记公众号并回填 account_id
+            cursor.execute("""
+                INSERT OR IGNORE INTO accounts (name, biz, category)
+                SELECT account_name, MAX(biz), MAX(category)
+                FROM articles
+                WHERE account_name IS NOT NULL AND account_name != ''
+                GROUP BY account_name
+            """)
+            cursor.execute("""
+                UPDATE articles
+                SET account_id = (SELECT account_id FROM accounts WHERE name = articles.account_name)
+                WHERE account_name IS NOT NULL AND account_name != ''
+            """)
+
+        # UNIQUE(article_id, fetched_date) 的自动索引已覆盖按文章查询历史（含按日期排序），
+        # 单列 article_id 索引是它的前缀，只会增加写入代价
+        cursor.execute("DROP INDEX IF EXISTS idx_stats_article_id")
+
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_stats_fetched_date
             ON article_stats(fetched_date)
         """)
 
-        self.conn.commit()
+        # 已移入月度归档库的文章（article_id -> 归档月份）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS archived_articles (
+                article_id TEXT PRIMARY KEY,
+                archive_month TEXT NOT NULL,
+                archived_at DATETIME NOT NULL
+            )
+        """)
+
+        # 文章正文：压缩存储，长度/字数/摘要在写入时计算；
+        # 压缩正文放在最后一列，只读取前面的列时不会读取正文所在的溢出页
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS article_content (
+                article_id TEXT PRIMARY KEY,
+                content_length INTEGER NOT NULL,
+                word_count INTEGER NOT NULL,
+                summary TEXT,
+                content_hash TEXT NOT NULL,
+                codec TEXT NOT NULL,
+                updated_at DATETIME NOT NULL,
+                body BLOB NOT NULL,
+                FOREIGN KEY (article_id) REFERENCES articles (article_id)
+            )
+        """)
+
+        # 统计数据降采样：每篇文章已压缩到的日期，及每次压缩的运行记录
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS stats_compaction_marks (
+                article_id TEXT PRIMARY KEY,
+                compacted_before DATE NOT NULL,
+                compacted_at DATETIME NOT NULL
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS stats_compaction_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_at DATETIME NOT NULL,
+                cutoff_date DATE NOT NULL,
+                resolution TEXT NOT NULL,
+                rows_before INTEGER,
+                rows_deleted INTEGER,
+                articles_affected INTEGER,
+                duration_seconds REAL
+            )
+        """)
+
+        # 数据库维护记录（ANALYZE / 增量 VACUUM / 完整性检查）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS maintenance_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_at DATETIME NOT NULL,
+                size_before INTEGER,
+                size_after INTEGER,
+                freelist_before INTEGER,
+                pages_reclaimed INTEGER,
+                converted_auto_vacuum INTEGER DEFAULT 0,
+                integrity TEXT,
+                duration_seconds REAL
+            )
+        """)
+
+        # JSON 同步清单：每个文章目录上次导入时的文件签名，migrate_to_db.py 只处理有变化的目录
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sync_manifest (
+                folder TEXT PRIMARY KEY,
+                signature TEXT NOT NULL,
+                content_hash TEXT,
+                article_id TEXT,
+                synced_at DATETIME NOT NULL
+            )
+        """)
+        # 旧版本创建的清单没有内容哈希，这些目录下次文件签名变化时会重新导入一次
+        self._ensure_columns(cursor, 'sync_manifest', {'content_hash': 'TEXT'})
+
+        # 创建阅读量预测表（增长曲线模型输出）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS article_predictions (
+                article_id TEXT PRIMARY KEY,
+                predicted_final_reads INTEGER,
+                latest_read_num INTEGER,
+                saturation REAL,
+                confidence REAL,
+                tau_hours REAL,
+                snapshot_count INTEGER,
+                needs_refresh INTEGER DEFAULT 1,
+                model_version TEXT,
+                updated_at DATETIME,
+                FOREIGN KEY (article_id) REFERENCES articles (article_id)
+            )
+        """)
+
+        # 创建最新统计数据表：每篇文章一行，由触发器在插入更新的快照时维护，
+        # 使“最新数据”和 Top N 查询变成主键/索引查找，而不是每次扫描 article_stats
+        latest_exists = cursor.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'article_latest_stats'
+        """).fetchone()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS article_latest_stats (
+                article_id TEXT PRIMARY KEY,
+                read_num INTEGER DEFAULT 0,
+                like_num INTEGER DEFAULT 0,
+                looking_num INTEGER DEFAULT 0,
+                in_comment_num INTEGER DEFAULT 0,
+                share_num INTEGER DEFAULT 0,
+                collect_num INTEGER DEFAULT 0,
+                fetched_time DATETIME NOT NULL,
+                fetched_date DATE NOT NULL,
+                FOREIGN KEY (article_id) REFERENCES articles (article_id)
+            )
+        """)
+
+        # 派生互动指标：由最新快照生成，写入快照时由 SQLite 计算并维护索引
+        self._ensure_columns(cursor, 'article_latest_stats', {
+            metric: metric_column_sql(metric) for metric in DERIVED_METRICS
+        })
+
+        for metric in RANKING_METRICS:
+            cursor.execute(f"""
+                CREATE INDEX IF NOT EXISTS idx_latest_{metric}
+                ON article_latest_stats({metric} DESC)
+            """)
+
+        # 新快照日期不早于已有最新快照时才覆盖（补录的旧快照不影响最新数据）
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_article_stats_latest_insert
+            AFTER INSERT ON article_stats
+            BEGIN
+                INSERT INTO article_latest_stats
+                (article_id, read_num, like_num, looking_num, in_comment_num,
+                 share_num, collect_num, fetched_time, fetched_date)
+                VALUES
+                (NEW.article_id, NEW.read_num, NEW.like_num, NEW.looking_num, NEW.in_comment_num,
+                 NEW.share_num, NEW.collect_num, NEW.fetched_time, NEW.fetched_date)
+                ON CONFLICT(article_id) DO UPDATE SET
+                    read_num = excluded.read_num,
+                    like_num = excluded.like_num,
+                    looking_num = excluded.looking_num,
+                    in_comment_num = excluded.in_comment_num,
+                    share_num = excluded.share_num,
+                    collect_num = excluded.collect_num,
+                    fetched_time = excluded.fetched_time,
+                    fetched_date = excluded.fetched_date
+                WHERE excluded.fetched_date >= article_latest_stats.fetched_date;
+            END
+        """)
+
+        # 删除的正好是最新快照时，用剩余快照中最新的一条替换
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_article_stats_latest_delete
+            AFTER DELETE ON article_stats
+            WHEN OLD.fetched_date = (
+                SELECT fetched_date FROM article_latest_stats WHERE article_id = OLD.article_id
+            )
+            BEGIN
+                DELETE FROM article_latest_stats WHERE article_id = OLD.article_id;
+                INSERT INTO article_latest_stats
+                (article_id, read_num, like_num, looking_num, in_comment_num,
+                 share_num, collect_num, fetched_time, fetched_date)
+                SELECT article_id, read_num, like_num, looking_num, in_comment_num,
+                       share_num, collect_num, fetched_time, fetched_date
+                FROM article_stats
+                WHERE article_id = OLD.article_id
+                ORDER BY fetched_date DESC
+                LIMIT 1;
+            END
+        """)
+
+        # 全文索引：标题、公众号名和 Markdown 正文，trigram 分词适合不分词的中文；
+        # rowid 与 articles.rowid 一致，标题/公众号名由触发器同步，正文在导入时写入
+        fts_exists = cursor.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'
+        """).fetchone()
+
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                title, account_name, body,
+                tokenize = 'trigram'
+            )
+        """)
+
+        # 短词索引：trigram 无法匹配少于 3 个字的词（中文关键词大多是两个字），
+        # 另建一个二元分词索引；不保存内容（content=''），按旧值 'delete' 后再插入新值
+        short_fts_exists = cursor.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts_short'
+        """).fetchone()
+        if not short_fts_exists:
+            # 旧版触发器只维护 articles_fts，重建为同时维护两个索引的版本
+            for trigger in ('insert', 'update', 'delete'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS trg_articles_fts_{trigger}")
+
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts_short USING fts5(
+                title, account_name, body,
+                content = '',
+                tokenize = 'unicode61'
+            )
+        """)
+
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_articles_fts_insert
+            AFTER INSERT ON articles
+            BEGIN
+                INSERT INTO articles_fts (rowid, title, account_name, body)
+                VALUES (NEW.rowid, NEW.title, NEW.account_name, '');
+                {SHORT_FTS_INSERT_SQL.format(rowid='NEW.rowid', title='NEW.title',
+                                             account_name='NEW.account_name', body="''")};
+            END
+        """)
+
+        # 短词索引要用旧值删除，正文从 articles_fts 读取，所以先于 articles_fts 的改动执行
+        old_body = "(SELECT body FROM articles_fts WHERE rowid = OLD.rowid)"
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_articles_fts_update
+            AFTER UPDATE OF title, account_name ON articles
+            BEGIN
+                {SHORT_FTS_DELETE_SQL.format(rowid='OLD.rowid', title='OLD.title',
+                                             account_name='OLD.account_name', body=old_body)};
+                {SHORT_FTS_INSERT_SQL.format(rowid='NEW.rowid', title='NEW.title',
+                                             account_name='NEW.account_name', body=old_body)};
+                UPDATE articles_fts
+                SET title = NEW.title, account_name = NEW.account_name
+                WHERE rowid = NEW.rowid;
+            END
+        """)
+
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_articles_fts_delete
+            AFTER DELETE ON articles
+            BEGIN
+                {SHORT_FTS_DELETE_SQL.format(rowid='OLD.rowid', title='OLD.title',
+                                             account_name='OLD.account_name', body=old_body)};
+                DELETE FROM articles_fts WHERE rowid = OLD.rowid;
+            END
+        """)
+
+        if not fts_exists:
+            # 已有文章先建立标题索引，正文在下次运行 migrate_to_db.py 时补齐
+            cursor.execute("""
+                INSERT INTO articles_fts (rowid, title, account_name, body)
+                SELECT rowid, title, account_name, '' FROM articles
+            """)
+
+        if not short_fts_exists:
+            # 已有数据库首次创建短词索引时，从 articles_fts 中已索引的内容回填
+            cursor.execute("""
+                INSERT INTO articles_fts_short (rowid, title, account_name, body)
+                SELECT rowid, search_bigrams(title), search_bigrams(account_name), search_bigrams(body)
+                FROM articles_fts
+            """)
+
+        self._commit()
+
+        # 已有数据库首次创建该表时，从历史快照回填
+        if not latest_exists:
+            self.rebuild_latest_stats()
+
+        # 已有数据库首次添加时间戳列时，一次性转换主库和各月归档库中的文本时间
+        if added_timestamps:
+            self.backfill_timestamps()
+            for month in self.list_archive_months():
+                self.conn.execute("ATTACH DATABASE ? AS archive", (str(self.archive_path(month)),))
+                try:
+                    self._prepare_archive('archive')
+                finally:
+                    self.conn.execute("DETACH DATABASE archive")
+
         logger.info("数据库表结构已创建/验证")
 
-    def insert_article(self, article_data: Dict) -> bool:
+    @staticmethod
+    def _ensure_columns(cursor: sqlite3.Cursor, table: str, columns: Dict[str, str],
+                        schema: str = 'main') -> List[str]:
+        """
+        为已有数据库补充新增的列（CREATE TABLE IF NOT EXISTS 不会修改已存在的表）
+
+        Args:
+            cursor: 数据库游标
+            table: 表名
+            columns: {列名: 列定义}
+            schema: 数据库名（main 或 ATTACH 的别名）
+
+        Returns:
+            本次新添加的列名
+        """
+        # table_xinfo 才会列出生成列
+        existing = {row[1] for row in cursor.execute(f"PRAGMA {schema}.table_xinfo({table})")}
+        added = []
+        for name, definition in columns.items():
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {schema}.{table} ADD COLUMN {name} {definition}")
+                logger.info(f"已为 {schema}.{table} 表添加列: {name}")
+                added.append(name)
+        return added
+
+    def _prepare_archive(self, schema: str):
+        """
+        在写连接上为已 ATTACH 的归档库建表、补齐新增列并创建索引
+
+        旧版本创建的归档库首次补上时间戳列时一次性回填。
+        """
+        cursor = self.conn.cursor()
+        for ddl in ARCHIVE_SCHEMA:
+            cursor.execute(ddl.format(db=schema))
+
+        added = []
+        for table, (_, columns) in TIMESTAMP_COLUMNS.items():
+            added += self._ensure_columns(cursor, table, {ts: 'INTEGER' for ts in columns}, schema)
+
+        for ddl in ARCHIVE_INDEXES:
+            cursor.execute(ddl.format(db=schema))
+        self._commit()
+
+        if added:
+            self.backfill_timestamps(schema)
+
+    @_serialized
+    def backfill_timestamps(self, schema: str = 'main') -> int:
+        """
+        一次性转换：为时间戳列为空的行解析文本时间并回填（升级已有数据库时自动执行）
+
+        标准格式 "YYYY-MM-DD HH:MM:SS" 的行直接在 SQL 中按本地时区转换；其余格式（如 RFC 2822）
+        在 Python 中解析，并把文本改写为标准格式（publish_date 随之修正）。无法解析的保持原样，时间戳为 NULL。
+
+        Args:
+            schema: 数据库名（main 或已 ATTACH 的归档库别名）
+
+        Returns:
+            回填了时间戳的行数
+        """
+        filled = 0
+        with self.transaction():
+            for table, (keys, columns) in TIMESTAMP_COLUMNS.items():
+                for ts_column, text_column in columns.items():
+                    # strftime('%s', 文本, 'utc') 把本地时间文本转换为 Unix 时间戳
+                    filled += self.conn.execute(f"""
+                        UPDATE {schema}.{table}
+                        SET {ts_column} = CAST(strftime('%s', {text_column}, 'utc') AS INTEGER)
+                        WHERE {ts_column} IS NULL AND {text_column} GLOB ?
+                    """, (CANONICAL_TIME_GLOB,)).rowcount
+
+                    rows = self.conn.execute(f"""
+                        SELECT {', '.join(keys)}, {text_column} FROM {schema}.{table}
+                        WHERE {ts_column} IS NULL AND {text_column} IS NOT NULL AND {text_column} != ''
+                    """).fetchall()
+                    updates = []
+                    for row in rows:
+                        epoch = to_epoch(row[text_column])
+                        if epoch is not None:
+                            updates.append((epoch, normalize_time(row[text_column])) +
+                                           tuple(row[key] for key in keys))
+                        else:
+                            logger.warning(f"无法解析时间 {schema}.{table}.{text_column}: {row[text_column]!r}")
+
+                    if updates:
+                        self.conn.executemany(f"""
+                            UPDATE {schema}.{table} SET {ts_column} = ?, {text_column} = ?
+                            WHERE {' AND '.join(f'{key} = ?' for key in keys)}
+                        """, updates)
+                        filled += len(updates)
+
+        if filled:
+            logger.info(f"已回填时间戳: {schema} {filled} 行")
+        return filled
+
+    @_serialized
+    def rebuild_latest_stats(self) -> int:
+        """
+        从 article_stats 重建 article_latest_stats（一次性回填或数据修复时使用）
+
+        Returns:
+            重建后的文章数
+        """
+        with self.transaction():
+            self.conn.execute("DELETE FROM article_latest_stats")
+            cursor = self.conn.execute("""
+                INSERT INTO article_latest_stats
+                (article_id, read_num, like_num, looking_num, in_comment_num,
+                 share_num, collect_num, fetched_time, fetched_date)
+                SELECT article_id, read_num, like_num, looking_num, in_comment_num,
+                       share_num, collect_num, fetched_time, fetched_date
+                FROM (
+                    SELECT *,
+                           ROW_NUMBER() OVER (PARTITION BY article_id ORDER BY fetched_date DESC) AS rn
+                    FROM article_stats
+                )
+                WHERE rn = 1
+            """)
+
+        if cursor.rowcount > 0:
+            logger.info(f"已回填最新统计数据: {cursor.rowcount} 篇文章")
+        return cursor.rowcount
+
+    def _commit(self):
+        """提交写连接的事务；本事务有写入时同时递增 write_version，使查询缓存失效"""
+        if self.conn.total_changes != self._changes_at_bump:
+            self.conn.execute("UPDATE db_meta SET value = value + 1 WHERE key = 'write_version'")
+            self._changes_at_bump = self.conn.total_changes
+        self.conn.commit()
+
+    def get_write_version(self) -> int:
+        """
+        获取数据库写入版本号（任何进程通过 WechatDatabase 提交写入后都会变化）
+
+        Returns:
+            当前版本号
+        """
+        with self.reader() as conn:
+            row = conn.execute("SELECT value FROM db_meta WHERE key = 'write_version'").fetchone()
+            return row[0] if row else 0
+
+    def cached_query(self, sql: str, params: Tuple = ()) -> List[Dict]:
+        """
+        执行只读查询并缓存结果（按 SQL 和参数缓存，数据写入后自动失效）
+
+        适合聚合和 LIMIT 查询；结果超过缓存的单条大小上限（见 QueryCache.max_entry_bytes）时照常返回但不缓存，
+        读取整表请使用 iter_articles() / iter_stats()。
+
+        Args:
+            sql: 查询语句
+            params: 查询参数
+
+        Returns:
+            结果行字典列表
+        """
+        key = QueryCache.make_key('sql', sql, list(params))
+        version = self.get_write_version()
+        rows = self.cache.get(key, version)
+        if rows is MISS:
+            with self.reader() as conn:
+                cursor = conn.cursor()
+                cursor.execute(sql, params)
+                rows = self.cache.put(key, version, [dict(row) for row in cursor.fetchall()])
+        return rows
+
+    @contextmanager
+    def transaction(self):
+        """
+        在单个事务中执行一组写操作
+
+        配合 insert_* 方法的 commit=False 参数或 insert_*_bulk 方法使用，
+        退出时统一提交，出现异常时整体回滚。可以嵌套，只有最外层提交。
+
+        Yields:
+            当前数据库连接
+        """
+        with self._write_lock:
+            # 嵌套调用时只由最外层提交或回滚
+            if self._tx_depth > 0:
+                self._tx_depth += 1
+                try:
+                    yield self.conn
+                finally:
+                    self._tx_depth -= 1
+                return
+
+            self._tx_depth = 1
+            try:
+                yield self.conn
+                self._commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            finally:
+                self._tx_depth = 0
+
+    def _article_row(self, article_data: Dict) -> Optional[Dict]:
+        """把 metadata.json 的字段整理为 articles 表的一行，无法提取 ID 时返回 None"""
+        # 从 URL 中提取 article_id (mid 参数)；调用方已提取时直接使用，不再重复解析 URL
+        url = article_data.get('url', '')
+        article_id = article_data.get('article_id') or self.extract_article_id(url)
+
+        if not article_id:
+            logger.error(f"无法提取文章 ID: {url}")
+            return None
+
+        # 文本时间统一为标准格式，同时解析出整数时间戳（见 utils/timestamps.py）
+        publish_time = article_data.get('publish_time')
+        collected_time = article_data.get('collected_time')
+
+        return {
+            'article_id': article_id,
+            'title': article_data.get('title'),
+            'author': article_data.get('author'),
+            'publish_time': normalize_time(publish_time),
+            'url': url,
+            'account_name': article_data.get('account_name'),
+            'biz': article_data.get('biz'),
+            'category': article_data.get('category'),
+            'content_path': article_data.get('content_path'),
+            'collected_time': normalize_time(collected_time),
+            'publish_ts': to_epoch(publish_time),
+            'collected_ts': to_epoch(collected_time),
+            'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+    @staticmethod
+    def _stats_row(article_id: str, stats_data: Dict) -> Dict:
+        """把 stats_metadata.json 的字段整理为 article_stats 表的一行"""
+        return {
+            'article_id': article_id,
+            'read_num': stats_data.get('read_num', 0),
+            'like_num': stats_data.get('like_num', 0),
+            'looking_num': stats_data.get('looking_num', 0),
+            'in_comment_num': stats_data.get('in_comment_num', 0),
+            'share_num': stats_data.get('share_num', 0),
+            'collect_num': stats_data.get('collect_num', 0),
+            'fetched_time': normalize_time(stats_data.get('fetched_time')),
+            'fetched_date': stats_data.get('fetched_date'),
+            'fetched_ts': to_epoch(stats_data.get('fetched_time'))
+        }
+
+    @_serialized
+    def insert_article(self, article_data: Dict, commit: bool = True) -> bool:
         """
         插入或更新文章信息
 
         Args:
             article_data: 文章数据字典，包含 metadata.json 的字段
+            commit: 是否立即提交；在 transaction() 中调用时始终由外层事务统一提交
 
         Returns:
             bool: 操作是否成功
         """
+        commit = commit and not self._tx_depth
         try:
-            cursor = self.conn.cursor()
-
-            # 从 URL 中提取 article_id (mid 参数)
-            url = article_data.get('url', '')
-            article_id = self._extract_article_id(url)
-
-            if not article_id:
-                logger.error(f"无法提取文章 ID: {url}")
+            data = self._article_row(article_data)
+            if data is None:
                 return False
 
-            # 准备数据
-            data = {
-                'article_id': article_id,
-                'title': article_data.get('title'),
-                'author': article_data.get('author'),
-                'publish_time': article_data.get('publish_time'),
-                'url': url,
-                'account_name': article_data.get('account_name'),
-                'biz': article_data.get('biz'),
-                'category': article_data.get('category'),
-                'content_path': article_data.get('content_path'),
-                'collected_time': article_data.get('collected_time'),
-                'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
+            if data['account_name']:
+                self.conn.execute(UPSERT_ACCOUNT_SQL, data)
 
-            # 使用 INSERT OR REPLACE 实现 upsert
-            cursor.execute("""
-                INSERT OR REPLACE INTO articles
-                (article_id, title, author, publish_time, url, account_name,
-                 biz, category, content_path, collected_time, updated_at)
-                VALUES
-                (:article_id, :title, :author, :publish_time, :url, :account_name,
-                 :biz, :category, :content_path, :collected_time, :updated_at)
-            """, data)
+            # 使用 UPSERT，内容未变化时不改写
+            cursor = self.conn.execute(INSERT_ARTICLE_SQL, data)
 
-            self.conn.commit()
-            logger.info(f"已保存文章: {article_id} - {data['title']}")
+            if commit:
+                self._commit()
+            if cursor.rowcount > 0:
+                logger.info(f"已保存文章: {data['article_id']} - {data['title']}")
             return True
 
         except Exception as e:
             logger.error(f"插入文章失败: {e}")
-            self.conn.rollback()
+            if commit:
+                self.conn.rollback()
             return False
 
-    def insert_article_stats(self, article_id: str, stats_data: Dict) -> bool:
+    @_serialized
+    def insert_article_stats(self, article_id: str, stats_data: Dict, commit: bool = True) -> bool:
         """
         插入文章统计数据
 
         Args:
             article_id: 文章 ID
             stats_data: 统计数据字典，包含 stats_metadata.json 的字段
+            commit: 是否立即提交；批量写入时设为 False，在 transaction() 中调用时始终由外层事务统一提交
 
         Returns:
             bool: 操作是否成功
         """
+        commit = commit and not self._tx_depth
         try:
-            cursor = self.conn.cursor()
-
-            data = {
-                'article_id': article_id,
-                'read_num': stats_data.get('read_num', 0),
-                'like_num': stats_data.get('like_num', 0),
-                'looking_num': stats_data.get('looking_num', 0),
-                'in_comment_num': stats_data.get('in_comment_num', 0),
-                'share_num': stats_data.get('share_num', 0),
-                'collect_num': stats_data.get('collect_num', 0),
-                'fetched_time': stats_data.get('fetched_time'),
-                'fetched_date': stats_data.get('fetched_date')
-            }
-
-            # 使用 INSERT OR IGNORE 避免重复插入同一天的数据
-            cursor.execute("""
-                INSERT OR IGNORE INTO article_stats
-                (article_id, read_num, like_num, looking_num, in_comment_num,
-                 share_num, collect_num, fetched_time, fetched_date)
-                VALUES
-                (:article_id, :read_num, :like_num, :looking_num, :in_comment_num,
-                 :share_num, :collect_num, :fetched_time, :fetched_date)
-            """, data)
+            data = self._stats_row(article_id, stats_data)
+            cursor = self.conn.execute(INSERT_STATS_SQL, data)
 
-            self.conn.commit()
+            if commit:
+                self._commit()
 
             if cursor.rowcount > 0:
                 logger.info(f"已保存统计数据: {article_id} - {data['fetched_date']}")
@@ -205,9 +1141,697 @@ class WechatDatabase:
 
         except Exception as e:
             logger.error(f"插入统计数据失败: {e}")
-            self.conn.rollback()
+            if commit:
+                self.conn.rollback()
             return False
 
+    def _executemany_batched(self, sql: str, rows: Iterable[Dict], batch_size: int) -> Tuple[int, int]:
+        """
+        在当前事务中分批 executemany
+
+        Returns:
+            (提交的行数, 实际改动的行数)
+        """
+        submitted = 0
+        # rowcount 只统计语句本身改动的行，不含触发器写入的最新统计 / 全文索引
+        changed = 0
+        batch = []
+
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                changed += self.conn.executemany(sql, batch).rowcount
+                submitted += len(batch)
+                batch = []
+
+        if batch:
+            changed += self.conn.executemany(sql, batch).rowcount
+            submitted += len(batch)
+
+        return submitted, changed
+
+    def insert_articles_bulk(self, articles: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        批量插入或更新文章信息（单个事务，每 batch_size 行一次 executemany）
+
+        无法提取 article_id 的文章会被跳过；内容未变化的已有文章不会改写；
+        任何一行写入失败时整个事务回滚。
+
+        Args:
+            articles: 文章数据字典序列，字段同 insert_article()
+            batch_size: 每次 executemany 的行数
+
+        Returns:
+            有效的文章数（新增、更新和未变化的都计入）
+        """
+        rows = [row for row in map(self._article_row, articles) if row is not None]
+
+        with self.transaction():
+            self._executemany_batched(
+                UPSERT_ACCOUNT_SQL, (row for row in rows if row['account_name']), batch_size
+            )
+            written, changed = self._executemany_batched(INSERT_ARTICLE_SQL, rows, batch_size)
+
+        logger.info(f"已批量保存文章: {written} 篇（新增或变更 {changed} 篇）")
+        return written
+
+    def insert_stats_bulk(self, records: Iterable[Tuple[str, Dict]],
+                          batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        批量插入文章统计数据（单个事务，每 batch_size 行一次 executemany）
+
+        同一篇文章同一天已有的数据会被忽略；任何一行写入失败时整个事务回滚。
+
+        Args:
+            records: [(article_id, 统计数据字典), ...]，字段同 insert_article_stats()
+            batch_size: 每次 executemany 的行数
+
+        Returns:
+            新插入的记录数（不含被忽略的重复记录）
+        """
+        rows = (self._stats_row(article_id, stats) for article_id, stats in records)
+
+        with self.transaction():
+            submitted, inserted = self._executemany_batched(INSERT_STATS_SQL, rows, batch_size)
+
+        logger.info(f"已批量保存统计数据: {inserted}/{submitted} 条")
+        return inserted
+
+    def update_search_bodies(self, records: Iterable[Tuple[str, str]],
+                             batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        写入文章正文的全文索引（单个事务；正文未变化的文章不会改写索引）
+
+        Args:
+            records: [(article_id, Markdown 正文), ...]，文章需已存在于 articles 表
+            batch_size: 每次 executemany 的行数
+
+        Returns:
+            更新了索引的文章数
+        """
+        rows = ({'article_id': article_id, 'body': body or ''} for article_id, body in records)
+        changed_rows = """
+            SELECT rowid, title, account_name, body FROM articles_fts
+            WHERE rowid = (SELECT rowid FROM articles WHERE article_id = :article_id)
+              AND body IS NOT :body
+        """
+        changed = 0
+
+        with self.transaction():
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                # 短词索引先按旧正文删除再写入新正文（旧正文从尚未更新的 articles_fts 读取）
+                self.conn.executemany(
+                    f"INSERT INTO articles_fts_short (articles_fts_short, rowid, title, account_name, body) "
+                    f"SELECT 'delete', rowid, search_bigrams(title), search_bigrams(account_name), "
+                    f"search_bigrams(body) FROM ({changed_rows})", batch)
+                self.conn.executemany(
+                    f"INSERT INTO articles_fts_short (rowid, title, account_name, body) "
+                    f"SELECT rowid, search_bigrams(title), search_bigrams(account_name), "
+                    f"search_bigrams(:body) FROM ({changed_rows})", batch)
+                changed += self.conn.executemany("""
+                    UPDATE articles_fts SET body = :body
+                    WHERE rowid = (SELECT rowid FROM articles WHERE article_id = :article_id)
+                      AND body IS NOT :body
+                """, batch).rowcount
+
+        if changed:
+            logger.info(f"已更新全文索引: {changed} 篇")
+        return changed
+
+    def save_article_contents(self, records: Iterable[Tuple[str, Union[str, Dict]]],
+                              batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        压缩保存文章正文，并预先计算长度、字数和摘要（单个事务）
+
+        正文哈希与已保存的一致时跳过，不会重新压缩；不在 articles 表中的文章（如已归档）不写入。
+
+        Args:
+            records: [(article_id, Markdown 正文), ...]；正文也可以是 content_fields()
+                     已算好的字段字典（并行导入时在工作进程中压缩）
+            batch_size: 每批比较哈希和写入的行数
+
+        Returns:
+            新增或更新了正文的文章数
+        """
+        records = [(article_id, fields if isinstance(fields, dict) else (fields or ''))
+                   for article_id, fields in records]
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        saved = 0
+
+        with self.transaction():
+            for start in range(0, len(records), batch_size):
+                batch = records[start:start + batch_size]
+                existing = dict(self.conn.execute("""
+                    SELECT article_id, content_hash FROM article_content
+                    WHERE article_id IN (SELECT value FROM json_each(?))
+                """, (json.dumps([article_id for article_id, _ in batch]),)).fetchall())
+
+                rows = []
+                for article_id, fields in batch:
+                    digest = fields['content_hash'] if isinstance(fields, dict) else content_hash(fields)
+                    if existing.get(article_id) == digest:
+                        continue
+                    if not isinstance(fields, dict):
+                        fields = content_fields(fields)
+                    rows.append({'article_id': article_id, 'updated_at': now, **fields})
+                if not rows:
+                    continue
+
+                saved += self.conn.executemany("""
+                    INSERT INTO article_content
+                    (article_id, content_length, word_count, summary, content_hash,
+                     codec, updated_at, body)
+                    SELECT :article_id, :content_length, :word_count, :summary, :content_hash,
+                           :codec, :updated_at, :body
+                    WHERE EXISTS (SELECT 1 FROM articles WHERE article_id = :article_id)
+                    ON CONFLICT(article_id) DO UPDATE SET
+                        content_length = excluded.content_length,
+                        word_count = excluded.word_count,
+                        summary = excluded.summary,
+                        content_hash = excluded.content_hash,
+                        codec = excluded.codec,
+                        updated_at = excluded.updated_at,
+                        body = excluded.body
+                """, rows).rowcount
+
+        if saved:
+            logger.info(f"已保存文章正文: {saved} 篇")
+        return saved
+
+    def get_sync_manifest(self) -> Dict[str, Tuple[str, Optional[str], Optional[str]]]:
+        """
+        读取 JSON 同步清单
+
+        Returns:
+            {目录名: (上次导入时的文件签名, 内容哈希, article_id)}
+        """
+        with self.reader() as conn:
+            return {folder: (signature, content_hash, article_id)
+                    for folder, signature, content_hash, article_id in conn.execute(
+                        "SELECT folder, signature, content_hash, article_id FROM sync_manifest")}
+
+    def save_sync_manifest(self, entries: Iterable[Tuple[str, str, Optional[str], Optional[str]]],
+                           batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        记录已导入目录的文件签名（单个事务；与文章数据放在同一事务中时一起提交或回滚）
+
+        Args:
+            entries: [(目录名, 文件签名, 内容哈希, article_id), ...]
+            batch_size: 每次 executemany 的行数
+
+        Returns:
+            写入的条数
+        """
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        rows = ({'folder': folder, 'signature': signature, 'content_hash': content_hash,
+                 'article_id': article_id, 'synced_at': now}
+                for folder, signature, content_hash, article_id in entries)
+
+        with self.transaction():
+            submitted, _ = self._executemany_batched("""
+                INSERT INTO sync_manifest (folder, signature, content_hash, article_id, synced_at)
+                VALUES (:folder, :signature, :content_hash, :article_id, :synced_at)
+                ON CONFLICT(folder) DO UPDATE SET
+                    signature = excluded.signature,
+                    content_hash = excluded.content_hash,
+                    article_id = excluded.article_id,
+                    synced_at = excluded.synced_at
+            """, rows, batch_size)
+        return submitted
+
+    def prune_sync_manifest(self, folders: Iterable[str]) -> int:
+        """
+        删除已不存在的目录的同步记录
+
+        Args:
+            folders: 目录名列表
+
+        Returns:
+            删除的条数
+        """
+        folders = list(folders)
+        if not folders:
+            return 0
+        with self.transaction():
+            deleted = self.conn.execute(
+                "DELETE FROM sync_manifest WHERE folder IN (SELECT value FROM json_each(?))",
+                (json.dumps(folders),)
+            ).rowcount
+        return deleted
+
+    def sync_accounts(self, subscriptions: Iterable[Dict]) -> int:
+        """
+        按订阅列表（config/subscriptions.csv）登记或更新公众号
+
+        订阅列表是公众号 biz / 分类 / RSS 地址的权威来源，会覆盖已有值。
+
+        Args:
+            subscriptions: [{'name', 'biz', 'rss_url', 'category'}, ...]
+
+        Returns:
+            新增或变更的公众号数
+        """
+        rows = (
+            {
+                'name': sub['name'],
+                'biz': sub.get('biz') or None,
+                'category': sub.get('category') or None,
+                'rss_url': sub.get('rss_url') or None
+            }
+            for sub in subscriptions if sub.get('name')
+        )
+
+        with self.transaction():
+            _, changed = self._executemany_batched("""
+                INSERT INTO accounts (name, biz, category, rss_url)
+                VALUES (:name, :biz, :category, :rss_url)
+                ON CONFLICT(name) DO UPDATE SET
+                    biz = excluded.biz,
+                    category = excluded.category,
+                    rss_url = excluded.rss_url
+                WHERE accounts.biz IS NOT excluded.biz
+                   OR accounts.category IS NOT excluded.category
+                   OR accounts.rss_url IS NOT excluded.rss_url
+            """, rows, DEFAULT_BATCH_SIZE)
+
+            # 订阅列表中新登记的公众号，关联已有的同名文章
+            self.conn.execute("""
+                UPDATE articles
+                SET account_id = (SELECT account_id FROM accounts WHERE name = articles.account_name)
+                WHERE account_id IS NULL AND account_name IS NOT NULL AND account_name != ''
+            """)
+
+        if changed:
+            logger.info(f"已同步公众号: {changed} 个新增或变更")
+        return changed
+
+    def compact_stats(self, keep_days: int = 30, resolution: str = 'week',
+                      dry_run: bool = False) -> Dict:
+        """
+        对较早的统计快照降采样
+
+        早于 keep_days 天的快照，每篇文章每周（或每月）只保留当期最后一条，
+        另外始终保留文章的第一条和最后一条快照；最近的快照保持完整分辨率。
+        被压缩的文章会记录压缩到的日期，之后重新迁移时不会再写回已删除的快照。
+
+        Args:
+            keep_days: 保留完整分辨率的天数
+            resolution: 降采样粒度，'week' 或 'month'
+            dry_run: 只统计将删除的行数，不实际删除
+
+        Returns:
+            {'cutoff_date', 'resolution', 'rows_before', 'rows_deleted', 'articles_affected', 'duration_seconds'}
+        """
+        if resolution not in COMPACTION_RESOLUTIONS:
+            raise ValueError(f"不支持的降采样粒度: {resolution}")
+
+        started = datetime.now()
+        cutoff_date = (started - timedelta(days=keep_days)).strftime('%Y-%m-%d')
+
+        with self.transaction():
+            cursor = self.conn.cursor()
+            rows_before = cursor.execute("SELECT COUNT(*) FROM article_stats").fetchone()[0]
+
+            cursor.execute("DROP TABLE IF EXISTS temp.compact_stats_ids")
+            cursor.execute("""
+                CREATE TEMP TABLE compact_stats_ids AS
+                SELECT id, article_id
+                FROM (
+                    SELECT
+                        id, article_id, fetched_date,
+                        ROW_NUMBER() OVER (PARTITION BY article_id ORDER BY fetched_date ASC) AS first_rank,
+                        ROW_NUMBER() OVER (PARTITION BY article_id ORDER BY fetched_date DESC) AS last_rank,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY article_id, strftime(?, fetched_date)
+                            ORDER BY fetched_date DESC
+                        ) AS bucket_rank
+                    FROM article_stats
+                )
+                WHERE fetched_date < ?
+                  AND first_rank > 1
+                  AND last_rank > 1
+                  AND bucket_rank > 1
+            """, (COMPACTION_RESOLUTIONS[resolution], cutoff_date))
+
+            rows_deleted, articles_affected = cursor.execute("""
+                SELECT COUNT(*), COUNT(DISTINCT article_id) FROM temp.compact_stats_ids
+            """).fetchone()
+
+            if not dry_run and rows_deleted:
+                cursor.execute("""
+                    INSERT INTO stats_compaction_marks (article_id, compacted_before, compacted_at)
+                    SELECT DISTINCT article_id, ?, ? FROM temp.compact_stats_ids WHERE true
+                    ON CONFLICT(article_id) DO UPDATE SET
+                        compacted_before = MAX(compacted_before, excluded.compacted_before),
+                        compacted_at = excluded.compacted_at
+                """, (cutoff_date, started.strftime('%Y-%m-%d %H:%M:%S')))
+
+                cursor.execute("""
+                    DELETE FROM article_stats
+                    WHERE id IN (SELECT id FROM temp.compact_stats_ids)
+                """)
+
+            cursor.execute("DROP TABLE temp.compact_stats_ids")
+
+            result = {
+                'cutoff_date': cutoff_date,
+                'resolution': resolution,
+                'rows_before': rows_before,
+                'rows_deleted': rows_deleted,
+                'articles_affected': articles_affected,
+                'duration_seconds': round((datetime.now() - started).total_seconds(), 3)
+            }
+
+            if not dry_run:
+                cursor.execute("""
+                    INSERT INTO stats_compaction_log
+                    (run_at, cutoff_date, resolution, rows_before, rows_deleted,
+                     articles_affected, duration_seconds)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (started.strftime('%Y-%m-%d %H:%M:%S'), cutoff_date, resolution, rows_before,
+                      rows_deleted, articles_affected, result['duration_seconds']))
+
+        if not dry_run:
+            logger.info(f"统计数据降采样完成: 删除 {rows_deleted}/{rows_before} 条, "
+                        f"涉及 {articles_affected} 篇文章")
+        return result
+
+    def _file_size(self) -> int:
+        """数据库文件及 -wal 文件的总大小（字节）"""
+        return sum(path.stat().st_size for path in
+                   (self.db_path, self.db_path.with_name(self.db_path.name + "-wal"))
+                   if path.exists())
+
+    def _pragma(self, name: str) -> int:
+        """读取一个整数 PRAGMA"""
+        return self.conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+    @_serialized
+    def maintain(self, vacuum: bool = True, integrity: str = 'full') -> Dict:
+        """
+        数据库维护：刷新查询规划器统计信息、回收空闲页、检查完整性
+
+        1. 首次运行时把 auto_vacuum 切换为 INCREMENTAL（需要一次完整 VACUUM）
+        2. ANALYZE + PRAGMA optimize，查询规划器按实际数据分布选择索引
+        3. PRAGMA incremental_vacuum 把空闲页归还给文件系统（删除、降采样、归档后产生）
+        4. 检查点并截断 -wal 文件
+        5. integrity_check（integrity='quick' 时为 quick_check）
+
+        Args:
+            vacuum: 是否回收空闲页
+            integrity: 'full'、'quick' 或 'none'
+
+        Returns:
+            {'size_before', 'size_after', 'page_size', 'page_count', 'freelist_before',
+             'freelist_ratio', 'pages_reclaimed', 'converted_auto_vacuum', 'integrity',
+             'integrity_ok', 'duration_seconds'}
+        """
+        if integrity not in ('full', 'quick', 'none'):
+            raise ValueError(f"未知的完整性检查方式: {integrity}")
+        if self._tx_depth:
+            raise RuntimeError("不能在事务中执行数据库维护")
+
+        started = datetime.now()
+        size_before = self._file_size()
+        page_size = self._pragma("page_size")
+        pages_before = self._pragma("page_count")
+        freelist_before = self._pragma("freelist_count")
+        converted = False
+        pages_reclaimed = 0
+
+        # VACUUM 不能在事务中执行；auto_vacuum 模式只有在 VACUUM 后才会生效
+        if vacuum and self._pragma("auto_vacuum") != 2:
+            logger.info("切换 auto_vacuum = INCREMENTAL（执行一次完整 VACUUM）")
+            self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self.conn.execute("VACUUM")
+            converted = True
+            pages_reclaimed = pages_before - self._pragma("page_count")
+
+        self.conn.execute("ANALYZE")
+        self.conn.execute("PRAGMA optimize")
+
+        if vacuum and not converted:
+            # execute() 只会执行 incremental_vacuum 的第一步（回收一页），executescript 才会执行完
+            self.conn.executescript("PRAGMA incremental_vacuum;")
+            pages_reclaimed = freelist_before - self._pragma("freelist_count")
+
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+        if integrity == 'none':
+            messages = []
+        else:
+            check = "integrity_check" if integrity == 'full' else "quick_check"
+            messages = [row[0] for row in self.conn.execute(f"PRAGMA {check}").fetchall()]
+        integrity_ok = messages in ([], ['ok'])
+
+        result = {
+            'size_before': size_before,
+            'size_after': self._file_size(),
+            'page_size': page_size,
+            'page_count': self._pragma("page_count"),
+            'freelist_before': freelist_before,
+            'freelist_ratio': freelist_before / pages_before if pages_before else 0,
+            'pages_reclaimed': pages_reclaimed,
+            'converted_auto_vacuum': converted,
+            'integrity': messages[:20],
+            'integrity_ok': integrity_ok,
+            'duration_seconds': round((datetime.now() - started).total_seconds(), 3)
+        }
+
+        with self.transaction():
+            self.conn.execute("""
+                INSERT INTO maintenance_log
+                (run_at, size_before, size_after, freelist_before, pages_reclaimed,
+                 converted_auto_vacuum, integrity, duration_seconds)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (started.strftime('%Y-%m-%d %H:%M:%S'), size_before, result['size_after'],
+                  freelist_before, pages_reclaimed, int(converted),
+                  'skipped' if integrity == 'none' else '\n'.join(messages[:20]),
+                  result['duration_seconds']))
+
+        if integrity_ok:
+            logger.info(f"数据库维护完成: {size_before} -> {result['size_after']} 字节, "
+                        f"回收 {pages_reclaimed} 页")
+        else:
+            logger.error(f"数据库完整性检查失败: {messages[:5]}")
+        return result
+
+    @property
+    def archive_dir(self) -> Path:
+        """月度归档库目录（与主库同目录下的 archive/）"""
+        return self.db_path.parent / "archive"
+
+    def archive_path(self, month: str) -> Path:
+        """
+        归档库文件路径
+
+        Args:
+            month: 月份 (YYYY-MM)
+        """
+        return self.archive_dir / f"{self.db_path.stem}_{month}.db"
+
+    def list_archive_months(self) -> List[str]:
+        """列出已有归档库的月份（升序）"""
+        prefix = f"{self.db_path.stem}_"
+        return sorted(path.stem[len(prefix):] for path in self.archive_dir.glob(f"{prefix}*.db"))
+
+    @staticmethod
+    def _months_between(start_date: str, end_date: str) -> List[str]:
+        """日期范围覆盖的月份列表 (YYYY-MM)"""
+        year, month = int(start_date[:4]), int(start_date[5:7])
+        end_year, end_month = int(end_date[:4]), int(end_date[5:7])
+        months = []
+        while (year, month) <= (end_year, end_month):
+            months.append(f"{year:04d}-{month:02d}")
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return months
+
+    @staticmethod
+    def _archive_month_of(conn: sqlite3.Connection, article_id: str) -> Optional[str]:
+        """文章所在的归档月份，未归档时返回 None"""
+        row = conn.execute(
+            "SELECT archive_month FROM archived_articles WHERE article_id = ?", (article_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    @contextmanager
+    def _attached_archive(self, conn: sqlite3.Connection, month: str):
+        """
+        在连接上临时 ATTACH 某个月的归档库（别名 archive），用完立即 DETACH
+
+        归档库文件不存在时不会创建，yield False。
+        """
+        path = self.archive_path(month)
+        if not path.exists():
+            yield False
+            return
+
+        conn.execute("ATTACH DATABASE ? AS archive", (str(path),))
+        try:
+            yield True
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute("DETACH DATABASE archive")
+
+    def archive_month(self, month: str) -> Dict:
+        """
+        把某个月发布的文章及其正文、统计数据移入该月的归档库
+
+        先在一个事务中复制到归档库并从主库删除；归档库写入使用 INSERT OR IGNORE，
+        中途失败后重新运行是安全的。已归档的文章记录在 archived_articles 中，
+        重新迁移时不会再写回主库。
+
+        Args:
+            month: 月份 (YYYY-MM)
+
+        Returns:
+            {'month', 'path', 'articles', 'stats'}
+        """
+        start_date = f"{month}-01"
+        year, mon = int(month[:4]), int(month[5:7])
+        next_month = f"{year + 1:04d}-01-01" if mon == 12 else f"{year:04d}-{mon + 1:02d}-01"
+
+        path = self.archive_path(month)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        article_columns = ', '.join(ARCHIVE_ARTICLE_COLUMNS)
+        stats_columns = ', '.join(ARCHIVE_STATS_COLUMNS)
+        content_columns = ', '.join(ARCHIVE_CONTENT_COLUMNS)
+
+        with self._write_lock:
+            self.conn.execute("ATTACH DATABASE ? AS archive", (str(path),))
+            try:
+                self._prepare_archive('archive')
+
+                with self.transaction():
+                    cursor = self.conn.cursor()
+                    cursor.execute("DROP TABLE IF EXISTS temp.archive_ids")
+                    cursor.execute("""
+                        CREATE TEMP TABLE archive_ids AS
+                        SELECT article_id FROM main.articles
+                        WHERE publish_ts >= ? AND publish_ts < ?
+                    """, (day_start_epoch(start_date), day_start_epoch(next_month)))
+
+                    cursor.execute(f"""
+                        INSERT OR IGNORE INTO archive.articles ({article_columns})
+                        SELECT {article_columns} FROM main.articles
+                        WHERE article_id IN (SELECT article_id FROM temp.archive_ids)
+                    """)
+                    articles = cursor.rowcount
+
+                    cursor.execute(f"""
+                        INSERT OR IGNORE INTO archive.article_stats ({stats_columns})
+                        SELECT {stats_columns} FROM main.article_stats
+                        WHERE article_id IN (SELECT article_id FROM temp.archive_ids)
+                    """)
+                    stats = cursor.rowcount
+
+                    cursor.execute(f"""
+                        INSERT OR IGNORE INTO archive.article_content ({content_columns})
+                        SELECT {content_columns} FROM main.article_content
+                        WHERE article_id IN (SELECT article_id FROM temp.archive_ids)
+                    """)
+
+                    cursor.execute("""
+                        INSERT OR IGNORE INTO main.archived_articles (article_id, archive_month, archived_at)
+                        SELECT article_id, ?, ? FROM temp.archive_ids
+                    """, (month, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+
+                    # 先删最新统计数据，article_stats 的删除触发器就不会逐行回填
+                    for table in ('article_latest_stats', 'article_stats', 'article_predictions',
+                                  'stats_compaction_marks', 'article_content', 'articles'):
+                        cursor.execute(f"""
+                            DELETE FROM main.{table}
+                            WHERE article_id IN (SELECT article_id FROM temp.archive_ids)
+                        """)
+
+                    cursor.execute("DROP TABLE temp.archive_ids")
+            finally:
+                self.conn.execute("DETACH DATABASE archive")
+
+        logger.info(f"已归档 {month}: {articles} 篇文章, {stats} 条统计数据 -> {path}")
+        return {'month': month, 'path': str(path), 'articles': articles, 'stats': stats}
+
+    def get_archivable_months(self, hot_months: int = 3) -> List[Tuple[str, int]]:
+        """
+        主库中可以归档的月份（早于最近 hot_months 个月）
+
+        Returns:
+            [(月份, 文章数), ...]，按月份升序
+        """
+        today = datetime.now()
+        year, month = today.year, today.month - hot_months + 1
+        while month < 1:
+            year, month = year - 1, month + 12
+        cutoff = f"{year:04d}-{month:02d}-01"
+
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT strftime('%Y-%m', publish_ts, 'unixepoch', 'localtime') AS month, COUNT(*)
+                FROM articles
+                WHERE publish_ts < ?
+                GROUP BY month
+                ORDER BY month
+            """, (day_start_epoch(cutoff),))
+            return [(row[0], row[1]) for row in cursor.fetchall()]
+
+    def save_predictions(self, predictions: List[Dict]) -> int:
+        """
+        保存增长曲线模型的预测结果（单个事务内整体替换）
+
+        不在本次结果中的旧预测（快照已被删除、文章已归档等）同时删除，
+        避免 fetch_recent_days_stats.py 按过时的 needs_refresh 跳过获取快照。
+
+        Args:
+            predictions: 预测结果列表，字段见 article_predictions 表
+
+        Returns:
+            写入的条数
+        """
+        article_ids = json.dumps([p['article_id'] for p in predictions])
+
+        with self.transaction():
+            self.conn.execute("""
+                DELETE FROM article_predictions
+                WHERE article_id NOT IN (SELECT value FROM json_each(?))
+            """, (article_ids,))
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO article_predictions
+                (article_id, predicted_final_reads, latest_read_num, saturation,
+                 confidence, tau_hours, snapshot_count, needs_refresh,
+                 model_version, updated_at)
+                VALUES
+                (:article_id, :predicted_final_reads, :latest_read_num, :saturation,
+                 :confidence, :tau_hours, :snapshot_count, :needs_refresh,
+                 :model_version, :updated_at)
+            """, predictions)
+
+        logger.info(f"已保存预测结果: {len(predictions)} 条")
+        return len(predictions)
+
+    def get_prediction(self, article_id: str) -> Optional[Dict]:
+        """
+        获取文章的阅读量预测
+
+        Args:
+            article_id: 文章 ID
+
+        Returns:
+            预测结果字典或 None（尚未预测）
+        """
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM article_predictions WHERE article_id = ?", (article_id,))
+            row = cursor.fetchone()
+
+            if row:
+                return dict(row)
+            return None
+
     def get_article(self, article_id: str) -> Optional[Dict]:
         """
         获取文章信息
@@ -218,13 +1842,26 @@ class WechatDatabase:
         Returns:
             文章信息字典或 None
         """
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM articles WHERE article_id = ?", (article_id,))
-        row = cursor.fetchone()
-
-        if row:
-            return dict(row)
-        return None
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM articles WHERE article_id = ?", (article_id,))
+            row = cursor.fetchone()
+
+            if row:
+                return dict(row)
+
+            # 已归档的文章从对应月份的归档库读取
+            month = self._archive_month_of(conn, article_id)
+            if month:
+                with self._attached_archive(conn, month) as attached:
+                    if attached:
+                        row = conn.execute(f"""
+                            SELECT {', '.join(ARCHIVE_ARTICLE_COLUMNS)}
+                            FROM archive.articles WHERE article_id = ?
+                        """, (article_id,)).fetchone()
+                        if row:
+                            return dict(row)
+            return None
 
     def get_article_stats(self, article_id: str) -> List[Dict]:
         """
@@ -236,15 +1873,221 @@ class WechatDatabase:
         Returns:
             统计数据列表
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM article_stats
-            WHERE article_id = ?
-            ORDER BY fetched_date ASC
-        """, (article_id,))
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT * FROM article_stats
+                WHERE article_id = ?
+                ORDER BY fetched_date ASC
+            """, (article_id,))
+            rows = [dict(row) for row in cursor.fetchall()]
+
+            # 已归档的文章从对应月份的归档库读取
+            if not rows:
+                month = self._archive_month_of(conn, article_id)
+                if month:
+                    with self._attached_archive(conn, month) as attached:
+                        if attached:
+                            cursor.execute(f"""
+                                SELECT {', '.join(ARCHIVE_STATS_COLUMNS)}
+                                FROM archive.article_stats
+                                WHERE article_id = ?
+                                ORDER BY fetched_date ASC
+                            """, (article_id,))
+                            rows = [dict(row) for row in cursor.fetchall()]
+
+            return rows
+
+    def get_article_content(self, article_id: str) -> Optional[str]:
+        """
+        读取并解压文章正文（只在需要全文时调用；摘要和长度见 get_content_info()）
+
+        Args:
+            article_id: 文章 ID
+
+        Returns:
+            Markdown 正文或 None（未保存正文）
+        """
+        with self.reader() as conn:
+            row = conn.execute(
+                "SELECT codec, body FROM article_content WHERE article_id = ?", (article_id,)
+            ).fetchone()
+
+            # 已归档的文章从对应月份的归档库读取
+            if row is None:
+                month = self._archive_month_of(conn, article_id)
+                if month:
+                    with self._attached_archive(conn, month) as attached:
+                        if attached:
+                            row = conn.execute(
+                                "SELECT codec, body FROM archive.article_content WHERE article_id = ?",
+                                (article_id,)
+                            ).fetchone()
+
+            if row is None:
+                return None
+            return decompress_content(row['codec'], row['body'])
+
+    def get_content_info(self, article_ids: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """
+        一次查询获取多篇（或全部）文章正文的长度、字数和摘要（不读取、不解压正文）
+
+        Args:
+            article_ids: 文章 ID 列表，为 None 时返回所有文章
+
+        Returns:
+            {article_id: {'content_length', 'word_count', 'summary'}}，没有保存正文的文章不在结果中
+        """
+        query = f"SELECT article_id, {', '.join(CONTENT_INFO_COLUMNS)} FROM article_content"
+        params = ()
+        if article_ids is not None:
+            query += " WHERE article_id IN (SELECT value FROM json_each(?))"
+            params = (json.dumps(list(article_ids)),)
+
+        with self.reader() as conn:
+            return {row['article_id']: {column: row[column] for column in CONTENT_INFO_COLUMNS}
+                    for row in conn.execute(query, params)}
+
+    def _iter_rows(self, sql: str, params: Tuple = (), row_format: str = 'dict',
+                   chunk_size: int = DEFAULT_BATCH_SIZE) -> Iterator:
+        """
+        在只读连接上流式读取查询结果，每次 fetchmany 取 chunk_size 行
+
+        迭代结束（或生成器被关闭）后才归还连接。
+
+        Args:
+            sql: 查询语句
+            params: 查询参数
+            row_format: 'dict'、'tuple' 或 'record'（见 ROW_FORMATS）
+            chunk_size: 每次从 SQLite 取出的行数
+
+        Yields:
+            每一行（按 row_format 转换）
+        """
+        if row_format not in ROW_FORMATS:
+            raise ValueError(f"未知的行格式: {row_format}，可选: {', '.join(ROW_FORMATS)}")
+
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            # 直接取普通元组，不经过 sqlite3.Row
+            cursor.row_factory = None
+            cursor.execute(sql, params)
+            columns = tuple(d[0] for d in cursor.description)
+
+            if row_format == 'record':
+                convert = _record_type(columns)._make
+            elif row_format == 'dict':
+                convert = lambda row: dict(zip(columns, row))
+            else:
+                convert = None
+
+            try:
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    if convert is None:
+                        yield from rows
+                    else:
+                        yield from map(convert, rows)
+            finally:
+                # 提前停止迭代时结束语句，连接归还后不会一直持有读快照
+                cursor.close()
+
+    def iter_articles(self, since: Optional[str] = None, until: Optional[str] = None,
+                      category: Optional[str] = None, row_format: str = 'dict',
+                      chunk_size: int = DEFAULT_BATCH_SIZE, include_undated: bool = False) -> Iterator:
+        """
+        按发布时间倒序流式读取文章（带最新统计数据、派生指标和正文长度/字数/摘要），内存占用与文章总数无关
+
+        Args:
+            since: 可选，只读取该日期（YYYY-MM-DD）及之后发布的文章
+            until: 可选，只读取该日期（YYYY-MM-DD）及之前发布的文章
+            category: 可选的分类筛选
+            row_format: 'dict'、'tuple' 或 'record'（见 ROW_FORMATS）
+            chunk_size: 每次从 SQLite 取出的行数
+            include_undated: 按日期筛选时是否保留没有发布时间的文章
+
+        Yields:
+            文章记录；没有统计数据/正文的文章对应字段为 None
+        """
+        conditions = []
+        params = []
+        # 按 publish_ts 做范围条件，和排序共用同一个索引
+        if since:
+            conditions.append("a.publish_ts >= ?")
+            params.append(day_start_epoch(since))
+        if until:
+            conditions.append("a.publish_ts < ?")
+            params.append(day_end_epoch(until))
+        if conditions and include_undated:
+            conditions = [f"(({' AND '.join(conditions)}) OR a.publish_ts IS NULL)"]
+        if category:
+            conditions.append("a.category = ?")
+            params.append(category)
+
+        query = ITER_ARTICLES_SQL
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY a.publish_ts DESC"
+
+        return self._iter_rows(query, tuple(params), row_format, chunk_size)
+
+    def iter_stats(self, article_ids: Optional[Iterable[str]] = None, row_format: str = 'dict',
+                   chunk_size: int = DEFAULT_BATCH_SIZE) -> Iterator:
+        """
+        按 (article_id, fetched_date) 顺序流式读取统计快照，内存占用与快照总数无关
+
+        Args:
+            article_ids: 文章 ID 列表，为 None 时读取所有文章
+            row_format: 'dict'、'tuple' 或 'record'（见 ROW_FORMATS）
+            chunk_size: 每次从 SQLite 取出的行数
+
+        Yields:
+            统计快照（列见 STATS_HISTORY_COLUMNS）
+        """
+        query = f"SELECT {', '.join(STATS_HISTORY_COLUMNS)} FROM article_stats"
+        params = ()
+        if article_ids is not None:
+            # ID 列表以 JSON 数组传入，不受 SQL 变量个数上限限制
+            query += " WHERE article_id IN (SELECT value FROM json_each(?))"
+            params = (json.dumps(list(article_ids)),)
+        query += " ORDER BY article_id, fetched_date ASC"
+
+        return self._iter_rows(query, params, row_format, chunk_size)
+
+    def iter_stats_history(self, article_ids: Optional[Iterable[str]] = None,
+                           chunk_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Tuple[str, List[Dict]]]:
+        """
+        逐篇文章流式读取统计数据历史（同时只在内存中保留一篇文章的快照）
+
+        Args:
+            article_ids: 文章 ID 列表，为 None 时读取所有文章
+            chunk_size: 每次从 SQLite 取出的行数
+
+        Yields:
+            (article_id, 按日期排序的统计数据列表)，没有统计数据的文章不会出现
+        """
+        rows = self.iter_stats(article_ids, row_format='dict', chunk_size=chunk_size)
+        for article_id, group in groupby(rows, key=itemgetter('article_id')):
+            yield article_id, list(group)
+
+    def get_stats_history_bulk(self, article_ids: Optional[Iterable[str]] = None) -> Dict[str, List[Dict]]:
+        """
+        一次查询获取多篇（或全部）文章的统计数据历史
+
+        按 (article_id, fetched_date) 索引顺序扫描一次后分组（见 iter_stats_history()），
+        避免逐篇调用 get_article_stats() 的 N+1 查询。
 
-        return [dict(row) for row in cursor.fetchall()]
+        Args:
+            article_ids: 文章 ID 列表，为 None 时返回所有文章
 
+        Returns:
+            {article_id: 按日期排序的统计数据列表}，没有统计数据的文章不在结果中
+        """
+        return dict(self.iter_stats_history(article_ids))
+
+    @_cached_read
     def get_latest_articles(self, limit: int = 50, category: Optional[str] = None) -> List[Dict]:
         """
         获取最新文章列表（带最新统计数据）
@@ -256,9 +2099,53 @@ class WechatDatabase:
         Returns:
             文章列表，每篇文章包含最新统计数据
         """
-        cursor = self.conn.cursor()
+        with self.reader() as conn:
+            cursor = conn.cursor()
+
+            query = """
+                SELECT
+                    a.*,
+                    s.read_num,
+                    s.like_num,
+                    s.looking_num,
+                    s.in_comment_num,
+                    s.share_num,
+                    s.collect_num,
+                    s.engagement_rate,
+                    s.virality_index,
+                    s.content_value,
+                    s.hotness_score,
+                    s.fetched_date as latest_stats_date
+                FROM articles a
+                LEFT JOIN article_latest_stats s ON a.article_id = s.article_id
+            """
+
+            if category:
+                query += " WHERE a.category = ?"
+                cursor.execute(query + " ORDER BY a.publish_ts DESC LIMIT ?", (category, limit))
+            else:
+                cursor.execute(query + " ORDER BY a.publish_ts DESC LIMIT ?", (limit,))
+
+            return [dict(row) for row in cursor.fetchall()]
+
+    @_cached_read
+    def get_top_articles(self, metric: str = 'read_num', limit: int = 10,
+                         since: Optional[str] = None) -> List[Dict]:
+        """
+        获取按最新统计指标排名的热门文章
 
-        query = """
+        Args:
+            metric: 排序指标，取值见 RANKING_METRICS（含 hotness_score 等派生指标）
+            limit: 返回数量限制
+            since: 可选，只统计该日期（YYYY-MM-DD）及之后发布的文章
+
+        Returns:
+            文章列表，每篇文章包含最新统计数据和派生指标
+        """
+        if metric not in RANKING_METRICS:
+            raise ValueError(f"不支持的排序指标: {metric}")
+
+        query = f"""
             SELECT
                 a.*,
                 s.read_num,
@@ -267,86 +2154,269 @@ class WechatDatabase:
                 s.in_comment_num,
                 s.share_num,
                 s.collect_num,
+                s.engagement_rate,
+                s.virality_index,
+                s.content_value,
+                s.hotness_score,
                 s.fetched_date as latest_stats_date
-            FROM articles a
-            LEFT JOIN (
-                SELECT article_id,
-                       read_num, like_num, looking_num, in_comment_num,
-                       share_num, collect_num, fetched_date
-                FROM article_stats
-                WHERE (article_id, fetched_date) IN (
-                    SELECT article_id, MAX(fetched_date)
-                    FROM article_stats
-                    GROUP BY article_id
-                )
-            ) s ON a.article_id = s.article_id
+            FROM article_latest_stats s
+            INNER JOIN articles a ON a.article_id = s.article_id
+            WHERE s.{metric} > 0
         """
+        params = []
+        if since:
+            query += " AND a.publish_ts >= ?"
+            params.append(day_start_epoch(since))
+        query += f" ORDER BY s.{metric} DESC LIMIT ?"
+        params.append(limit)
 
-        if category:
-            query += " WHERE a.category = ?"
-            cursor.execute(query + " ORDER BY a.publish_time DESC LIMIT ?", (category, limit))
-        else:
-            cursor.execute(query + " ORDER BY a.publish_time DESC LIMIT ?", (limit,))
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
 
-        return [dict(row) for row in cursor.fetchall()]
+            return [dict(row) for row in cursor.fetchall()]
 
-    def get_articles_by_date_range(self, start_date: str, end_date: str) -> List[Dict]:
+    def search_articles(self, keyword: str, limit: int = 50) -> List[Dict]:
+        """
+        全文搜索文章（标题、公众号名和正文）
+
+        关键词按空格拆分，所有词都需出现；结果按 bm25 相关度排序（标题权重最高），
+        并附带命中位置附近的正文片段。trigram 索引无法匹配少于 3 个字的词，
+        这种情况下在二元分词索引 articles_fts_short 上查找候选文章、再用 LIKE 确认，
+        按发布时间排序。
+
+        Args:
+            keyword: 搜索关键词
+            limit: 返回数量限制
+
+        Returns:
+            文章列表，每项包含 snippet（命中片段）
+        """
+        terms = keyword.split()
+        if not terms:
+            return []
+
+        with self.reader() as conn:
+            cursor = conn.cursor()
+
+            if all(len(term) >= TRIGRAM_MIN_LENGTH for term in terms):
+                # 每个词作为短语匹配，避免 FTS5 查询语法字符被误解析
+                match = " AND ".join('"' + term.replace('"', '""') + '"' for term in terms)
+                cursor.execute("""
+                    SELECT
+                        a.article_id, a.title, a.author, a.publish_time, a.account_name,
+                        snippet(articles_fts, 2, '【', '】', '…', 24) AS snippet,
+                        bm25(articles_fts, 10.0, 5.0, 1.0) AS rank
+                    FROM articles_fts
+                    INNER JOIN articles a ON a.rowid = articles_fts.rowid
+                    WHERE articles_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ?
+                """, (match, limit))
+                return [dict(row) for row in cursor.fetchall()]
+
+            matches = [m for m in (_short_match_query(term) for term in terms) if m]
+            if not matches:
+                # 关键词只有标点符号，无法使用任何索引
+                return []
+
+            conditions = " AND ".join(
+                "(f.title LIKE ? OR f.account_name LIKE ? OR f.body LIKE ?)" for _ in terms
+            )
+            params = [f'%{term}%' for term in terms for _ in range(3)]
+            cursor.execute(f"""
+                SELECT
+                    a.article_id, a.title, a.author, a.publish_time, a.account_name,
+                    f.body
+                FROM articles_fts_short
+                INNER JOIN articles_fts f ON f.rowid = articles_fts_short.rowid
+                INNER JOIN articles a ON a.rowid = articles_fts_short.rowid
+                WHERE articles_fts_short MATCH ? AND {conditions}
+                ORDER BY a.publish_ts DESC
+                LIMIT ?
+            """, [" AND ".join(matches)] + params + [limit])
+
+            results = []
+            for row in cursor.fetchall():
+                result = dict(row)
+                result['snippet'] = self._make_snippet(result.pop('body') or '', terms[0])
+                result['rank'] = None
+                results.append(result)
+            return results
+
+    @staticmethod
+    def _make_snippet(text: str, term: str, width: int = 24) -> str:
+        """截取关键词附近的正文片段（LIKE 查询时使用，格式与 FTS5 snippet 一致）"""
+        pos = text.find(term)
+        if pos < 0:
+            return ''
+        start = max(0, pos - width // 2)
+        end = min(len(text), pos + len(term) + width // 2)
+        snippet = text[start:pos] + '【' + term + '】' + text[pos + len(term):end]
+        snippet = snippet.replace('\n', ' ')
+        return ('…' if start > 0 else '') + snippet + ('…' if end < len(text) else '')
+
+    @_cached_read
+    def get_articles_by_date_range(self, start_date: str, end_date: str,
+                                   include_archive: bool = False) -> List[Dict]:
         """
         获取指定日期范围内的文章
 
         Args:
             start_date: 开始日期 (YYYY-MM-DD)
             end_date: 结束日期 (YYYY-MM-DD)
+            include_archive: 是否同时查询范围内月份的归档库（只 ATTACH 需要的月份）
 
         Returns:
             文章列表
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM articles
-            WHERE DATE(publish_time) BETWEEN ? AND ?
-            ORDER BY publish_time DESC
-        """, (start_date, end_date))
+        columns = ', '.join(ARCHIVE_ARTICLE_COLUMNS)
+
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            time_range = (day_start_epoch(start_date), day_end_epoch(end_date))
+            cursor.execute(f"""
+                SELECT {columns} FROM articles
+                WHERE publish_ts >= ? AND publish_ts < ?
+                ORDER BY publish_ts DESC
+            """, time_range)
+            articles = [dict(row) for row in cursor.fetchall()]
+
+            if not include_archive:
+                return articles
+
+            for month in self._months_between(start_date, end_date):
+                with self._attached_archive(conn, month) as attached:
+                    if not attached:
+                        continue
+                    cursor.execute(f"""
+                        SELECT {columns} FROM archive.articles
+                        WHERE publish_ts >= ? AND publish_ts < ?
+                    """, time_range)
+                    articles.extend(dict(row) for row in cursor.fetchall())
+
+        articles.sort(key=lambda a: a['publish_ts'] or 0, reverse=True)
+        return articles
+
+    @_cached_read
+    def get_account_baselines(self, since: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        按公众号计算基准指标（基于每篇文章的最新统计数据）
+
+        Args:
+            since: 可选，只统计该日期（YYYY-MM-DD）及之后发布的文章
 
-        return [dict(row) for row in cursor.fetchall()]
+        Returns:
+            {account_name: {avg_read, avg_looking_rate, avg_share_rate, article_count}}
+        """
+        query = """
+            SELECT
+                ac.name,
+                AVG(s.read_num) AS avg_read,
+                AVG(s.looking_num * 1.0 / s.read_num) AS avg_looking_rate,
+                AVG(s.share_num * 1.0 / s.read_num) AS avg_share_rate,
+                COUNT(*) AS article_count
+            FROM articles a
+            INNER JOIN accounts ac ON ac.account_id = a.account_id
+            INNER JOIN article_latest_stats s ON s.article_id = a.article_id
+            WHERE s.read_num > 0
+        """
+        params = ()
+        if since:
+            query += " AND a.publish_ts >= ?"
+            params = (day_start_epoch(since),)
+        query += " GROUP BY a.account_id"
+
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+
+            return {
+                row['name']: {
+                    'avg_read': row['avg_read'],
+                    'avg_looking_rate': row['avg_looking_rate'],
+                    'avg_share_rate': row['avg_share_rate'],
+                    'article_count': row['article_count']
+                }
+                for row in cursor.fetchall()
+            }
 
     def get_stats_summary(self) -> Dict:
         """
         获取数据库统计摘要
 
         Returns:
-            包含总文章数、总统计记录数等信息的字典
+            包含总文章数、总统计记录数等信息的字典；
+            categories 中没有分类的文章以 None 为键
         """
-        cursor = self.conn.cursor()
+        summary = self._stats_summary()
+        summary['categories'] = {category: count for category, count in summary['categories']}
+        return summary
 
-        # 文章总数
-        cursor.execute("SELECT COUNT(*) FROM articles")
-        total_articles = cursor.fetchone()[0]
+    @_cached_read
+    def _stats_summary(self) -> Dict:
+        """
+        统计摘要的缓存部分
 
-        # 统计记录总数
-        cursor.execute("SELECT COUNT(*) FROM article_stats")
-        total_stats = cursor.fetchone()[0]
+        缓存值按 JSON 规范化，字典键会变成字符串，分类统计以 [分类, 文章数] 列表缓存，
+        由 get_stats_summary() 还原为字典，未分类的键保持为 None
 
-        # 各分类文章数
-        cursor.execute("""
-            SELECT category, COUNT(*) as count
-            FROM articles
-            GROUP BY category
-        """)
-        categories = {row[0]: row[1] for row in cursor.fetchall()}
+        Returns:
+            与 get_stats_summary() 相同，categories 为 [[分类, 文章数], ...]
+        """
+        with self.reader() as conn:
+            cursor = conn.cursor()
 
-        # 最新文章日期
-        cursor.execute("SELECT MAX(publish_time) FROM articles")
-        latest_article = cursor.fetchone()[0]
+            # 文章总数
+            cursor.execute("SELECT COUNT(*) FROM articles")
+            total_articles = cursor.fetchone()[0]
 
-        return {
-            'total_articles': total_articles,
-            'total_stats_records': total_stats,
-            'categories': categories,
-            'latest_article_date': latest_article
-        }
+            # 统计记录总数
+            cursor.execute("SELECT COUNT(*) FROM article_stats")
+            total_stats = cursor.fetchone()[0]
+
+            # 各分类文章数
+            cursor.execute("""
+                SELECT category, COUNT(*) as count
+                FROM articles
+                GROUP BY category
+            """)
+            categories = [[row[0], row[1]] for row in cursor.fetchall()]
+
+            # 各公众号文章数（按整数 account_id 分组，走 (account_id, publish_ts) 索引）
+            cursor.execute("""
+                SELECT ac.name, counts.count
+                FROM (
+                    SELECT account_id, COUNT(*) as count
+                    FROM articles
+                    WHERE account_id IS NOT NULL
+                    GROUP BY account_id
+                ) counts
+                INNER JOIN accounts ac ON ac.account_id = counts.account_id
+                ORDER BY counts.count DESC
+            """)
+            accounts = {row[0]: row[1] for row in cursor.fetchall()}
+
+            # 最新文章日期
+            cursor.execute("SELECT publish_time FROM articles ORDER BY publish_ts DESC LIMIT 1")
+            row = cursor.fetchone()
+            latest_article = row[0] if row else None
+
+            # 已移入月度归档库的文章数
+            cursor.execute("SELECT COUNT(*) FROM archived_articles")
+            archived_articles = cursor.fetchone()[0]
+
+            return {
+                'total_articles': total_articles,
+                'total_stats_records': total_stats,
+                'categories': categories,
+                'accounts': accounts,
+                'latest_article_date': latest_article,
+                'archived_articles': archived_articles
+            }
 
-    def _extract_article_id(self, url: str) -> Optional[str]:
+    @staticmethod
+    def extract_article_id(url: str) -> Optional[str]:
         """
         从文章 URL 中提取 article_id
 
@@ -383,7 +2453,16 @@ class WechatDatabase:
 
     def close(self):
         """关闭数据库连接"""
+        if self.conn and self.pool:
+            self.cache.save(self.get_write_version())
+        if self.pool:
+            self.pool.close()
         if self.conn:
+            # 关闭前让 SQLite 按本次连接的查询情况按需刷新统计信息（通常几乎不耗时）
+            try:
+                self.conn.execute("PRAGMA optimize")
+            except sqlite3.Error as e:
+                logger.warning(f"PRAGMA optimize 失败: {e}")
             self.conn.close()
             logger.info("已关闭数据库连接")
 
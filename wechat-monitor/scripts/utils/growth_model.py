@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+阅读量增长曲线模型
+用 article_stats 的历史快照为每个公众号拟合饱和增长曲线，
+根据一两次早期快照预测文章最终阅读量，并判断再获取一次快照是否还有价值
+
+模型: reads(t) = R × (1 - exp(-t / τ))
+    t: 发布后经过的小时数
+    R: 文章最终阅读量（每篇文章一个）
+    τ: 增长时间常数（每个公众号一个）
+
+拟合方式: 对 τ 做网格搜索，给定 τ 时 R 有最小二乘闭式解，
+所有文章、所有候选 τ 在 numpy 中一次性向量化计算。
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# τ 候选网格（小时）
+TAU_GRID_HOURS = np.geomspace(2.0, 240.0, 48)
+
+# 饱和度达到该值（已达到预测最终值的比例）后，再获取快照的信息增益很小
+SATURATION_THRESHOLD = 0.95
+
+# 置信度低于该值时，仍然建议继续获取快照
+MIN_CONFIDENCE = 0.6
+
+MODEL_VERSION = "saturating-exp-v1"
+
+# 加载快照时每次从数据库取出的行数
+FETCH_CHUNK_SIZE = 10000
+
+
+def load_snapshots(db) -> Dict[str, np.ndarray]:
+    """
+    从数据库加载拟合所需的快照数据
+
+    Args:
+        db: WechatDatabase 实例
+
+    Returns:
+        {'article_ids', 'account_names', 'article_idx', 'age_hours', 'read_num'}
+        article_idx 为每条快照对应的文章下标（与 article_ids 对齐）
+    """
+    with db.reader() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute("""
+            SELECT
+                s.article_id,
+                COALESCE(a.account_name, '') AS account_name,
+                (s.fetched_ts - a.publish_ts) / 3600.0 AS age_hours,
+                s.read_num
+            FROM article_stats s
+            INNER JOIN articles a ON a.article_id = s.article_id
+            WHERE a.publish_ts IS NOT NULL
+              AND s.fetched_ts IS NOT NULL
+              AND s.read_num > 0
+            ORDER BY s.article_id, s.fetched_ts
+        """)
+
+        article_ids = []
+        account_names = []
+        article_idx = []
+        age_hours = []
+        read_num = []
+        positions = {}
+
+        # 逐批取出快照直接追加到各列，不先把整个结果集物化为行列表
+        while True:
+            rows = cursor.fetchmany(FETCH_CHUNK_SIZE)
+            if not rows:
+                break
+            for article_id, account_name, age, reads in rows:
+                if age is None or age <= 0:
+                    continue
+                if article_id not in positions:
+                    positions[article_id] = len(article_ids)
+                    article_ids.append(article_id)
+                    account_names.append(account_name)
+                article_idx.append(positions[article_id])
+                age_hours.append(age)
+                read_num.append(reads)
+
+    return {
+        'article_ids': np.array(article_ids, dtype=object),
+        'account_names': np.array(account_names, dtype=object),
+        'article_idx': np.array(article_idx, dtype=np.int64),
+        'age_hours': np.array(age_hours, dtype=np.float64),
+        'read_num': np.array(read_num, dtype=np.float64)
+    }
+
+
+def _fit_plateaus(article_idx, curve, read_num, n_articles):
+    """给定增长曲线值 f(t)（可为多列），按文章求 R 的最小二乘解 R = Σyf / Σf²"""
+    shape = (n_articles,) + curve.shape[1:]
+    weights = read_num.reshape((-1,) + (1,) * (curve.ndim - 1))
+    numerator = np.zeros(shape)
+    denominator = np.zeros(shape)
+    np.add.at(numerator, article_idx, weights * curve)
+    np.add.at(denominator, article_idx, curve * curve)
+    return numerator / np.maximum(denominator, 1e-12)
+
+
+def fit_growth_model(samples: Dict[str, np.ndarray]) -> Dict:
+    """
+    拟合各公众号的增长时间常数 τ
+
+    只有至少两次快照的文章能约束曲线形状，参与 τ 的拟合；
+    没有足够数据的公众号使用全体数据拟合出的全局 τ。
+
+    Args:
+        samples: load_snapshots() 的返回值
+
+    Returns:
+        {'global': {'tau_hours', 'residual'}, 'accounts': {account_name: {...}}}
+        residual 为对数空间的均方根残差
+    """
+    article_idx = samples['article_idx']
+    n_articles = len(samples['article_ids'])
+    if n_articles == 0:
+        return {'global': {'tau_hours': float(np.median(TAU_GRID_HOURS)), 'residual': 1.0}, 'accounts': {}}
+
+    snapshot_counts = np.bincount(article_idx, minlength=n_articles)
+    usable = snapshot_counts[article_idx] >= 2
+
+    accounts, account_of_article = np.unique(samples['account_names'], return_inverse=True)
+    account_idx = account_of_article[article_idx]
+
+    # (快照数, 候选τ数) 的增长曲线矩阵
+    curve = 1.0 - np.exp(-samples['age_hours'][:, None] / TAU_GRID_HOURS[None, :])
+    plateaus = _fit_plateaus(article_idx, curve, samples['read_num'], n_articles)
+    predicted = plateaus[article_idx] * curve
+    sq_error = (np.log1p(predicted) - np.log1p(samples['read_num'])[:, None]) ** 2
+    sq_error[~usable] = 0.0
+
+    # 按公众号汇总各候选 τ 的误差
+    account_error = np.zeros((len(accounts), len(TAU_GRID_HOURS)))
+    np.add.at(account_error, account_idx, sq_error)
+    account_samples = np.bincount(account_idx[usable], minlength=len(accounts))
+
+    global_error = account_error.sum(axis=0)
+    global_best = int(np.argmin(global_error))
+    total_samples = int(usable.sum())
+    global_model = {
+        'tau_hours': float(TAU_GRID_HOURS[global_best]),
+        'residual': float(np.sqrt(global_error[global_best] / total_samples)) if total_samples else 1.0
+    }
+
+    account_models = {}
+    for i, account_name in enumerate(accounts):
+        if account_samples[i] == 0:
+            account_models[account_name] = dict(global_model, samples=0, fallback=True)
+            continue
+        best = int(np.argmin(account_error[i]))
+        account_models[account_name] = {
+            'tau_hours': float(TAU_GRID_HOURS[best]),
+            'residual': float(np.sqrt(account_error[i, best] / account_samples[i])),
+            'samples': int(account_samples[i]),
+            'fallback': False
+        }
+
+    return {'global': global_model, 'accounts': account_models}
+
+
+def predict_final_reads(samples: Dict[str, np.ndarray], model: Dict) -> List[Dict]:
+    """
+    用拟合好的 τ 预测每篇文章的最终阅读量
+
+    只有一次快照的文章也能预测（R = y / f(t)）；快照越晚、越接近饱和，置信度越高。
+
+    Args:
+        samples: load_snapshots() 的返回值
+        model: fit_growth_model() 的返回值
+
+    Returns:
+        预测结果列表，每篇文章一条
+    """
+    article_ids = samples['article_ids']
+    n_articles = len(article_ids)
+    if n_articles == 0:
+        return []
+
+    article_idx = samples['article_idx']
+    account_models = model['accounts']
+    tau = np.array([account_models.get(name, model['global'])['tau_hours']
+                    for name in samples['account_names']])
+    residual = np.array([account_models.get(name, model['global'])['residual']
+                         for name in samples['account_names']])
+
+    curve = 1.0 - np.exp(-samples['age_hours'] / tau[article_idx])
+    plateaus = _fit_plateaus(article_idx, curve, samples['read_num'], n_articles)
+
+    # 快照按时间排序，每篇文章最后一条即最新快照
+    last_snapshot = np.zeros(n_articles, dtype=np.int64)
+    last_snapshot[article_idx] = np.arange(len(article_idx))
+    latest_reads = samples['read_num'][last_snapshot]
+    saturation = curve[last_snapshot]
+
+    # 最终阅读量不会低于已观测到的最新值
+    predicted = np.maximum(plateaus, latest_reads)
+    confidence = saturation * np.exp(-residual)
+    snapshot_counts = np.bincount(article_idx, minlength=n_articles)
+    needs_refresh = (saturation < SATURATION_THRESHOLD) | (confidence < MIN_CONFIDENCE)
+
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    predictions = []
+    for i in range(n_articles):
+        predictions.append({
+            'article_id': article_ids[i],
+            'predicted_final_reads': int(round(predicted[i])),
+            'latest_read_num': int(latest_reads[i]),
+            'saturation': round(float(saturation[i]), 4),
+            'confidence': round(float(confidence[i]), 4),
+            'tau_hours': round(float(tau[i]), 2),
+            'snapshot_count': int(snapshot_counts[i]),
+            'needs_refresh': bool(needs_refresh[i]),
+            'model_version': MODEL_VERSION,
+            'updated_at': now
+        })
+
+    return predictions
+
+
+def update_predictions(db) -> Dict:
+    """
+    加载快照、拟合模型并把预测结果写入 article_predictions 表
+
+    Args:
+        db: WechatDatabase 实例
+
+    Returns:
+        {'model': 拟合结果, 'predictions': 预测条数, 'skippable': 无需再获取快照的文章数}
+    """
+    samples = load_snapshots(db)
+    model = fit_growth_model(samples)
+    predictions = predict_final_reads(samples, model)
+    db.save_predictions(predictions)
+
+    skippable = sum(1 for p in predictions if not p['needs_refresh'])
+    logger.info(f"增长模型已更新: {len(predictions)} 篇预测, {skippable} 篇无需再获取快照")
+
+    return {'model': model, 'predictions': len(predictions), 'skippable': skippable}
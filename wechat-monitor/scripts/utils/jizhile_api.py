@@ -7,22 +7,31 @@
 
 import requests
 import time
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
+
+from .api_metrics import emit_event
 
 
 class JizhileAPI:
     """极致了API客户端"""
 
-    def __init__(self, api_key: str, verifycode: str = ""):
+    def __init__(self, api_key: str, verifycode: str = "",
+                 request_hooks: Optional[List[Callable]] = None,
+                 response_hooks: Optional[List[Callable]] = None):
         """
         初始化API客户端
 
         Args:
             api_key: 极致了API密钥
             verifycode: 附加码（可选）
+            request_hooks: 请求发出前调用的钩子列表，参数为 {'endpoint', 'url'}
+            response_hooks: 请求结束后调用的钩子列表，参数为调用事件
+                （耗时、状态码、错误类别、流量、费用，见 ApiMetrics）
         """
         self.api_key = api_key
         self.verifycode = verifycode
+        self.request_hooks = list(request_hooks or [])
+        self.response_hooks = list(response_hooks or [])
         self.base_url = "https://www.dajiala.com/fbmain/monitor/v3"
         self.session = requests.Session()
         self.session.headers.update({
@@ -57,6 +66,18 @@ class JizhileAPI:
         if self.verifycode:
             payload['verifycode'] = self.verifycode
 
+        event = {
+            'endpoint': 'read_zan_pro',
+            'url': article_url,
+            'status': None,
+            'error': None,
+            'bytes_sent': 0,
+            'bytes_received': 0,
+            'cost_money': 0
+        }
+        emit_event(self.request_hooks, {'endpoint': event['endpoint'], 'url': article_url})
+        start = time.perf_counter()
+
         try:
             response = self.session.post(
                 endpoint,
@@ -64,12 +85,17 @@ class JizhileAPI:
                 timeout=10
             )
 
+            event['status'] = response.status_code
+            event['bytes_sent'] = len(response.request.body or b'')
+            event['bytes_received'] = len(response.content)
+
             if response.status_code == 200:
                 result = response.json()
 
                 # 检查返回码
                 if result.get('code') == 0:
                     data = result.get('data', {})
+                    event['cost_money'] = result.get('cost_money', 0)
 
                     # 转换字段名以匹配系统格式
                     return {
@@ -83,18 +109,25 @@ class JizhileAPI:
                         'remain_money': result.get('remain_money', 0)
                     }
                 else:
+                    event['error'] = f"api_code_{result.get('code')}"
                     print(f"⚠️  API返回错误: {result.get('msg', '未知错误')}")
                     return None
             else:
+                event['error'] = 'http_error'
                 print(f"⚠️  HTTP错误: {response.status_code}")
                 return None
 
         except requests.exceptions.Timeout:
+            event['error'] = 'Timeout'
             print(f"⚠️  请求超时")
             return None
         except Exception as e:
+            event['error'] = type(e).__name__
             print(f"⚠️  请求失败: {e}")
             return None
+        finally:
+            event['latency'] = time.perf_counter() - start
+            emit_event(self.response_hooks, event)
 
     def batch_get_stats(self, article_urls: list, delay: float = 0.5) -> Dict[str, Dict]:
         """
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+互动指标模块
+互动率、传播指数、内容价值指数、综合热度分的统一定义
+
+同一组公式有两种形式：
+- compute_engagement_metrics(): Python 计算，用于 JSON 数据和历史快照
+- METRIC_SQL: SQL 表达式，作为 article_latest_stats 的生成列并建立索引，
+  使按指标排名可以直接在 SQL 中完成
+"""
+
+from typing import Dict
+
+# 派生指标名称
+DERIVED_METRICS = ('engagement_rate', 'virality_index', 'content_value', 'hotness_score')
+
+# 各指标的 SQL 表达式（阅读数为 0 时为 0，与 Python 版本一致）
+METRIC_SQL = {
+    # 1. 互动率 = (点赞数+在看数)/阅读量*1000
+    'engagement_rate': "(like_num + looking_num) * 1000.0 / read_num",
+    # 2. 传播指数 = (转发数×2+在看数)/阅读量*1000
+    'virality_index': "(share_num * 2 + looking_num) * 1000.0 / read_num",
+    # 3. 内容价值指数 = (收藏数×2+评论数)/阅读量*1000
+    'content_value': "(collect_num * 2 + in_comment_num) * 1000.0 / read_num",
+    # 4. 综合热度分 = (点赞×1+在看×2+评论×3+收藏×4+转发×5)/阅读量×100
+    'hotness_score': "(like_num * 1 + looking_num * 2 + in_comment_num * 3 + "
+                     "collect_num * 4 + share_num * 5) * 100.0 / read_num",
+}
+
+
+def metric_column_sql(metric: str) -> str:
+    """生成列定义（用于 ALTER TABLE ADD COLUMN）"""
+    return (f"REAL GENERATED ALWAYS AS "
+            f"(CASE WHEN read_num > 0 THEN {METRIC_SQL[metric]} ELSE 0 END) VIRTUAL")
+
+
+def compute_engagement_metrics(stats: Dict) -> Dict[str, float]:
+    """
+    根据一次统计快照计算互动指标
+
+    Args:
+        stats: 统计快照，字段同 stats_metadata.json / article_stats
+
+    Returns:
+        {'engagement_rate', 'virality_index', 'content_value', 'hotness_score'}
+    """
+    read_num = stats.get('read_num') or 0
+    like_num = stats.get('like_num') or 0
+    looking_num = stats.get('looking_num') or 0
+    comment_num = stats.get('in_comment_num') or 0
+    share_num = stats.get('share_num') or 0
+    collect_num = stats.get('collect_num') or 0
+
+    # 避免除零错误
+    if read_num <= 0:
+        return {metric: 0 for metric in DERIVED_METRICS}
+
+    return {
+        'engagement_rate': (like_num + looking_num) * 1000.0 / read_num,
+        'virality_index': (share_num * 2 + looking_num) * 1000.0 / read_num,
+        'content_value': (collect_num * 2 + comment_num) * 1000.0 / read_num,
+        'hotness_score': (like_num * 1 + looking_num * 2 + comment_num * 3 +
+                          collect_num * 4 + share_num * 5) * 100.0 / read_num
+    }
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parquet 列式快照导出模块
+把数据库中的文章、统计快照和派生互动指标按日期分区导出为 Parquet，
+分析任务可以只读取需要的列并做向量化计算，不必逐行遍历 SQLite / JSON
+
+目录结构（按文章发布月份做 Hive 风格分区，pyarrow.dataset / pandas.read_parquet 可直接识别）:
+    data/parquet/
+    ├── articles/publish_month=YYYY-MM/part-0.parquet       # 文章 + 最新统计 + 派生指标
+    ├── article_stats/publish_month=YYYY-MM/part-0.parquet  # 统计快照历史
+    └── _manifest.json                                      # 每个分区的签名、导出时的数据库写入版本
+
+增量导出: 每个分区在数据库中计算一个签名（行数、最后写入时间等），
+与 _manifest.json 中的记录一致时跳过，只重写发生变化的分区（日常只有最近一两个月）；
+已移入月度归档库的月份保留最后一次导出的分区，其余数据库中已不存在的分区会被删除
+"""
+
+import os
+import json
+import shutil
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow 为可选依赖，只有导出/读取 Parquet 时需要
+    pa = ds = pq = None
+
+from .database import STATS_METRICS, WechatDatabase
+from .metrics import DERIVED_METRICS
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "_manifest.json"
+# 清单中记录导出时数据库 write_version 的键，分析引擎据此判断快照是否落后于数据库
+MANIFEST_VERSION_KEY = "write_version"
+PART_FILE = "part-0.parquet"
+
+# 缺少发布日期的文章归入该分区
+UNKNOWN_PARTITION = "unknown"
+
+# 导出时每次从数据库取出并写成一个行组的行数
+EXPORT_CHUNK_SIZE = 50000
+
+ARTICLE_COLUMNS = ('article_id', 'title', 'author', 'publish_time', 'publish_date', 'url',
+                   'account_id', 'account_name', 'biz', 'category', 'collected_time',
+                   'updated_at', 'stats_fetched_date')
+STATS_COLUMNS = ('article_id', 'fetched_time', 'fetched_date', 'created_at')
+
+# 各数据集的分区字段、分区签名查询和单个分区的数据查询
+# （rows_sql 中的 {where} 由 _partition_filter() 替换为发布日期的范围条件，走 publish_date 索引）
+DATASETS = {
+    'articles': {
+        'partition': 'publish_month',
+        'signature_sql': f"""
+            SELECT COALESCE(strftime('%Y-%m', a.publish_date), '{UNKNOWN_PARTITION}') AS part,
+                   COUNT(*), MAX(a.updated_at), MAX(ls.fetched_time),
+                   TOTAL(ls.read_num), TOTAL({' + '.join(f'ls.{m}' for m in STATS_METRICS[1:])})
+            FROM articles a
+            LEFT JOIN article_latest_stats ls ON ls.article_id = a.article_id
+            GROUP BY part
+        """,
+        'rows_sql': f"""
+            SELECT {', '.join(f'a.{c}' for c in ARTICLE_COLUMNS[:-1])},
+                   ls.fetched_date AS stats_fetched_date,
+                   {', '.join(f'ls.{m}' for m in STATS_METRICS)},
+                   {', '.join(f'ls.{m}' for m in DERIVED_METRICS)}
+            FROM articles a
+            LEFT JOIN article_latest_stats ls ON ls.article_id = a.article_id
+            WHERE {{where}}
+            ORDER BY a.publish_ts
+        """,
+    },
+    'article_stats': {
+        'partition': 'publish_month',
+        'signature_sql': f"""
+            SELECT COALESCE(strftime('%Y-%m', a.publish_date), '{UNKNOWN_PARTITION}') AS part,
+                   COUNT(*), MAX(s.id), MAX(s.created_at)
+            FROM article_stats s
+            INNER JOIN articles a ON a.article_id = s.article_id
+            GROUP BY part
+        """,
+        'rows_sql': f"""
+            SELECT {', '.join(f's.{c}' for c in STATS_COLUMNS)},
+                   {', '.join(f's.{m}' for m in STATS_METRICS)}
+            FROM article_stats s
+            INNER JOIN articles a ON a.article_id = s.article_id
+            WHERE {{where}}
+            ORDER BY s.article_id, s.fetched_date
+        """,
+    },
+}
+
+
+def _require_pyarrow():
+    """pyarrow 未安装时给出安装提示"""
+    if pa is None:
+        raise ImportError("导出 Parquet 需要 pyarrow: pip install pyarrow")
+
+
+def _partition_filter(part: str):
+    """
+    单个分区的筛选条件
+
+    条件直接作用在 publish_date 列上（半开区间 / IS NULL），可以使用 idx_articles_publish_date，
+    重写一个分区只读取该月的文章，而不是扫描全表后再逐行计算月份
+
+    Args:
+        part: 分区值（YYYY-MM 或 unknown）
+
+    Returns:
+        (WHERE 条件, 参数)
+    """
+    if part == UNKNOWN_PARTITION:
+        return "a.publish_date IS NULL", ()
+    year, month = (int(x) for x in part.split('-'))
+    next_month = f"{year + month // 12:04d}-{month % 12 + 1:02d}-01"
+    return "a.publish_date >= ? AND a.publish_date < ?", (f"{part}-01", next_month)
+
+
+def _schema(name: str):
+    """各数据集的 Arrow 表结构（显式指定，保证所有分区类型一致）"""
+    counts = [pa.field(m, pa.int64()) for m in STATS_METRICS]
+    if name == 'articles':
+        fields = [pa.field(c, pa.int64() if c == 'account_id' else pa.string())
+                  for c in ARTICLE_COLUMNS]
+        fields += counts + [pa.field(m, pa.float64()) for m in DERIVED_METRICS]
+    else:
+        fields = [pa.field(c, pa.string()) for c in STATS_COLUMNS] + counts
+    return pa.schema(fields)
+
+
+def _load_manifest(export_dir: Path) -> Dict:
+    """读取分区签名记录，文件不存在或损坏时视为空"""
+    path = export_dir / MANIFEST_FILE
+    if not path.exists():
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"读取导出清单失败 {path}，将全量导出: {e}")
+        return {}
+
+
+def _save_manifest(export_dir: Path, manifest: Dict):
+    """原子写入分区签名记录"""
+    path = export_dir / MANIFEST_FILE
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _write_partition(path: Path, cursor, schema, chunk_size: int = EXPORT_CHUNK_SIZE) -> int:
+    """
+    把游标上的查询结果流式写入单个分区文件（先写临时文件再原子替换）
+
+    每次 fetchmany 取 chunk_size 行写成一个行组，内存占用与分区大小无关。
+    查询的列顺序必须与 schema 一致。
+
+    Returns:
+        写入的行数
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # 以 . 开头的临时文件会被 pyarrow.dataset 忽略
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    rows_written = 0
+
+    with pq.ParquetWriter(tmp_path, schema, compression='zstd') as writer:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            columns = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+            rows_written += len(rows)
+
+    os.replace(tmp_path, path)
+    return rows_written
+
+
+def export_parquet(db: WechatDatabase, export_dir: Path,
+                   datasets: Optional[Sequence[str]] = None, full: bool = False) -> Dict:
+    """
+    增量导出 Parquet 快照
+
+    Args:
+        db: 数据库实例
+        export_dir: 导出目录（如 data/parquet）
+        datasets: 要导出的数据集，默认全部（articles, article_stats）
+        full: 清空已导出的数据集并重写所有分区（已归档月份的分区也会被清除）
+
+    Returns:
+        {数据集: {'written', 'skipped', 'removed', 'rows'}}
+    """
+    _require_pyarrow()
+    export_dir = Path(export_dir)
+    export_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest = {} if full else _load_manifest(export_dir)
+    # 先记下版本号：导出期间有新的写入时快照会被视为落后，不会误判为最新
+    write_version = db.get_write_version()
+    archived_months = set(db.list_archive_months())
+    results = {}
+
+    for name in datasets or DATASETS:
+        spec = DATASETS[name]
+        schema = _schema(name)
+        dataset_dir = export_dir / name
+        exported = manifest.get(name, {})
+        result = {'written': 0, 'skipped': 0, 'removed': 0, 'rows': 0}
+        if full:
+            shutil.rmtree(dataset_dir, ignore_errors=True)
+
+        # 同一个只读连接内完成签名计算和数据读取，读到的是同一份快照
+        with db.reader() as conn:
+            conn.execute("BEGIN")
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(spec['signature_sql'])
+            signatures = {row[0]: list(row[1:]) for row in cursor.fetchall()}
+
+            for part, signature in sorted(signatures.items()):
+                path = dataset_dir / f"{spec['partition']}={part}" / PART_FILE
+                if exported.get(part) == signature and path.exists():
+                    result['skipped'] += 1
+                    continue
+
+                where, params = _partition_filter(part)
+                cursor.execute(spec['rows_sql'].format(where=where), params)
+                result['rows'] += _write_partition(path, cursor, schema)
+                result['written'] += 1
+
+        # 已归档的月份不再变化，保留其分区和签名；其余数据库中已不存在的分区删除
+        for part in set(exported) - set(signatures):
+            if part in archived_months:
+                signatures[part] = exported[part]
+                continue
+            shutil.rmtree(dataset_dir / f"{spec['partition']}={part}", ignore_errors=True)
+            result['removed'] += 1
+
+        manifest[name] = signatures
+        results[name] = result
+        logger.info(f"导出 {name}: 写入 {result['written']} 个分区 ({result['rows']} 行), "
+                    f"跳过 {result['skipped']}, 删除 {result['removed']}")
+
+    # 只导出了部分数据集时，快照整体不再对应某个版本
+    if set(datasets or DATASETS) == set(DATASETS):
+        manifest[MANIFEST_VERSION_KEY] = write_version
+    else:
+        manifest.pop(MANIFEST_VERSION_KEY, None)
+    _save_manifest(export_dir, manifest)
+    return results
+
+
+def exported_write_version(export_dir: Path) -> Optional[int]:
+    """
+    读取最近一次导出时数据库的写入版本号
+
+    Returns:
+        版本号，没有导出或旧版清单中没有记录时返回 None
+    """
+    return _load_manifest(Path(export_dir)).get(MANIFEST_VERSION_KEY)
+
+
+def read_dataset(export_dir: Path, name: str, columns: Optional[List[str]] = None,
+                 filter=None):
+    """
+    读取导出的数据集
+
+    Args:
+        export_dir: 导出目录
+        name: 数据集名称（articles / article_stats）
+        columns: 只读取的列（包括分区字段），默认全部
+        filter: pyarrow.dataset 过滤表达式，如 ds.field('publish_month') >= '2025-10'，
+                按分区字段过滤时只读取匹配的分区文件
+
+    Returns:
+        pyarrow.Table（需要 DataFrame 时调用 .to_pandas()）
+    """
+    _require_pyarrow()
+    dataset = ds.dataset(Path(export_dir) / name, format='parquet', partitioning='hive')
+    return dataset.to_table(columns=columns, filter=filter)
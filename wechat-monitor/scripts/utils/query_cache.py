@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+查询结果缓存模块
+按“查询 + 参数”缓存 WechatDatabase 的读查询结果，每条缓存记录数据库的写入版本号，
+版本号变化（有新的写事务提交）后缓存自动失效
+
+- 内存缓存: LRU，同一进程内重复查询直接返回
+- 磁盘持久化: 可选，保存为 JSON 文件，多次运行命令行工具之间也能复用
+- 大小上限: 序列化后超过 max_entry_bytes 的结果（如整表查询）不缓存，缓存文件不随数据量增长
+"""
+
+import os
+import copy
+import json
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# 缓存未命中的哨兵值（缓存值本身可能是 None）
+MISS = object()
+
+# 单条缓存记录序列化后的大小上限（字节），适合聚合结果和 LIMIT 查询
+DEFAULT_MAX_ENTRY_BYTES = 256 * 1024
+
+
+class QueryCache:
+    """
+    带写入版本号的查询结果缓存
+
+    缓存值需可 JSON 序列化：写入时即按 JSON 规范化（元组变为列表、字典键变为字符串），
+    保证内存命中和磁盘命中的结果一致；取出的值为深拷贝，调用方可以随意修改。
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 128,
+                 max_entry_bytes: int = DEFAULT_MAX_ENTRY_BYTES):
+        """
+        Args:
+            path: 持久化文件路径，为 None 时只在内存中缓存
+            max_entries: 最多缓存的查询数，超出时淘汰最久未使用的
+            max_entry_bytes: 单条结果序列化后的大小上限，超出时不缓存
+        """
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self.max_entry_bytes = max_entry_bytes
+        self.skipped = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+
+        if self.path and self.path.exists():
+            self._load()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """由查询名/SQL 和参数生成缓存键"""
+        return json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+
+    def get(self, key: str, version: int) -> Any:
+        """
+        取出缓存值
+
+        Returns:
+            缓存值；不存在或版本号已过期时返回 MISS
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry['version'] != version:
+            self.misses += 1
+            return MISS
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(entry['value'])
+
+    def put(self, key: str, version: int, value: Any) -> Any:
+        """
+        写入缓存值
+
+        Returns:
+            规范化后的值（与之后命中缓存时返回的结果一致）
+        """
+        text = json.dumps(value, ensure_ascii=False, default=str)
+        value = json.loads(text)
+        if len(text.encode('utf-8')) > self.max_entry_bytes:
+            # 结果过大（随数据量增长）时不缓存，已有的旧记录一并删除
+            self.skipped += 1
+            if self.entries.pop(key, None) is not None:
+                self._dirty = True
+            return value
+
+        self.entries[key] = {'version': version, 'value': value}
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self._dirty = True
+        return copy.deepcopy(value)
+
+    def clear(self):
+        """清空缓存"""
+        self.entries.clear()
+        self._dirty = True
+
+    def _load(self):
+        """从磁盘加载缓存，文件损坏时忽略"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for key, entry in data.get('entries', {}).items():
+                # 旧版本写入的超大记录（如整表查询结果）丢弃，下次保存时缓存文件随之缩小
+                size = len(json.dumps(entry.get('value'), ensure_ascii=False).encode('utf-8'))
+                if size > self.max_entry_bytes:
+                    self._dirty = True
+                    continue
+                self.entries[key] = entry
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"读取查询缓存失败 {self.path}: {e}")
+            self.entries.clear()
+
+    def save(self, version: Optional[int] = None):
+        """
+        持久化到磁盘（先写临时文件再原子替换）
+
+        Args:
+            version: 当前写入版本号；给出时只保存仍然有效的记录
+        """
+        if not self.path or not self._dirty:
+            return
+
+        entries = {
+            key: entry for key, entry in self.entries.items()
+            if version is None or entry['version'] == version
+        }
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': entries}, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"保存查询缓存失败 {self.path}: {e}")
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+互动数据历史日志模块
+每篇文章的互动数据历史以追加写入的 JSON Lines 文件保存（stats_history.jsonl）
+
+- 追加写入: 每条快照一行，O_APPEND 单次写入并 fsync，写入代价与历史长度无关
+- 容错读取: 写入中途被中断产生的残缺行会被跳过，不会丢弃整个历史
+- 压缩整理: compact_stats_history() 合并旧版 stats_history.json、去重后原子替换日志文件
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows 下没有 fcntl，退化为无锁写入
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+HISTORY_LOG_FILE = "stats_history.jsonl"
+LEGACY_HISTORY_FILE = "stats_history.json"
+LATEST_STATS_FILE = "stats_metadata.json"
+
+
+def _lock(fd: int):
+    """对文件加独占锁（无 fcntl 时跳过）"""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+
+def _unlock(fd: int):
+    """释放文件锁"""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def _write_json_atomic(path: Path, data: Dict):
+    """先写临时文件再 os.replace，保证文件要么是旧内容要么是新内容"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _open_log_locked(log_file: Path) -> int:
+    """
+    以追加模式打开日志文件并加锁
+
+    如果加锁期间文件被 compact_stats_history() 替换，重新打开新文件，
+    避免写入已被替换掉的旧文件。
+    """
+    while True:
+        fd = os.open(str(log_file), os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        _lock(fd)
+        try:
+            if os.fstat(fd).st_ino == os.stat(str(log_file)).st_ino:
+                return fd
+        except FileNotFoundError:
+            pass
+        _unlock(fd)
+        os.close(fd)
+
+
+def read_latest_stats(article_folder: Path) -> Optional[Dict]:
+    """
+    读取最新一次的互动数据（stats_metadata.json）
+
+    Returns:
+        统计快照字典，不存在或损坏时返回 None
+    """
+    latest_file = Path(article_folder) / LATEST_STATS_FILE
+    if not latest_file.exists():
+        return None
+
+    try:
+        with open(latest_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"读取最新互动数据失败 {latest_file}: {e}")
+        return None
+
+
+def append_stats_record(article_folder: Path, record: Dict) -> bool:
+    """
+    追加一条互动数据快照
+
+    先追加历史日志，再更新 stats_metadata.json：两次写入之间进程中断时，
+    日志中已经有这条快照，重新运行也不会丢失历史。
+    同一天已经记录过的快照不会重复追加（只比较日志最后一行的日期，O(1)），
+    但 stats_metadata.json 总会更新为最新数据。
+
+    Args:
+        article_folder: 文章目录
+        record: 统计快照，需包含 fetched_date
+
+    Returns:
+        bool: 是否追加了新的历史记录
+    """
+    article_folder = Path(article_folder)
+    appended = False
+
+    fd = _open_log_locked(article_folder / HISTORY_LOG_FILE)
+    try:
+        size = os.fstat(fd).st_size
+        if size > 0:
+            last_date = _last_record_date(fd, size)
+        else:
+            # 还没有日志（旧版目录只有 stats_history.json）时按最新数据判断
+            previous = read_latest_stats(article_folder)
+            last_date = previous.get('fetched_date') if previous else None
+
+        # 检查是否今天已经获取过（避免重复）
+        if last_date is None or last_date != record.get('fetched_date'):
+            line = (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+            # 上次写入被中断留下的残缺行没有换行符，先补上，避免与新记录粘连
+            if size > 0 and os.pread(fd, 1, size - 1) != b"\n":
+                line = b"\n" + line
+            os.write(fd, line)
+            os.fsync(fd)
+            appended = True
+    finally:
+        _unlock(fd)
+        os.close(fd)
+
+    # 保存最新数据
+    _write_json_atomic(article_folder / LATEST_STATS_FILE, record)
+    return appended
+
+
+def _last_record_date(fd: int, size: int, block_size: int = 4096) -> Optional[str]:
+    """
+    读取日志最后一条完整记录的 fetched_date（从文件末尾向前读，不读取整个日志）
+
+    Returns:
+        日期；最后一行残缺或无法解析时返回 None
+    """
+    tail = b""
+    offset = size
+    while offset > 0:
+        read_size = min(block_size, offset)
+        offset -= read_size
+        tail = os.pread(fd, read_size, offset) + tail
+        # 末尾之前出现换行符，说明已经读到完整的最后一行
+        if b"\n" in tail.rstrip(b"\n"):
+            break
+
+    lines = tail.rstrip(b"\n").split(b"\n")
+    if not tail.endswith(b"\n"):
+        return None  # 最后一行是写入中断留下的残缺行
+    try:
+        return json.loads(lines[-1].decode('utf-8')).get('fetched_date')
+    except (ValueError, AttributeError):
+        return None
+
+
+def _read_log_records(log_file: Path) -> List[Dict]:
+    """读取 JSON Lines 日志，跳过损坏或残缺的行"""
+    records = []
+    with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logger.warning(f"跳过损坏的历史记录 {log_file}:{line_no}")
+    return records
+
+
+def _read_legacy_records(legacy_file: Path) -> Optional[List[Dict]]:
+    """读取旧版 stats_history.json，损坏时返回 None（保留原文件，不覆盖）"""
+    try:
+        with open(legacy_file, 'r', encoding='utf-8') as f:
+            return json.load(f).get('history', [])
+    except (OSError, ValueError, AttributeError) as e:
+        logger.warning(f"读取旧版历史文件失败 {legacy_file}: {e}")
+        return None
+
+
+def _dedupe_by_date(records: List[Dict]) -> List[Dict]:
+    """按 fetched_date 去重（保留当天第一条），并按日期排序"""
+    seen = set()
+    unique = []
+    for record in records:
+        fetched_date = record.get('fetched_date')
+        if fetched_date in seen:
+            continue
+        seen.add(fetched_date)
+        unique.append(record)
+
+    unique.sort(key=lambda r: r.get('fetched_date') or '')
+    return unique
+
+
+def read_stats_history(article_folder: Path) -> List[Dict]:
+    """
+    读取文章的全部互动数据历史（按日期排序）
+
+    依次合并旧版 stats_history.json 和 stats_history.jsonl；
+    两者都没有时回退到 stats_metadata.json 中的单条数据。
+
+    Args:
+        article_folder: 文章目录
+
+    Returns:
+        统计快照列表，没有数据时为空列表
+    """
+    article_folder = Path(article_folder)
+    legacy_file = article_folder / LEGACY_HISTORY_FILE
+    log_file = article_folder / HISTORY_LOG_FILE
+
+    records = []
+    if legacy_file.exists():
+        records.extend(_read_legacy_records(legacy_file) or [])
+    if log_file.exists():
+        records.extend(_read_log_records(log_file))
+
+    if records:
+        return _dedupe_by_date(records)
+
+    # 兼容旧版本,只有单个stats文件
+    latest = read_latest_stats(article_folder)
+    return [latest] if latest else []
+
+
+def compact_stats_history(article_folder: Path) -> Optional[int]:
+    """
+    压缩整理互动数据历史
+
+    合并旧版 stats_history.json 与 stats_history.jsonl、去除残缺行和重复日期，
+    写入临时文件后原子替换日志；旧版 JSON 文件只有在成功解析并合并后才会删除。
+    日志已经是整理后的内容时不改写文件，文章目录的 mtime 保持不变，
+    migrate_to_db.py 的增量同步不会把它当作有变化的目录。
+
+    Args:
+        article_folder: 文章目录
+
+    Returns:
+        整理后的记录数；没有历史文件时返回 None
+    """
+    article_folder = Path(article_folder)
+    legacy_file = article_folder / LEGACY_HISTORY_FILE
+    log_file = article_folder / HISTORY_LOG_FILE
+
+    if not legacy_file.exists() and not log_file.exists():
+        return None
+
+    fd = _open_log_locked(log_file)
+    try:
+        legacy_records = _read_legacy_records(legacy_file) if legacy_file.exists() else []
+        records = _dedupe_by_date((legacy_records or []) + _read_log_records(log_file))
+        compacted = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode('utf-8')
+
+        # 没有需要合并的旧版记录、也没有残缺行 / 重复日期 / 乱序时，整理结果与现有日志逐字节相同
+        with open(log_file, 'rb') as f:
+            unchanged = f.read() == compacted
+
+        if not unchanged:
+            tmp_file = log_file.with_name(log_file.name + ".tmp")
+            with open(tmp_file, 'wb') as f:
+                f.write(compacted)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, log_file)
+
+        # 旧版文件已完整合并进日志后再删除；解析失败的旧文件原样保留
+        if legacy_records is not None and legacy_file.exists():
+            legacy_file.unlink()
+    finally:
+        _unlock(fd)
+        os.close(fd)
+
+    return len(records)
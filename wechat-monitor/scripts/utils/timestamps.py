@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+时间戳模块
+把发布时间、采集时间、统计获取时间的文本统一解析为整数 Unix 时间戳（秒）
+
+数据库中的文本时间来源不一：大多是 "YYYY-MM-DD HH:MM:SS"，
+但 RSS 解析失败时会原样保存 RFC 2822 字符串（如 "Mon, 20 Oct 2025 08:00:00 +0800"），
+字符串比较排序和范围筛选在这些值上会出错。整数时间戳列用于所有排序和范围查询。
+
+没有时区的时间按本地时区解释（容器中 TZ=Asia/Shanghai），
+与 SQLite 的 datetime(ts, 'unixepoch', 'localtime') 一致。
+"""
+
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from typing import Optional, Union
+
+# 标准文本格式（数据库中 publish_time / collected_time / fetched_time 的写法）
+CANONICAL_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# fromisoformat 无法解析时依次尝试的格式
+EXTRA_FORMATS = (
+    '%Y/%m/%d %H:%M:%S',
+    '%Y/%m/%d %H:%M',
+    '%Y/%m/%d',
+    '%Y%m%d %H%M%S',
+    '%Y%m%d_%H%M%S',
+    '%Y%m%d',
+    '%Y年%m月%d日 %H:%M',
+    '%Y年%m月%d日',
+)
+
+
+def parse_datetime(value: Union[str, int, float, datetime, None]) -> Optional[datetime]:
+    """
+    解析各种格式的时间
+
+    Args:
+        value: 时间文本、Unix 时间戳或 datetime
+
+    Returns:
+        datetime（带时区的会转换为本地时间并去掉时区），无法解析时返回 None
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value)
+    else:
+        text = str(value).strip()
+        dt = None
+        try:
+            # ISO 8601，包括 "YYYY-MM-DD HH:MM:SS"、"YYYY-MM-DDTHH:MM:SS+08:00"、"YYYY-MM-DD"
+            dt = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        except ValueError:
+            for fmt in EXTRA_FORMATS:
+                try:
+                    dt = datetime.strptime(text, fmt)
+                    break
+                except ValueError:
+                    continue
+        if dt is None:
+            # RSS 中的 RFC 2822 格式
+            try:
+                dt = parsedate_to_datetime(text)
+            except (TypeError, ValueError, IndexError):
+                return None
+            if dt is None:
+                return None
+
+    if dt.tzinfo is not None:
+        dt = dt.astimezone().replace(tzinfo=None)
+    return dt
+
+
+def to_epoch(value: Union[str, int, float, datetime, None]) -> Optional[int]:
+    """
+    转换为整数 Unix 时间戳（秒）
+
+    Returns:
+        时间戳，无法解析时返回 None
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value)
+    dt = parse_datetime(value)
+    return int(dt.timestamp()) if dt else None
+
+
+def normalize_time(value: Union[str, datetime, None]) -> Optional[str]:
+    """
+    统一为 "YYYY-MM-DD HH:MM:SS" 本地时间文本
+
+    Returns:
+        标准格式的文本；无法解析时原样返回（不丢弃原始数据）
+    """
+    dt = parse_datetime(value)
+    if dt is None:
+        return value
+    return dt.strftime(CANONICAL_FORMAT)
+
+
+def day_start_epoch(day: str) -> int:
+    """
+    某一天本地零点的时间戳
+
+    Args:
+        day: 日期 (YYYY-MM-DD 或 YYYYMMDD)
+    """
+    return int(_parse_day(day).timestamp())
+
+
+def day_end_epoch(day: str) -> int:
+    """某一天结束（次日本地零点）的时间戳，用作范围查询的开区间上界"""
+    return int((_parse_day(day) + timedelta(days=1)).timestamp())
+
+
+def _parse_day(day: str) -> datetime:
+    """解析 YYYY-MM-DD 或 YYYYMMDD"""
+    return datetime.strptime(day.replace('-', '')[:8], '%Y%m%d')
@@ -13,7 +13,13 @@ from datetime import datetime, timedelta
 from collections import defaultdict
 from typing import List, Dict, Tuple
 
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.stats_log import read_stats_history
+from utils.database import WechatDatabase
+
 PROJECT_ROOT = Path(__file__).parent.parent
+DB_PATH = PROJECT_ROOT / "data" / "wechat_monitor.db"
 
 
 def scan_recent_articles(articles_dir: Path, days: int = 30) -> List[Dict]:
@@ -58,21 +64,8 @@ def scan_recent_articles(articles_dir: Path, days: int = 30) -> List[Dict]:
             metadata = json.load(f)
 
         # 读取最新统计数据
-        stats_metadata_file = article_folder / "stats_metadata.json"
-        stats_history_file = article_folder / "stats_history.json"
-
-        latest_stats = None
-        stats_history = []
-
-        if stats_history_file.exists():
-            with open(stats_history_file, 'r', encoding='utf-8') as f:
-                history_data = json.load(f)
-                stats_history = history_data.get('history', [])
-                if stats_history:
-                    latest_stats = stats_history[-1]  # 最后一个是最新的
-        elif stats_metadata_file.exists():
-            with open(stats_metadata_file, 'r', encoding='utf-8') as f:
-                latest_stats = json.load(f)
+        stats_history = read_stats_history(article_folder)
+        latest_stats = stats_history[-1] if stats_history else None
 
         if not latest_stats:
             continue
@@ -484,9 +477,18 @@ def main(debug: bool = False):
         print("❌ 没有找到文章数据")
         return
 
-    # 计算基准指标
+    # 计算基准指标（有数据库时在 SQL 中按 account_id 聚合）
     print("📈 计算各公众号基准指标...")
-    baselines = calculate_account_baselines(articles)
+    if DB_PATH.exists():
+        since = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+        with WechatDatabase(str(DB_PATH)) as db:
+            baselines = db.get_account_baselines(since=since)
+        # 数据库中还没有的公众号（尚未迁移）用扫描到的文章补算
+        missing = [a for a in articles if a['account_name'] not in baselines]
+        if missing:
+            baselines.update(calculate_account_baselines(missing))
+    else:
+        baselines = calculate_account_baselines(articles)
     print(f"✅ 计算了 {len(baselines)} 个公众号的基准数据")
 
     # 检测爆款文章